@@ -4,30 +4,472 @@ imports infrastructure. All dependencies are constructed here and
 injected into route handlers via FastAPI's Depends() mechanism.
 
 Using @lru_cache ensures providers are singletons across requests.
+
+The Groq SDK and httpx are imported on first use rather than at module
+import, so app startup (and the simulated/replay modes) skip them; so is
+NumPy, which only the optional semantic cache needs, and the Unix-only
+shared-state backend used when SHARED_STATE_DIR is set.
 '''
+import asyncio
+import logging
+import os
+import secrets
 from functools import lru_cache
-from fastapi import Depends
+from typing import TYPE_CHECKING, Optional
+from fastapi import Depends, Header, Query, Request
+from starlette.requests import HTTPConnection
 from app.core.config import get_settings
-from app.infrastructure.llm.groq_provider import GroqProvider
-from app.infrastructure.persona_registry import PersonaRegistry
+from app.core.exceptions import AdminKeyRequiredError, PersonaNotFoundError
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.domain.interfaces.shared_state import RateLimiter, ResponseStore
+from app.infrastructure.admission import AdmissionController, TokenBucketLimiter
+from app.infrastructure.llm.caching_provider import CachingProvider
+from app.infrastructure.llm.circuit_breaker import CircuitBreaker, CircuitBreakerProvider
+from app.infrastructure.llm.health_probe import UpstreamHealthProbe
+from app.infrastructure.llm.routing_provider import Backend, RoutingProvider
+from app.infrastructure.llm.quota_scheduler import QuotaScheduler
+from app.infrastructure.llm.retrying_provider import RetryingProvider
+from app.infrastructure.llm.single_flight import SingleFlightProvider
+from app.infrastructure.llm.simulated_provider import SimulatedProvider
+from app.infrastructure.llm.replay_provider import ReplayProvider
+from app.infrastructure.llm.stream_fixtures import StreamRecorder, load_fixtures
+from app.infrastructure.enums import LLMProviderKind
+from app.infrastructure.llm.response_cache import ResponseCache
+from app.domain.interfaces.persona_repository import PersonaRepository
+from app.infrastructure.file_persona_repository import FilePersonaRepository
+from app.infrastructure.persona_loader import DEFAULT_PERSONA_DIR
+from app.infrastructure.metering import SqliteUsageStore, UsageMeter
+from app.infrastructure.session_store import InMemorySessionStore
+from app.infrastructure.stream_buffer import StreamRegistry
 from app.application.use_cases.chat_use_case import ChatUseCase
+from app.application.use_cases.panel_use_case import PanelUseCase
+from app.application.services.context_window import ContextWindow
+from app.application.services.language_guard import LanguageGuard
+from app.domain.enums import LanguagePolicy
+
+if TYPE_CHECKING:
+    import httpx
+    from app.infrastructure.llm.groq_provider import GroqProvider
+    from app.infrastructure.llm.semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_http_client() -> "httpx.AsyncClient":
+    '''Provide the singleton upstream HTTP connection pool shared by all Groq providers.'''
+    from app.infrastructure.llm.http_pool import build_http_client
+
+    settings = get_settings()
+    return build_http_client(
+        max_connections=settings.upstream_max_connections,
+        max_keepalive_connections=settings.upstream_max_keepalive_connections,
+        keepalive_expiry_seconds=settings.upstream_keepalive_expiry_seconds,
+        http2=settings.upstream_http2,
+        connect_timeout_seconds=settings.upstream_connect_timeout_seconds,
+        read_timeout_seconds=settings.upstream_read_timeout_seconds,
+    )
+
+
+def _build_groq_provider(model: str) -> "GroqProvider":
+    from app.infrastructure.llm.groq_provider import GroqProvider
+
+    settings = get_settings()
+    return GroqProvider(
+        api_key=settings.groq_api_key,
+        model=model,
+        http_client=get_http_client(),
+        warmup_connections=settings.upstream_warmup_connections,
+        recorder=get_stream_recorder(),
+        meter=get_usage_meter(),
+        # RetryingProvider owns retries when enabled; the SDK's would multiply them
+        max_retries=0 if settings.retry_enabled else 2,
+    )
 
 
 @lru_cache
-def get_groq_provider() -> GroqProvider:
+def get_stream_recorder() -> Optional[StreamRecorder]:
+    '''Provide the fixture recorder shared by Groq providers, if recording is enabled.'''
+    record_dir = get_settings().llm_record_dir
+    return StreamRecorder(record_dir) if record_dir else None
+
+
+@lru_cache
+def get_usage_meter() -> Optional[UsageMeter]:
+    '''Provide the usage meter shared by Groq providers, if a metering database is configured.'''
+    settings = get_settings()
+    if not settings.metering_db_path:
+        return None
+    if not settings.metering_client_key:
+        logger.warning("METERING_CLIENT_KEY is not set; per-client usage will not line up across restarts or workers.")
+    return UsageMeter(
+        SqliteUsageStore(settings.metering_db_path),
+        batch_size=settings.metering_batch_size,
+        flush_interval_seconds=settings.metering_flush_interval_seconds,
+        max_pending=settings.metering_max_pending,
+        client_secret=settings.metering_client_key,
+    )
+
+
+@lru_cache
+def get_groq_provider() -> "GroqProvider":
     '''Provide a singleton instance of the GroqProvider.'''
-    return GroqProvider(api_key=get_settings().groq_api_key)
+    return _build_groq_provider(get_settings().model)
 
 
 @lru_cache
-def get_persona_registry() -> PersonaRegistry:
-    '''Provide a singleton instance of the PersonaRegistry.'''
-    return PersonaRegistry()
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    '''Provide the breaker guarding the upstream provider, if enabled.'''
+    settings = get_settings()
+    if not settings.circuit_breaker_enabled:
+        return None
+    return CircuitBreaker(
+        failure_rate_threshold=settings.circuit_failure_rate,
+        slow_call_seconds=settings.circuit_slow_call_seconds,
+        slow_call_rate_threshold=settings.circuit_slow_call_rate,
+        window_size=settings.circuit_window_size,
+        min_calls=settings.circuit_min_calls,
+        open_seconds=settings.circuit_open_seconds,
+        half_open_probes=settings.circuit_half_open_probes,
+    )
+
+
+def enforce_circuit() -> None:
+    '''Reject with CircuitOpenError (503) before admission while the upstream circuit is open.'''
+    breaker = get_circuit_breaker()
+    if breaker is not None:
+        breaker.check()
+
+
+@lru_cache
+def get_health_probe() -> Optional[UpstreamHealthProbe]:
+    '''Provide the background upstream probe — Groq backends only, unless disabled.'''
+    settings = get_settings()
+    if settings.llm_provider != LLMProviderKind.GROQ or settings.health_probe_interval_seconds <= 0:
+        return None
+    provider = get_groq_provider()
+    return UpstreamHealthProbe(
+        check=lambda: provider.ping(settings.health_probe_timeout_seconds),
+        interval_seconds=settings.health_probe_interval_seconds,
+        timeout_seconds=settings.health_probe_timeout_seconds,
+    )
+
+
+def _shared_state_path(name: str) -> Optional[str]:
+    '''File for a host-wide structure, or None when state is kept per worker.'''
+    directory = get_settings().shared_state_dir
+    return os.path.join(directory, name) if directory else None
+
+
+@lru_cache
+def get_response_cache() -> ResponseStore:
+    '''Provide the response cache: shared by all workers if SHARED_STATE_DIR is set.'''
+    settings = get_settings()
+    path = _shared_state_path("response_cache.bin")
+    if path:
+        from app.infrastructure.shared_state import SharedResponseCache
+
+        return SharedResponseCache(
+            path,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+            max_entries=settings.response_cache_max_entries,
+            entry_bytes=settings.shared_cache_entry_bytes,
+        )
+    return ResponseCache(
+        ttl_seconds=settings.response_cache_ttl_seconds,
+        max_entries=settings.response_cache_max_entries,
+        max_bytes=settings.response_cache_max_bytes,
+    )
+
+
+@lru_cache
+def get_semantic_cache() -> Optional["SemanticCache"]:
+    '''Provide the near-duplicate response cache, if enabled and NumPy is installed.'''
+    settings = get_settings()
+    if not settings.semantic_cache_enabled:
+        return None
+    from app.infrastructure.llm import semantic_cache
+
+    if not semantic_cache.available():
+        logger.warning("SEMANTIC_CACHE_ENABLED is set but NumPy is not installed; semantic cache disabled.")
+        return None
+    return semantic_cache.SemanticCache(
+        embedder=semantic_cache.HashedNgramEmbedder(dim=settings.semantic_cache_dim),
+        max_entries=settings.semantic_cache_max_entries,
+        ttl_seconds=settings.semantic_cache_ttl_seconds,
+        max_history_messages=settings.semantic_cache_max_history,
+        max_message_chars=settings.semantic_cache_max_chars,
+    )
+
+
+def semantic_cache_threshold(persona_id: str) -> float:
+    '''The persona's own similarity threshold, falling back to the global setting.'''
+    try:
+        threshold = get_persona_registry().get(persona_id).semantic_cache_threshold
+    except PersonaNotFoundError:
+        threshold = None
+    return threshold if threshold is not None else get_settings().semantic_cache_threshold
+
+
+def _scheduled(provider: LLMProvider, headers_from: Optional["GroqProvider"]) -> LLMProvider:
+    '''Put a QuotaScheduler in front of one model, following `headers_from`'s x-ratelimit-* headers.'''
+    settings = get_settings()
+    scheduler = QuotaScheduler(
+        provider,
+        requests_limit=settings.quota_requests_limit,
+        requests_window_seconds=settings.quota_requests_window_seconds,
+        tokens_limit=settings.quota_tokens_per_minute,
+        max_wait_seconds=settings.quota_max_wait_seconds,
+    )
+    if headers_from is not None:
+        headers_from.rate_limit_listener = scheduler.observe_headers
+    return scheduler
+
+
+@lru_cache
+def get_llm_provider() -> LLMProvider:
+    '''
+    Provide the LLMProvider used by the use case: the Groq provider (or the
+    simulated / replay one selected by llm_provider), routed across extra models
+    when configured, with retries and mid-stream continuation, behind the circuit
+    breaker, quota scheduler, request coalescing, the semantic cache and the
+    exact-match response cache when enabled. Cache hits and coalesced requests
+    therefore never consume upstream quota. Groq's rate limits are per model,
+    so with routing each model gets its own quota scheduler inside the router.
+    '''
+    settings = get_settings()
+    routed = False
+    if settings.llm_provider == LLMProviderKind.SIMULATED:
+        groq_providers = []
+        provider: LLMProvider = SimulatedProvider(
+            ttft_seconds=settings.sim_ttft_seconds,
+            tokens_per_second=settings.sim_tokens_per_second,
+            chunk_tokens_max=settings.sim_chunk_tokens_max,
+            error_rate=settings.sim_error_rate,
+            stall_probability=settings.sim_stall_probability,
+            stall_seconds=settings.sim_stall_seconds,
+        )
+    elif settings.llm_provider == LLMProviderKind.REPLAY:
+        groq_providers = []
+        provider = ReplayProvider(
+            load_fixtures(settings.replay_fixture_dir or ""),
+            time_scale=settings.replay_time_scale,
+        )
+    else:
+        groq_providers = [get_groq_provider()] + [
+            _build_groq_provider(model) for model in settings.routing_models
+        ]
+        provider = groq_providers[0]
+        if settings.routing_models:
+            routed = True
+            backends = [
+                Backend(name=p.model, provider=_scheduled(p, p) if settings.quota_scheduler_enabled else p)
+                for p in groq_providers
+            ]
+            provider = RoutingProvider(
+                backends,
+                hedge_percentile=settings.hedge_percentile,
+                hedge_min_delay_seconds=settings.hedge_min_delay_seconds,
+                hedge_max_delay_seconds=settings.hedge_max_delay_seconds,
+            )
+    if settings.retry_enabled:
+        # Inside the breaker, so a request is one outcome however many attempts it took
+        provider = RetryingProvider(
+            provider,
+            max_retries=settings.retry_max_attempts,
+            max_continuations=settings.retry_max_continuations,
+            base_delay_seconds=settings.retry_base_delay_seconds,
+            max_delay_seconds=settings.retry_max_delay_seconds,
+        )
+    breaker = get_circuit_breaker()
+    if breaker is not None:
+        provider = CircuitBreakerProvider(provider, breaker)
+    if settings.quota_scheduler_enabled and not routed:
+        provider = _scheduled(provider, groq_providers[0] if groq_providers else None)
+    if settings.single_flight_enabled:
+        provider = SingleFlightProvider(provider)
+    semantic_cache = get_semantic_cache()
+    if semantic_cache is not None:
+        from app.infrastructure.llm.semantic_cache import SemanticCachingProvider
+
+        provider = SemanticCachingProvider(
+            provider,
+            cache=semantic_cache,
+            threshold_for=semantic_cache_threshold,
+            replay_delay_seconds=settings.response_cache_replay_delay_seconds,
+        )
+    if settings.response_cache_enabled:
+        provider = CachingProvider(
+            provider,
+            cache=get_response_cache(),
+            replay_delay_seconds=settings.response_cache_replay_delay_seconds,
+        )
+    return provider
+
+
+@lru_cache
+def get_persona_registry() -> PersonaRepository:
+    '''Provide a singleton FilePersonaRepository, hot-reloading its directory.'''
+    settings = get_settings()
+    registry = FilePersonaRepository(settings.persona_dir or DEFAULT_PERSONA_DIR)
+    if settings.persona_reload_interval_seconds > 0:
+        registry.start_watching(settings.persona_reload_interval_seconds)
+    return registry
+
+
+@lru_cache
+def get_session_store() -> InMemorySessionStore:
+    '''Provide a singleton instance of the InMemorySessionStore.'''
+    settings = get_settings()
+    return InMemorySessionStore(
+        ttl_seconds=settings.session_ttl_seconds,
+        max_sessions=settings.session_max_count,
+        max_bytes=settings.session_max_bytes,
+        max_messages=settings.session_max_messages,
+    )
+
+
+@lru_cache
+def get_context_window() -> ContextWindow:
+    '''Provide a singleton instance of the ContextWindow.'''
+    return ContextWindow(max_context_tokens=get_settings().context_max_tokens)
+
+
+@lru_cache
+def get_language_guard() -> Optional[LanguageGuard]:
+    '''Provide the streaming language guard, unless the policy is off.'''
+    settings = get_settings()
+    if settings.language_guard_policy == LanguagePolicy.OFF:
+        return None
+    return LanguageGuard(
+        policy=settings.language_guard_policy,
+        max_foreign_ratio=settings.language_guard_max_foreign_ratio,
+        min_letters=settings.language_guard_min_letters,
+        window_letters=settings.language_guard_window_letters,
+        max_regenerations=settings.language_guard_max_regenerations,
+    )
+
+
+@lru_cache
+def get_stream_registry() -> StreamRegistry:
+    '''Provide the singleton registry of resumable stream buffers.'''
+    settings = get_settings()
+    return StreamRegistry(
+        max_chunks=settings.stream_buffer_max_chunks,
+        ttl_seconds=settings.stream_buffer_ttl_seconds,
+        max_bytes=settings.stream_buffer_max_bytes,
+        resume_grace_seconds=settings.stream_resume_grace_seconds,
+    )
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    '''Provide the singleton stream admission controller; its cap is host-wide with shared state.'''
+    settings = get_settings()
+    path = _shared_state_path("admission.bin")
+    if path:
+        from app.infrastructure.shared_state import SharedSlotCounter
+
+        return AdmissionController(
+            max_queue=settings.admission_max_queue,
+            queue_timeout_seconds=settings.admission_queue_timeout_seconds,
+            slots=SharedSlotCounter(path, limit=settings.admission_max_in_flight),
+            poll_interval_seconds=settings.shared_state_poll_seconds,
+        )
+    return AdmissionController(
+        max_in_flight=settings.admission_max_in_flight,
+        max_queue=settings.admission_max_queue,
+        queue_timeout_seconds=settings.admission_queue_timeout_seconds,
+    )
+
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter:
+    '''Provide the singleton per-client token-bucket limiter, shared by all workers if configured.'''
+    settings = get_settings()
+    path = _shared_state_path("rate_limits.bin")
+    if path:
+        from app.infrastructure.shared_state import SharedTokenBucketLimiter
+
+        return SharedTokenBucketLimiter(
+            path,
+            rate_per_second=settings.rate_limit_per_minute / 60.0,
+            burst=settings.rate_limit_burst,
+            max_keys=settings.shared_rate_limit_max_keys,
+        )
+    return TokenBucketLimiter(
+        rate_per_second=settings.rate_limit_per_minute / 60.0,
+        burst=settings.rate_limit_burst,
+    )
+
+
+def client_key(request: HTTPConnection) -> str:
+    '''Identify a client by API key, else forwarded IP (if trusted), else peer IP.'''
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        return f"key:{api_key}"
+    if get_settings().trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return f"ip:{forwarded.split(',')[0].strip()}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def enforce_rate_limit(
+    request: Request,
+    limiter: RateLimiter = Depends(get_rate_limiter),
+) -> str:
+    '''Reject the request with RateLimitedError if the client's bucket is empty.'''
+    key = client_key(request)
+    if get_settings().rate_limit_enabled:
+        limiter.check(key)
+    return key
+
+
+def enforce_usage_admin(
+    group_by: list[str] = Query(["persona"]),
+    admin_key: Optional[str] = Header(None, alias="X-Admin-Key"),
+) -> None:
+    '''
+    Reject /usage with AdminKeyRequiredError (403) unless X-Admin-Key matches
+    USAGE_ADMIN_KEY. Without a configured key only per-client reports are refused.
+    '''
+    expected = get_settings().usage_admin_key
+    if expected is None:
+        if "client" in group_by:
+            raise AdminKeyRequiredError("Per-client usage reports require USAGE_ADMIN_KEY to be configured.")
+        return
+    if admin_key is None or not secrets.compare_digest(admin_key.encode(), expected.encode()):
+        raise AdminKeyRequiredError("A valid X-Admin-Key header is required for usage reports.")
 
 
 def get_chat_use_case(
-    llm: GroqProvider = Depends(get_groq_provider),
-    registry: PersonaRegistry = Depends(get_persona_registry),
+    llm: LLMProvider = Depends(get_llm_provider),
+    registry: PersonaRepository = Depends(get_persona_registry),
+    sessions: InMemorySessionStore = Depends(get_session_store),
+    context: ContextWindow = Depends(get_context_window),
+    language_guard: Optional[LanguageGuard] = Depends(get_language_guard),
 ) -> ChatUseCase:
     '''Inject dependencies into the ChatUseCase orchestrator.'''
-    return ChatUseCase(llm=llm, registry=registry)
+    return ChatUseCase(
+        llm=llm,
+        registry=registry,
+        sessions=sessions,
+        context=context,
+        language_guard=language_guard,
+    )
+
+
+@lru_cache
+def get_panel_limiter() -> asyncio.Semaphore:
+    '''Provide the semaphore shared by all panels to cap concurrent persona generations.'''
+    return asyncio.Semaphore(get_settings().panel_max_concurrency)
+
+
+def get_panel_use_case(
+    chat: ChatUseCase = Depends(get_chat_use_case),
+    limiter: asyncio.Semaphore = Depends(get_panel_limiter),
+    admission: AdmissionController = Depends(get_admission_controller),
+) -> PanelUseCase:
+    '''Inject the chat use case, shared concurrency cap and per-persona admission into the PanelUseCase.'''
+    return PanelUseCase(chat=chat, limiter=limiter, admit=admission.admit)
@@ -0,0 +1,102 @@
+'''
+Chat request ingestion — decodes a POST /api/v1/chat body in one pass.
+
+The generic FastAPI path materialises every history turn three times
+(a Pydantic HistoryItem, a domain Message, then a provider dict). This
+decoder validates the JSON while walking it once: user/assistant turns
+become Messages whose cached provider payload *is* the decoded dict,
+system turns are dropped on the spot, and history is skipped entirely
+when a session_id makes it irrelevant.
+
+Invalid bodies raise RequestValidationError, so clients see the same
+422 response as before. ChatRequest remains the documented schema.
+'''
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel
+from app.domain.entities.message import Message
+from app.domain.enums import MessageRole
+
+# Wire role -> MessageRole for turns that are kept; system turns are validated then dropped
+_HISTORY_ROLES = {"user": MessageRole.USER, "assistant": MessageRole.ASSISTANT}
+_ALL_ROLES = frozenset(role.value for role in MessageRole)
+
+
+@dataclass(slots=True)
+class ChatInput:
+    '''A decoded chat request, with history already filtered into domain Messages.'''
+    character: str
+    message: str
+    history: list[Message]
+    session_id: Optional[str] = None
+
+
+def _invalid(loc: tuple, msg: str, value: Any = None) -> RequestValidationError:
+    return RequestValidationError([{"type": "value_error", "loc": ("body", *loc), "msg": msg, "input": value}])
+
+
+def _require_str(data: dict, key: str) -> str:
+    value = data.get(key)
+    if type(value) is not str:
+        raise _invalid((key,), "Field required" if value is None else "Input should be a valid string", value)
+    return value
+
+
+def decode_chat_request(raw: bytes) -> ChatInput:
+    '''Parse and validate a chat request body in a single pass.'''
+    try:
+        data = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise _invalid((), f"JSON decode error: {exc}")
+    if type(data) is not dict:
+        raise _invalid((), "Input should be a valid dictionary", data)
+
+    character = _require_str(data, "character")
+    message = _require_str(data, "message")
+    session_id = data.get("session_id")
+    if session_id is not None and type(session_id) is not str:
+        raise _invalid(("session_id",), "Input should be a valid string", session_id)
+
+    history: list[Message] = []
+    raw_history = data.get("history")
+    # With a session the server-side history wins — don't spend time on the client's copy
+    if raw_history is not None and session_id is None:
+        if type(raw_history) is not list:
+            raise _invalid(("history",), "Input should be a valid list", raw_history)
+        append = history.append
+        for index, item in enumerate(raw_history):
+            if type(item) is not dict:
+                raise _invalid(("history", index), "Input should be a valid dictionary", item)
+            role = item.get("role")
+            content = item.get("content")
+            if type(content) is not str:
+                raise _invalid(("history", index, "content"), "Input should be a valid string", content)
+            kept = _HISTORY_ROLES.get(role)
+            if kept is None:
+                if role not in _ALL_ROLES:
+                    raise _invalid(("history", index, "role"), "Input should be 'user', 'assistant' or 'system'", role)
+                continue
+            # Reuse the decoded dict as the provider payload when it has exactly the wire keys
+            append(Message.from_payload(kept, item if len(item) == 2 else {"role": role, "content": content}))
+
+    return ChatInput(character=character, message=message, history=history, session_id=session_id)
+
+
+def openapi_body(model: type[BaseModel]) -> dict:
+    '''OpenAPI requestBody for a route that decodes its body by hand, with $defs inlined.'''
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    def inline(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref is not None and ref.startswith("#/$defs/"):
+                return inline(defs[ref.rsplit("/", 1)[1]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": inline(schema)}}}}
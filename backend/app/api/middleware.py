@@ -0,0 +1,21 @@
+'''
+ASGI middleware for the API layer.
+
+RequestTimingMiddleware stamps each HTTP request with its arrival time
+(request.state.received_at) so handlers can measure how long body
+parsing, validation and dependency resolution took. It is plain ASGI,
+so streaming responses pass through untouched.
+'''
+import time
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class RequestTimingMiddleware:
+    '''Record the perf_counter() arrival time of every HTTP request.'''
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["received_at"] = time.perf_counter()
+        await self.app(scope, receive, send)
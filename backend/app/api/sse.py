@@ -0,0 +1,283 @@
+'''
+Server-Sent Events output stage for streaming chat responses.
+
+Turns an async iterator of text chunks into framed SSE events:
+- `token` events carrying coalesced text as {"content": ...}
+- a final `done` event with stream statistics
+- an `error` event (with an ErrorCode) if the stream fails after the
+  response has started, instead of cutting the connection
+- `: keep-alive` comments while the upstream is idle
+
+While waiting for the next chunk, the client connection is polled via
+is_disconnected so a vanished client releases the chunk source within
+disconnect_poll_seconds, even before the first token arrives.
+
+When a stream_id is given, each event id is "<stream_id>:<offset>",
+where offset counts the chunks delivered so far, so a reconnecting
+client's Last-Event-ID says exactly where to resume.
+
+The first chunk is flushed immediately to keep time-to-first-token
+low. After that, chunks are buffered until either flush_bytes have
+accumulated or flush_interval_seconds have passed since the oldest
+buffered chunk, so one ASGI send carries many tokens.
+
+An optional on_finish callback receives the stream's StreamStats once
+it ends, however it ends, for metrics.
+
+panel_sse_stream frames a multi-persona PanelEvent stream the same way:
+token events carry {"persona", "content"} and are coalesced per persona,
+each persona ends with `persona_done` or `persona_error`, and a final
+`done` event summarises the panel. Its on_finish callback receives one
+StreamStats per persona.
+'''
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from app.application.use_cases.panel_use_case import PanelEvent
+from app.core.enums import ErrorCode
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = b": keep-alive\n\n"
+
+
+@dataclass
+class StreamStats:
+    '''What one SSE response delivered.'''
+    events: int = 0
+    characters: int = 0
+    bytes_sent: int = 0
+    duration_seconds: float = 0.0
+    error_code: Optional[str] = None
+
+
+def format_event(data: str, event: Optional[str] = None, event_id: Optional[str] = None) -> bytes:
+    '''Frame one SSE event. Multi-line data is split across data: fields.'''
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def _json(payload: dict) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+async def sse_stream(
+    chunks: AsyncIterator[str],
+    flush_interval_seconds: float = 0.03,
+    flush_bytes: int = 512,
+    heartbeat_seconds: float = 15.0,
+    stream_id: Optional[str] = None,
+    start_offset: int = 0,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    disconnect_poll_seconds: float = 1.0,
+    on_finish: Optional[Callable[[StreamStats], None]] = None,
+) -> AsyncIterator[bytes]:
+    '''Frame and coalesce a chunk stream into SSE events.'''
+    started = last_sent = time.monotonic()
+    buffer: list[str] = []
+    buffered_bytes = 0
+    buffered_since = 0.0
+    events = 0
+    chars = 0
+    offset = start_offset
+    pending: Optional[asyncio.Future] = None
+    stats = StreamStats()
+
+    def flush() -> bytes:
+        nonlocal buffer, buffered_bytes, events, offset
+        text = "".join(buffer)
+        offset += len(buffer)
+        buffer, buffered_bytes = [], 0
+        events += 1
+        event_id = f"{stream_id}:{offset}" if stream_id else str(events)
+        frame = format_event(_json({"content": text}), event="token", event_id=event_id)
+        stats.bytes_sent += len(frame)
+        return frame
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(chunks.__anext__())
+
+            deadline = buffered_since + flush_interval_seconds if buffer else last_sent + heartbeat_seconds
+            timeout = max(0.0, deadline - time.monotonic())
+            if is_disconnected is not None:
+                timeout = min(timeout, disconnect_poll_seconds)
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+            if not done:
+                if is_disconnected is not None and await is_disconnected():
+                    return
+                if time.monotonic() >= deadline:
+                    last_sent = time.monotonic()
+                    yield flush() if buffer else HEARTBEAT
+                continue
+
+            task, pending = pending, None
+            try:
+                chunk = task.result()
+            except StopAsyncIteration:
+                break
+
+            chars += len(chunk)
+            if not buffer:
+                buffered_since = time.monotonic()
+            buffer.append(chunk)
+            buffered_bytes += len(chunk.encode("utf-8"))
+            if events == 0 or buffered_bytes >= flush_bytes:
+                last_sent = time.monotonic()
+                yield flush()
+
+        if buffer:
+            yield flush()
+        yield format_event(_json({
+            "events": events,
+            "characters": chars,
+            "duration_ms": round((time.monotonic() - started) * 1000),
+        }), event="done")
+    except Exception as e:
+        logger.warning("Stream failed after response start: %s", e)
+        if buffer:
+            yield flush()
+        code = getattr(e, "code", ErrorCode.INTERNAL_ERROR)
+        stats.error_code = str(code)
+        yield format_event(_json({"code": str(code), "error": "The stream was interrupted."}), event="error")
+        return
+    finally:
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except BaseException:
+                pass
+        await chunks.aclose()
+        if on_finish is not None:
+            stats.events, stats.characters = events, chars
+            stats.duration_seconds = time.monotonic() - started
+            on_finish(stats)
+
+
+async def panel_sse_stream(
+    events: AsyncIterator[PanelEvent],
+    flush_interval_seconds: float = 0.03,
+    flush_bytes: int = 512,
+    heartbeat_seconds: float = 15.0,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    disconnect_poll_seconds: float = 1.0,
+    on_finish: Optional[Callable[[dict[str, StreamStats]], None]] = None,
+) -> AsyncIterator[bytes]:
+    '''Frame a multiplexed panel stream, coalescing each persona's tokens.'''
+    started = last_sent = time.monotonic()
+    buffers: dict[str, list[str]] = {}
+    buffered_bytes = 0
+    buffered_since = 0.0
+    first_sent: set[str] = set()
+    personas = failed = 0
+    pending: Optional[asyncio.Future] = None
+    stats: dict[str, StreamStats] = {}
+
+    def flush(persona_id: Optional[str] = None) -> bytes:
+        '''Frame buffered text for one persona, or for all of them.'''
+        nonlocal buffered_bytes
+        ids = [persona_id] if persona_id is not None else list(buffers)
+        frames = []
+        for pid in ids:
+            parts = buffers.pop(pid, None)
+            if parts:
+                text = "".join(parts)
+                frame = format_event(_json({"persona": pid, "content": text}), event="token")
+                persona_stats = stats.setdefault(pid, StreamStats())
+                persona_stats.events += 1
+                persona_stats.characters += len(text)
+                persona_stats.bytes_sent += len(frame)
+                frames.append(frame)
+        buffered_bytes = sum(len(part.encode("utf-8")) for parts in buffers.values() for part in parts)
+        return b"".join(frames)
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(events.__anext__())
+
+            deadline = buffered_since + flush_interval_seconds if buffers else last_sent + heartbeat_seconds
+            timeout = max(0.0, deadline - time.monotonic())
+            if is_disconnected is not None:
+                timeout = min(timeout, disconnect_poll_seconds)
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+            if not done:
+                if is_disconnected is not None and await is_disconnected():
+                    return
+                if time.monotonic() >= deadline:
+                    last_sent = time.monotonic()
+                    yield flush() if buffers else HEARTBEAT
+                continue
+
+            task, pending = pending, None
+            try:
+                event = task.result()
+            except StopAsyncIteration:
+                break
+
+            pid = event.persona_id
+            if event.done:
+                personas += 1
+                frame = flush(pid)
+                if event.error is None:
+                    frame += format_event(_json({"persona": pid}), event="persona_done")
+                else:
+                    failed += 1
+                    logger.warning("Panel persona %s failed: %s", pid, event.error)
+                    code = getattr(event.error, "code", ErrorCode.INTERNAL_ERROR)
+                    stats.setdefault(pid, StreamStats()).error_code = str(code)
+                    frame += format_event(_json({
+                        "persona": pid,
+                        "code": str(code),
+                        "error": "This persona's stream was interrupted.",
+                    }), event="persona_error")
+                last_sent = time.monotonic()
+                yield frame
+                continue
+
+            if not buffers:
+                buffered_since = time.monotonic()
+            buffers.setdefault(pid, []).append(event.content)
+            buffered_bytes += len(event.content.encode("utf-8"))
+            # Each persona's first chunk goes out at once to keep its TTFT low
+            if pid not in first_sent or buffered_bytes >= flush_bytes:
+                first_sent.add(pid)
+                last_sent = time.monotonic()
+                yield flush(pid) if buffered_bytes < flush_bytes else flush()
+
+        if buffers:
+            yield flush()
+        yield format_event(_json({
+            "personas": personas,
+            "failed": failed,
+            "duration_ms": round((time.monotonic() - started) * 1000),
+        }), event="done")
+    except Exception as e:
+        logger.warning("Panel stream failed after response start: %s", e)
+        code = getattr(e, "code", ErrorCode.INTERNAL_ERROR)
+        yield format_event(_json({"code": str(code), "error": "The stream was interrupted."}), event="error")
+    finally:
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except BaseException:
+                pass
+        await events.aclose()
+        if on_finish is not None:
+            elapsed = time.monotonic() - started
+            for persona_stats in stats.values():
+                persona_stats.duration_seconds = elapsed
+            on_finish(stats)
@@ -1,39 +1,218 @@
 '''
-Chat route — thin handler for POST /api/v1/chat.
+Chat route — thin handlers for POST /api/v1/chat, POST /api/v1/chat/panel
+and GET /api/v1/chat/resume.
 Contains zero business logic. All orchestration is delegated to
-ChatUseCase which is injected via Depends().
+ChatUseCase which is injected via Depends(); the response is framed
+as Server-Sent Events by app.api.sse.
+
+Each generation runs into a resumable stream buffer, so a client whose
+connection drops can reconnect with Last-Event-ID and continue from
+where it left off without another model call. Disconnects are detected
+while waiting for tokens too; a generation nobody resumes is cancelled
+after the resume grace period, closing the upstream response.
+
+A panel request streams several personas concurrently over one SSE
+connection; each persona holds its own admission slot (taken inside
+PanelUseCase) and the panel is not resumable.
+
+Parse time, admission queue time and the SSE events/bytes delivered
+are recorded per persona; in-stream errors are counted by ErrorCode.
 '''
-from fastapi import APIRouter, Depends
+import time
+from contextlib import aclosing
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Request
 from fastapi.responses import StreamingResponse
 
-from app.schemas.chat import ChatRequest
+from app.schemas.chat import ChatRequest, PanelRequest
 from app.application.use_cases.chat_use_case import ChatUseCase
+from app.application.use_cases.panel_use_case import PanelUseCase
 from app.domain.entities.message import Message
-from app.api.deps import get_chat_use_case
+from app.core.config import get_settings
+from app.core.exceptions import StreamNotFoundError
+from app.core.metrics import BYTES_SENT, ERRORS, EVENTS_SENT, QUEUE_SECONDS, REQUEST_PARSE_SECONDS
+from app.core.request_context import PRIORITY_PANEL, bind_request
+from app.core.tracing import span
+from app.api.ingest import decode_chat_request, openapi_body
+from app.api.sse import StreamStats, panel_sse_stream, sse_stream
+from app.api.deps import (
+    enforce_circuit,
+    enforce_rate_limit,
+    get_admission_controller,
+    get_chat_use_case,
+    get_panel_use_case,
+    get_stream_registry,
+)
 
 router = APIRouter()
 
-@router.post("/chat")
+SESSION_HEADER = "X-Session-ID"
+STREAM_HEADER = "X-Stream-ID"
+
+
+def _sse_response(
+    http_request: Request,
+    chunks,
+    stream_id: str,
+    persona_id: str,
+    start_offset: int = 0,
+    headers: Optional[dict] = None,
+) -> StreamingResponse:
+    '''Wrap a chunk iterator in an SSE StreamingResponse with resumable event ids.'''
+    settings = get_settings()
+
+    def record(stats: StreamStats) -> None:
+        EVENTS_SENT.inc(stats.events, persona=persona_id)
+        BYTES_SENT.inc(stats.bytes_sent, persona=persona_id)
+        if stats.error_code is not None:
+            ERRORS.inc(persona=persona_id, code=stats.error_code)
+
+    return StreamingResponse(
+        sse_stream(
+            chunks,
+            flush_interval_seconds=settings.sse_flush_interval_seconds,
+            flush_bytes=settings.sse_flush_bytes,
+            heartbeat_seconds=settings.sse_heartbeat_seconds,
+            stream_id=stream_id,
+            start_offset=start_offset,
+            is_disconnected=http_request.is_disconnected,
+            disconnect_poll_seconds=settings.sse_disconnect_poll_seconds,
+            on_finish=record,
+        ),
+        media_type="text/event-stream",
+        headers={
+            STREAM_HEADER: stream_id,
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            **(headers or {}),
+        },
+    )
+
+
+@router.post("/chat", openapi_extra=openapi_body(ChatRequest), dependencies=[Depends(enforce_circuit)])
 async def chat_endpoint(
-    request: ChatRequest,
+    http_request: Request,
     use_case: ChatUseCase = Depends(get_chat_use_case),
+    admission = Depends(get_admission_controller),
+    streams = Depends(get_stream_registry),
+    client_id: str = Depends(enforce_rate_limit),
 ):
     '''Handle chat requests by streaming responses from the requested AI persona.'''
-    # Convert history schema to domain entities
+    # One-pass decode straight into domain Messages (see app.api.ingest)
+    request = decode_chat_request(await http_request.body())
+    bind_request(client_id=client_id, persona_id=request.character)
+    received_at = getattr(http_request.state, "received_at", None)
+    if received_at is not None:
+        REQUEST_PARSE_SECONDS.observe(time.perf_counter() - received_at, persona=request.character)
+
+    # Perform lookups before stream to catch PersonaNotFoundError / SessionNotFoundError
+    # early (avoiding RuntimeError once the response has started)
+    use_case.registry.get(request.character)
+
+    # Wait for a stream slot — raises ServiceOverloadedError (429) when saturated.
+    # The slot is held until the generation finishes, which may outlive the
+    # connection while the stream stays resumable.
+    with span("chat.admit", persona=request.character):
+        ticket = await admission.admit()
+    QUEUE_SECONDS.observe(ticket.queue_seconds, persona=request.character)
+
+    # Opened once admitted, so rejected requests never create (and store) a session
+    try:
+        session = use_case.open_session(request.session_id, request.history)
+    except BaseException:
+        ticket.release()
+        raise
+
+    async def generate():
+        try:
+            async with aclosing(use_case.execute(
+                character_id=request.character,
+                user_message=request.message,
+                history=session.messages,
+                session_id=session.id,
+            )) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+        finally:
+            ticket.release()
+
+    try:
+        buffer = streams.create(generate(), persona_id=request.character, client_id=client_id)
+    except BaseException:
+        ticket.release()
+        raise
+
+    return _sse_response(
+        http_request,
+        buffer.read(),
+        stream_id=buffer.id,
+        persona_id=request.character,
+        headers={SESSION_HEADER: session.id},
+    )
+
+
+@router.post("/chat/panel", dependencies=[Depends(enforce_circuit)])
+async def panel_endpoint(
+    request: PanelRequest,
+    http_request: Request,
+    panel: PanelUseCase = Depends(get_panel_use_case),
+    client_id: str = Depends(enforce_rate_limit),
+):
+    '''Stream replies from several personas at once, each token event tagged with its persona.'''
+    bind_request(client_id=client_id, priority=PRIORITY_PANEL)
+
+    # Resolve every persona before streaming so unknown IDs still return 404
+    character_ids = panel.validate(request.characters)
     domain_history = [
-        Message(role=item.role, content=item.content) 
+        Message(role=item.role, content=item.content)
         for item in request.history
     ]
 
-    # Perform lookup before stream to catch PersonaNotFoundError early (avoiding RuntimeError)
-    use_case.registry.get(request.character)
+    def record(stats: dict[str, StreamStats]) -> None:
+        for persona_id, persona_stats in stats.items():
+            EVENTS_SENT.inc(persona_stats.events, persona=persona_id)
+            BYTES_SENT.inc(persona_stats.bytes_sent, persona=persona_id)
+            if persona_stats.error_code is not None:
+                ERRORS.inc(persona=persona_id, code=persona_stats.error_code)
 
-    async def generate():
-        async for chunk in use_case.execute(
-            character_id=request.character,
-            user_message=request.message,
-            history=domain_history
-        ):
-            yield chunk
-
-    return StreamingResponse(generate(), media_type="text/event-stream")
+    settings = get_settings()
+    return StreamingResponse(
+        panel_sse_stream(
+            panel.execute(character_ids, request.message, domain_history),
+            flush_interval_seconds=settings.sse_flush_interval_seconds,
+            flush_bytes=settings.sse_flush_bytes,
+            heartbeat_seconds=settings.sse_heartbeat_seconds,
+            is_disconnected=http_request.is_disconnected,
+            disconnect_poll_seconds=settings.sse_disconnect_poll_seconds,
+            on_finish=record,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/chat/resume")
+async def resume_endpoint(
+    http_request: Request,
+    last_event_id: str = Header(..., alias="Last-Event-ID"),
+    streams = Depends(get_stream_registry),
+    client_id: str = Depends(enforce_rate_limit),
+):
+    '''Resume a dropped stream from the position named by Last-Event-ID ("<stream_id>:<offset>").'''
+    stream_id, _, raw_offset = last_event_id.rpartition(":")
+    if not stream_id or not raw_offset.isdigit():
+        raise StreamNotFoundError(f"Malformed Last-Event-ID '{last_event_id}'.")
+    offset = int(raw_offset)
+
+    # Only the client that started a stream may read it
+    buffer = streams.get(stream_id, client_id=client_id)
+    if offset < buffer.base_offset or offset > buffer.end_offset:
+        raise StreamNotFoundError(f"Stream '{stream_id}' cannot resume from offset {offset}.")
+
+    return _sse_response(
+        http_request,
+        buffer.read(offset),
+        stream_id=buffer.id,
+        persona_id=buffer.persona_id,
+        start_offset=offset,
+    )
@@ -0,0 +1,185 @@
+'''
+Chat WebSocket route — persistent multi-turn transport at /api/v1/chat/ws.
+
+One connection carries many turns without per-turn HTTP overhead. The
+connection owns a server-side session, so after the first turn the
+client only sends new messages. Business logic stays in ChatUseCase;
+this module only translates frames.
+
+Client frames (JSON text):
+- {"type": "chat", "message": ..., "character"?, "history"?, "session_id"?}
+- {"type": "cancel"} — stop the running generation (upstream is closed)
+- {"type": "ping"}
+
+Server frames:
+- {"type": "start", "turn", "persona", "session_id"}
+- {"type": "token", "content"} — one per upstream chunk
+- {"type": "done", "turn", "characters", "duration_ms"}
+- {"type": "cancelled", "turn"}
+- {"type": "error", "code", "error", "turn"?, "retry_after"?}
+- {"type": "pong"}
+
+One generation runs at a time per connection. Every turn is rate limited
+and admitted like a POST /api/v1/chat request.
+'''
+import asyncio
+import json
+import time
+from contextlib import aclosing
+from typing import Optional
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.schemas.chat import ChatTurnFrame
+from app.application.use_cases.chat_use_case import ChatUseCase
+from app.domain.entities.message import Message
+from app.domain.entities.session import Session
+from app.core.config import get_settings
+from app.core.enums import ErrorCode
+from app.core.exceptions import (
+    PersonaNotFoundError,
+    RateLimitedError,
+    ServiceOverloadedError,
+    SessionNotFoundError,
+)
+from app.core.metrics import ERRORS, QUEUE_SECONDS
+from app.core.request_context import bind_request
+from app.api.deps import client_key, get_admission_controller, get_chat_use_case, get_rate_limiter
+
+router = APIRouter()
+
+# Policy violation — used for disallowed origins
+CLOSE_POLICY_VIOLATION = 1008
+
+
+def _frame(payload: dict) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+@router.websocket("/chat/ws")
+async def chat_websocket(
+    websocket: WebSocket,
+    use_case: ChatUseCase = Depends(get_chat_use_case),
+    admission = Depends(get_admission_controller),
+    limiter = Depends(get_rate_limiter),
+):
+    '''Serve many chat turns over one WebSocket connection.'''
+    settings = get_settings()
+    # Browsers don't apply CORS to WebSockets — check the origin explicitly
+    origin = websocket.headers.get("origin")
+    if origin is not None and origin not in settings.allowed_origins:
+        await websocket.close(code=CLOSE_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    client_id = client_key(websocket)
+    bind_request(client_id=client_id)
+
+    session: Optional[Session] = None
+    character: Optional[str] = None
+    turn_number = 0
+    running: Optional[asyncio.Task] = None
+
+    async def send_error(code: ErrorCode, message: str, **extra) -> None:
+        ERRORS.inc(persona=character or "", code=code)
+        await websocket.send_text(_frame({"type": "error", "code": str(code), "error": message, **extra}))
+
+    async def run_turn(turn: int, persona_id: str, message: str, turn_session: Session) -> None:
+        bind_request(persona_id=persona_id)
+        try:
+            ticket = await admission.admit()
+        except ServiceOverloadedError as exc:
+            await send_error(exc.code, str(exc), turn=turn, retry_after=exc.retry_after)
+            return
+        QUEUE_SECONDS.observe(ticket.queue_seconds, persona=persona_id)
+        started = time.monotonic()
+        characters = 0
+        try:
+            await websocket.send_text(_frame({
+                "type": "start", "turn": turn, "persona": persona_id, "session_id": turn_session.id,
+            }))
+            async with aclosing(use_case.execute(
+                character_id=persona_id,
+                user_message=message,
+                history=turn_session.messages,
+                session_id=turn_session.id,
+            )) as chunks:
+                async for chunk in chunks:
+                    characters += len(chunk)
+                    await websocket.send_text(_frame({"type": "token", "content": chunk}))
+            await websocket.send_text(_frame({
+                "type": "done",
+                "turn": turn,
+                "characters": characters,
+                "duration_ms": round((time.monotonic() - started) * 1000),
+            }))
+        except WebSocketDisconnect:
+            pass
+        except Exception as exc:
+            code = getattr(exc, "code", ErrorCode.INTERNAL_ERROR)
+            await send_error(code, "The stream was interrupted.", turn=turn)
+        finally:
+            ticket.release()
+
+    async def stop_running() -> bool:
+        '''Cancel the running generation; True if one was actually stopped.'''
+        if running is None or running.done():
+            return False
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        return True
+
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                frame = json.loads(raw)
+                kind = frame.get("type") if isinstance(frame, dict) else None
+            except json.JSONDecodeError:
+                kind = None
+
+            if kind == "ping":
+                await websocket.send_text(_frame({"type": "pong"}))
+                continue
+            if kind == "cancel":
+                if await stop_running():
+                    await websocket.send_text(_frame({"type": "cancelled", "turn": turn_number}))
+                continue
+            if kind != "chat":
+                await send_error(ErrorCode.INVALID_REQUEST, "Expected a chat, cancel or ping frame.")
+                continue
+            if running is not None and not running.done():
+                await send_error(ErrorCode.INVALID_REQUEST, "A reply is already streaming; cancel it first.")
+                continue
+
+            try:
+                request = ChatTurnFrame.model_validate(frame)
+                if settings.rate_limit_enabled:
+                    limiter.check(client_id)
+                persona_id = request.character or character
+                if persona_id is None:
+                    raise PersonaNotFoundError("The first turn must name a character.")
+                use_case.registry.get(persona_id)
+                if request.session_id:
+                    session = use_case.open_session(request.session_id, [])
+                elif session is None:
+                    session = use_case.open_session(None, [
+                        Message(role=item.role, content=item.content) for item in request.history
+                    ])
+            except ValidationError as exc:
+                await send_error(ErrorCode.INVALID_REQUEST, f"Invalid chat frame: {exc.error_count()} error(s).")
+                continue
+            except RateLimitedError as exc:
+                await send_error(exc.code, str(exc), retry_after=exc.retry_after)
+                continue
+            except (PersonaNotFoundError, SessionNotFoundError) as exc:
+                await send_error(exc.code, str(exc))
+                continue
+
+            character = persona_id
+            turn_number += 1
+            running = asyncio.create_task(run_turn(turn_number, persona_id, request.message, session))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Client gone — stop generating and close the upstream stream
+        await stop_running()
@@ -0,0 +1,35 @@
+'''
+Usage route — GET /api/v1/usage aggregates metered upstream usage.
+
+Registered only when metering is enabled (METERING_DB_PATH). Records
+still buffered in memory are flushed first, and the query runs on a
+worker thread, so a report never blocks streaming requests. Reports
+need X-Admin-Key once USAGE_ADMIN_KEY is set; per-client reports are
+never served without it.
+'''
+import asyncio
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query
+
+from app.api.deps import UsageMeter, enforce_usage_admin, get_usage_meter
+
+router = APIRouter()
+
+
+@router.get("/usage", dependencies=[Depends(enforce_usage_admin)])
+async def usage_endpoint(
+    group_by: List[Literal["persona", "client", "model", "outcome"]] = Query(["persona"]),
+    since: Optional[float] = Query(None, description="Start of the window, epoch seconds (inclusive)."),
+    until: Optional[float] = Query(None, description="End of the window, epoch seconds (exclusive)."),
+    meter: UsageMeter = Depends(get_usage_meter),
+):
+    '''Prompt/completion tokens, requests, errors and mean latencies per group.'''
+    await meter.flush()
+    groups = await asyncio.to_thread(meter.store.aggregate, group_by, since, until)
+    return {
+        "group_by": group_by,
+        "since": since,
+        "until": until,
+        "groups": groups,
+        "dropped_records": meter.dropped,
+    }
@@ -0,0 +1,61 @@
+'''
+ContextWindow — keeps each model request within a token budget.
+
+The budget for the prompt is the configured context size minus the
+persona's max_tokens (room for the reply) and a small safety reserve.
+The system prompt and the new user message are always kept; history
+is walked newest-first and older turns are dropped once the budget is
+spent. Walking backwards with per-message cached estimates means the
+cost of a request scales with the turns that are kept, not with the
+full length of the conversation.
+'''
+from typing import Sequence
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+
+_HISTORY_ROLES = (MessageRole.USER, MessageRole.ASSISTANT)
+
+
+class ContextWindow:
+    '''Token-budget manager that compacts history before it reaches the LLM.'''
+    def __init__(self, max_context_tokens: int = 8192, reserve_tokens: int = 64):
+        '''Configure the model context size and the safety reserve.'''
+        self.max_context_tokens = max_context_tokens
+        self.reserve_tokens = reserve_tokens
+
+    def budget_for(self, llm_config: PersonaLLMConfig) -> int:
+        '''Prompt token budget left after reserving room for the reply.'''
+        return max(0, self.max_context_tokens - llm_config.max_tokens - self.reserve_tokens)
+
+    def fit(
+        self,
+        system: Message,
+        history: Sequence[Message],
+        user: Message,
+        llm_config: PersonaLLMConfig,
+    ) -> list[Message]:
+        '''
+        Build the message list for the LLM: system + most recent history + user.
+        System messages leaked into history are skipped while walking.
+        '''
+        remaining = self.budget_for(llm_config) - system.token_estimate - user.token_estimate
+
+        kept: list[Message] = []
+        truncated = False
+        for message in reversed(history):
+            if message.role not in _HISTORY_ROLES:
+                continue
+            cost = message.token_estimate
+            if cost > remaining:
+                truncated = True
+                break
+            remaining -= cost
+            kept.append(message)
+
+        # Never open the window on an assistant reply whose question was dropped
+        while truncated and kept and kept[-1].role == MessageRole.ASSISTANT:
+            kept.pop()
+
+        kept.reverse()
+        return [system, *kept, user]
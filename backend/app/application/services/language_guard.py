@@ -0,0 +1,154 @@
+'''
+LanguageGuard — catch replies streaming in the wrong script, early.
+
+The policy decides which script a reply must be written in: always
+Latin (ENGLISH, matching the language instruction in every system
+prompt) or the script of the user's message (MATCH_INPUT), detected
+once per request.
+
+A ScriptMonitor then follows the reply chunk by chunk. Each chunk is
+classified in one str.translate() call against a codepoint table built
+once at import, mapping every BMP codepoint to a script tag (or to
+nothing for digits, punctuation and symbols), and the tags are
+counted. No regex is built or run per chunk.
+
+The monitor judges the share of letters in other scripts over windows
+of `window_letters` letters. The first verdict comes after
+`min_letters` letters, so a reply that starts in the wrong script is
+caught within a few tokens. A foreign name or quote stays well under
+`max_foreign_ratio`.
+'''
+from typing import Optional
+from app.domain.entities.message import Message
+from app.domain.enums import LanguagePolicy, MessageRole, Script
+
+# Inclusive BMP codepoint ranges per script
+_SCRIPT_RANGES: dict[Script, tuple[tuple[int, int], ...]] = {
+    Script.LATIN: (
+        (0x41, 0x5A), (0x61, 0x7A), (0xC0, 0xD6), (0xD8, 0xF6), (0xF8, 0x24F), (0x1E00, 0x1EFF),
+    ),
+    Script.ARABIC: (
+        (0x620, 0x64A), (0x66E, 0x6D3), (0x6FA, 0x6FF), (0x750, 0x77F), (0x8A0, 0x8FF),
+        (0xFB50, 0xFDFF), (0xFE70, 0xFEFF),
+    ),
+    Script.CYRILLIC: ((0x400, 0x52F),),
+    Script.GREEK: ((0x370, 0x3FF), (0x1F00, 0x1FFF)),
+    Script.HEBREW: ((0x5D0, 0x5EA), (0xFB1D, 0xFB4F)),
+    Script.DEVANAGARI: ((0x900, 0x963), (0x971, 0x97F)),
+    Script.CJK: ((0x3040, 0x30FF), (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xAC00, 0xD7AF)),
+}
+
+_NEUTRAL = "\x00"
+# One control-character tag per script: they never occur as letters themselves
+_TAGS: dict[Script, str] = {script: chr(i + 1) for i, script in enumerate(_SCRIPT_RANGES)}
+
+
+def _build_table() -> str:
+    '''Codepoint -> tag string, indexable by str.translate. Codepoints above the BMP pass through untagged.'''
+    table = [_NEUTRAL] * 0x10000
+    for script, ranges in _SCRIPT_RANGES.items():
+        tag = _TAGS[script]
+        for low, high in ranges:
+            table[low:high + 1] = [tag] * (high - low + 1)
+    return "".join(table)
+
+
+_TABLE = _build_table()
+
+
+def script_counts(text: str) -> dict[Script, int]:
+    '''Number of letters of each script in `text`.'''
+    tagged = text.translate(_TABLE)
+    return {script: tagged.count(tag) for script, tag in _TAGS.items()}
+
+
+def detect_script(text: str) -> Optional[Script]:
+    '''The script most of the letters are written in, or None for text without letters.'''
+    counts = script_counts(text)
+    script, letters = max(counts.items(), key=lambda item: item[1])
+    return script if letters else None
+
+
+class ScriptMonitor:
+    '''Incremental check that one streamed reply stays in the expected script.'''
+    __slots__ = ("expected", "max_foreign_ratio", "min_letters", "window_letters",
+                 "_tag", "_letters", "_foreign", "_seen", "violated")
+
+    def __init__(self, expected: Script, max_foreign_ratio: float, min_letters: int, window_letters: int):
+        self.expected = expected
+        self.max_foreign_ratio = max_foreign_ratio
+        self.min_letters = min_letters
+        self.window_letters = window_letters
+        self._tag = _TAGS[expected]
+        self._letters = 0
+        self._foreign = 0
+        self._seen = 0
+        self.violated = False
+
+    @property
+    def decided(self) -> bool:
+        '''Whether enough letters have been seen for a first verdict.'''
+        return self._seen >= self.min_letters
+
+    def feed(self, chunk: str) -> bool:
+        '''Account for one chunk; returns True once the reply violates the policy.'''
+        tagged = chunk.translate(_TABLE)
+        letters = sum(map(tagged.count, _TAGS.values()))
+        if not letters:
+            return self.violated
+        self._letters += letters
+        self._foreign += letters - tagged.count(self._tag)
+        self._seen += letters
+        if self._letters >= self.min_letters:
+            self._judge()
+            if self._letters >= self.window_letters:
+                self._letters = self._foreign = 0
+        return self.violated
+
+    def finish(self) -> bool:
+        '''Judge whatever is left at the end of the reply, however short.'''
+        if self._letters:
+            self._judge()
+        return self.violated
+
+    def _judge(self) -> None:
+        if self._foreign > self.max_foreign_ratio * self._letters:
+            self.violated = True
+
+
+class LanguageGuard:
+    '''Language policy for replies, and the factory of per-reply monitors.'''
+    def __init__(
+        self,
+        policy: LanguagePolicy = LanguagePolicy.ENGLISH,
+        max_foreign_ratio: float = 0.3,
+        min_letters: int = 24,
+        window_letters: int = 200,
+        max_regenerations: int = 1,
+    ):
+        '''Configure the policy, the verdict thresholds and how often a reply may be regenerated.'''
+        self.policy = policy
+        self.max_foreign_ratio = max_foreign_ratio
+        self.min_letters = min_letters
+        self.window_letters = window_letters
+        self.max_regenerations = max_regenerations
+
+    def expected_script(self, user_message: str) -> Optional[Script]:
+        '''Script the reply must use, or None when nothing can be enforced.'''
+        if self.policy == LanguagePolicy.ENGLISH:
+            return Script.LATIN
+        if self.policy == LanguagePolicy.MATCH_INPUT:
+            return detect_script(user_message)
+        return None
+
+    def monitor(self, expected: Script) -> ScriptMonitor:
+        '''A fresh monitor for one reply attempt.'''
+        return ScriptMonitor(expected, self.max_foreign_ratio, self.min_letters, self.window_letters)
+
+    def reminder(self, expected: Script) -> Message:
+        '''System turn appended when regenerating a reply that drifted out of script.'''
+        language = "English" if expected == Script.LATIN else f"the {expected.value} script, like the user"
+        return Message(
+            role=MessageRole.SYSTEM,
+            content=f"Your previous reply was in the wrong language. Respond only in {language}.",
+        )
@@ -3,67 +3,192 @@ ChatUseCase — orchestrates the chat flow.
 
 Responsibilities:
 1. Resolve the requested persona from the registry
-2. Build the system prompt with language enforcement
-3. Construct the message history (system + history + user)
-4. Stream the LLM response chunk by chunk
+2. Use the persona's precompiled system prompt (with language enforcement)
+3. Construct the message history (system + history + user), compacted
+   to the token budget when a ContextWindow is configured
+4. Stream the LLM response chunk by chunk, checked against the
+   language policy when a LanguageGuard is configured
+5. Persist the completed turn to the session store, when one is used
 
 This class depends only on domain interfaces — never on infrastructure
 directly. All concrete dependencies are injected via constructor.
 '''
-from typing import AsyncIterator, List
+import asyncio
+import secrets
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional
+from app.core.exceptions import LanguagePolicyError, SessionNotFoundError
+from app.core.metrics import GENERATION_SECONDS, LANGUAGE_VIOLATIONS, STREAMS_CANCELLED
+from app.core.request_context import bind_request
+from app.core.tracing import span
 from app.domain.entities.message import Message
+from app.domain.entities.persona import Persona
+from app.domain.entities.session import Session
 from app.domain.enums import MessageRole, PersonaID
 from app.domain.interfaces.llm_provider import LLMProvider
 from app.domain.interfaces.persona_repository import PersonaRepository
+from app.domain.interfaces.session_store import SessionStore
+from app.application.services.context_window import ContextWindow
+from app.application.services.language_guard import LanguageGuard
+
+_HISTORY_ROLES = (MessageRole.USER, MessageRole.ASSISTANT)
 
 class ChatUseCase:
     '''Orchestrator for processing chat interactions with distinct personas.'''
-    def __init__(self, llm: LLMProvider, registry: PersonaRepository):
-        '''Inject LLM provider and persona repository dependencies.'''
+    def __init__(
+        self,
+        llm: LLMProvider,
+        registry: PersonaRepository,
+        sessions: Optional[SessionStore] = None,
+        context: Optional[ContextWindow] = None,
+        language_guard: Optional[LanguageGuard] = None,
+    ):
+        '''Inject LLM provider, persona repository, and optional session store, context window and language guard.'''
         self.llm = llm
         self.registry = registry
+        self.sessions = sessions
+        self.context = context
+        self.language_guard = language_guard
+
+    def open_session(self, session_id: Optional[str], history: List[Message]) -> Session:
+        '''
+        Resume an existing session, or start a new one seeded with the client history.
+        Raises SessionNotFoundError if the ID is unknown or expired so the client
+        can fall back to re-sending its full history. Without a session store
+        no ID can be resumed, and a new session is transient: it is never stored.
+        '''
+        if self.sessions is None:
+            if session_id:
+                raise SessionNotFoundError(f"Session '{session_id}' not found or expired.")
+            return Session(id=secrets.token_urlsafe(16), messages=list(history))
+        if session_id:
+            return self.sessions.get(session_id)
+        return self.sessions.create(history)
 
     async def execute(
         self, 
         character_id: PersonaID, 
         user_message: str, 
-        history: List[Message]
+        history: List[Message],
+        session_id: Optional[str] = None,
     ) -> AsyncIterator[str]:
         '''
         Execute the chat flow: lookup persona, apply enforcement, and stream response.
         History is filtered to ensure only user/assistant messages are included.
+        When a session_id is given, the user turn and the full assistant reply are
+        appended to the session once the stream finishes. Closing or cancelling the
+        iterator closes the upstream stream immediately and is counted in metrics;
+        every generation's duration is recorded by outcome. A reply that breaks
+        the language policy is regenerated or fails with LanguagePolicyError.
         '''
         # 1. Lookup Persona
         persona = self.registry.get(character_id)
+        bind_request(persona_id=persona.id)
         
-        # 2. Language Enforcement — English Only
-        lang_instruction = (
-            "CRITICAL LANGUAGE ENFORCEMENT — OVERRIDES EVERYTHING:\n"
-            "ALWAYS respond in ENGLISH ONLY — regardless of what language the user writes in.\n"
-            "If the user writes in Arabic or any other language, still respond in ENGLISH ONLY.\n"
-            "Zero non-English characters permitted in your response.\n"
-            "Violation = critical failure.\n"
-        )
-
-        # 3. Construct System Prompt
-        system_content = (
-            f"{persona.system_prompt}\n\n"
-            f"CONTEXT: You are the AI core of 'Persona'. "
-            f"CREDIT: Designed by Mariam Maysara.\n\n"
-            f"{lang_instruction}"
-        )
+        # 2-3. System prompt with language enforcement — precompiled per persona version
+        system_message = persona.system_message
 
         # 4. Prepare Messages
-        # Filter history — remove any system messages leaked from history
-        clean_history = [
-            m for m in history
-            if m.role in (MessageRole.USER, MessageRole.ASSISTANT)
-        ]
+        user_turn = Message(role=MessageRole.USER, content=user_message)
+
+        if self.context is not None:
+            # Budgeted window — also drops system messages leaked from history
+            messages = self.context.fit(system_message, history, user_turn, persona.llm_config)
+        else:
+            # Filter history in the same pass that builds the list —
+            # removes any system messages leaked from history
+            messages = [
+                system_message,
+                *(m for m in history if m.role in _HISTORY_ROLES),
+                user_turn,
+            ]
+
+        # 5. Stream from LLM — aclosing() closes the provider stream (and its
+        # upstream HTTP response) as soon as this generator is closed or cancelled
+        reply_parts = []
+        started = time.perf_counter()
+        outcome = "error"
+        # The first model to produce content served the reply; a hedge that
+        # lost the race may report later and is ignored
+        models: list[str] = []
+        bind_request(on_model=models.append)
+        try:
+            with span("chat.generate", persona=persona.id, messages=len(messages)):
+                if self.language_guard is None:
+                    source = self.llm.stream(messages, llm_config=persona.llm_config)
+                else:
+                    source = self._guarded_stream(persona, messages, user_message)
+                async with aclosing(source) as stream:
+                    async for chunk in stream:
+                        reply_parts.append(chunk)
+                        yield chunk
+            outcome = "completed"
+        except (GeneratorExit, asyncio.CancelledError):
+            # Tokens saved are counted where an upstream stream is really closed
+            # early (GroqProvider): a cache hit or a shared flight saves nothing here
+            outcome = "cancelled"
+            STREAMS_CANCELLED.inc(persona=persona.id)
+            raise
+        finally:
+            model = models[0] if models else "unknown"
+            GENERATION_SECONDS.observe(time.perf_counter() - started, persona=persona.id, model=model, outcome=outcome)
+
+        # 6. Persist the completed turn — interrupted streams are never stored
+        if session_id and self.sessions is not None:
+            self.sessions.append(session_id, [
+                user_turn,
+                Message(role=MessageRole.ASSISTANT, content="".join(reply_parts)),
+            ])
+
+    async def _guarded_stream(self, persona: Persona, messages: List[Message], user_message: str) -> AsyncIterator[str]:
+        '''
+        Stream a reply while a ScriptMonitor checks its script. Chunks are held
+        back until the first verdict, so a reply that starts in the wrong script
+        is dropped unseen and regenerated with a reminder. A violation after text
+        has reached the client, or once regenerations are spent, closes the
+        upstream stream and raises LanguagePolicyError instead of paying for the
+        rest of a wrong answer.
+        '''
+        guard = self.language_guard
+        expected = guard.expected_script(user_message)
+        if expected is None:
+            async with aclosing(self.llm.stream(messages, llm_config=persona.llm_config)) as stream:
+                async for chunk in stream:
+                    yield chunk
+            return
 
-        messages = [Message(role=MessageRole.SYSTEM, content=system_content)]
-        messages.extend(clean_history)
-        messages.append(Message(role=MessageRole.USER, content=user_message))
+        for attempt in range(guard.max_regenerations + 1):
+            monitor = guard.monitor(expected)
+            held: Optional[List[str]] = []
+            # A reply too short for an early verdict completes before it is judged:
+            # the caches ask for the final verdict first, so a rejected one is not stored
+            bind_request(reply_check=lambda monitor=monitor: monitor.decided or not monitor.finish())
+            try:
+                async with aclosing(self.llm.stream(messages, llm_config=persona.llm_config)) as stream:
+                    async for chunk in stream:
+                        if monitor.feed(chunk):
+                            break
+                        if held is None:
+                            yield chunk
+                            continue
+                        held.append(chunk)
+                        if monitor.decided:
+                            for part in held:
+                                yield part
+                            held = None
+            finally:
+                bind_request(reply_check=None)
+            if not monitor.violated and held is not None:
+                # Too short for an early verdict: judge the whole reply before releasing it
+                monitor.finish()
+            if not monitor.violated:
+                for part in held or ():
+                    yield part
+                return
 
-        # 5. Stream from LLM
-        async for chunk in self.llm.stream(messages, llm_config=persona.llm_config):
-            yield chunk
+            if held is None or attempt == guard.max_regenerations:
+                LANGUAGE_VIOLATIONS.inc(persona=persona.id, action="failed")
+                raise LanguagePolicyError(f"Reply left the {expected.value} script.")
+            LANGUAGE_VIOLATIONS.inc(persona=persona.id, action="regenerated")
+            messages = [*messages, guard.reminder(expected)]
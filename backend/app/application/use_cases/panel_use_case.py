@@ -0,0 +1,105 @@
+'''
+PanelUseCase — answers one message with several personas at once.
+
+Each persona runs ChatUseCase.execute in its own task, so total latency
+is the slowest persona rather than the sum. Chunks from all personas are
+merged into one stream of PanelEvents in arrival order. A shared
+semaphore caps how many persona generations run at once across all
+panels; personas over the cap wait for a slot. Each persona also takes
+its own admission ticket, so a panel counts against the global stream
+cap once per persona; a persona that is not admitted fails alone.
+
+Failures are isolated: a persona whose stream fails yields a final
+event carrying the error while the others keep streaming. Closing the
+iterator cancels every persona still running, closing their upstream
+streams.
+'''
+import asyncio
+from contextlib import aclosing, nullcontext
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+from app.core.metrics import QUEUE_SECONDS
+from app.domain.entities.message import Message
+from app.application.use_cases.chat_use_case import ChatUseCase
+
+
+@dataclass(frozen=True)
+class PanelEvent:
+    '''A chunk from one persona, or that persona's final event (done, possibly with an error).'''
+    persona_id: str
+    content: str = ""
+    done: bool = False
+    error: Optional[Exception] = None
+
+
+class PanelUseCase:
+    '''Fans one chat turn out to several personas and multiplexes their streams.'''
+    def __init__(
+        self,
+        chat: ChatUseCase,
+        limiter: Optional[asyncio.Semaphore] = None,
+        admit: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        '''
+        Wrap the chat use case; limiter bounds concurrent persona generations and
+        admit (returning a ticket with queue_seconds and release()) admits each one
+        to the global stream cap.
+        '''
+        self.chat = chat
+        self.limiter = limiter
+        self.admit = admit
+
+    def validate(self, character_ids: List[str]) -> List[str]:
+        '''
+        Resolve every persona up front (raising PersonaNotFoundError before any
+        streaming starts) and drop duplicates, keeping the requested order.
+        '''
+        unique = list(dict.fromkeys(character_ids))
+        for character_id in unique:
+            self.chat.registry.get(character_id)
+        return unique
+
+    async def execute(
+        self,
+        character_ids: List[str],
+        user_message: str,
+        history: List[Message],
+    ) -> AsyncIterator[PanelEvent]:
+        '''Stream every persona's reply concurrently; each persona ends with a done event.'''
+        queue: asyncio.Queue[PanelEvent] = asyncio.Queue()
+
+        async def run(character_id: str) -> None:
+            ticket = None
+            try:
+                async with self.limiter or nullcontext():
+                    if self.admit is not None:
+                        ticket = await self.admit()
+                        QUEUE_SECONDS.observe(ticket.queue_seconds, persona=character_id)
+                    async with aclosing(self.chat.execute(
+                        character_id=character_id,
+                        user_message=user_message,
+                        history=history,
+                    )) as chunks:
+                        async for chunk in chunks:
+                            queue.put_nowait(PanelEvent(character_id, content=chunk))
+                queue.put_nowait(PanelEvent(character_id, done=True))
+            except Exception as exc:
+                queue.put_nowait(PanelEvent(character_id, done=True, error=exc))
+            finally:
+                if ticket is not None:
+                    ticket.release()
+
+        # Each task gets its own copy of the request context, so the
+        # persona bound by ChatUseCase never leaks between panelists.
+        tasks = [asyncio.create_task(run(character_id)) for character_id in character_ids]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event = await queue.get()
+                if event.done:
+                    remaining -= 1
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
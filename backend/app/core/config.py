@@ -5,7 +5,9 @@ Use get_settings() (cached) instead of instantiating Settings directly.
 '''
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
-from app.infrastructure.enums import GroqModel
+from typing import Optional
+from app.domain.enums import LanguagePolicy
+from app.infrastructure.enums import GroqModel, LLMProviderKind
 
 class Settings(BaseSettings):
     '''Global application settings loaded from environment variables.'''
@@ -17,6 +19,154 @@ class Settings(BaseSettings):
     ]
     model: str = GroqModel.LLAMA_70B
 
+    # LLM backend: "groq", or "simulated"/"replay" for offline load tests and development
+    llm_provider: LLMProviderKind = LLMProviderKind.GROQ
+    sim_ttft_seconds: float = 0.3
+    sim_tokens_per_second: float = 250.0
+    sim_chunk_tokens_max: int = 3
+    sim_error_rate: float = 0.0
+    sim_stall_probability: float = 0.0
+    sim_stall_seconds: float = 2.0
+
+    # Record Groq streams as fixtures, and replay them with llm_provider="replay"
+    llm_record_dir: Optional[str] = None
+    replay_fixture_dir: Optional[str] = None
+    replay_time_scale: float = 1.0
+
+    # Upstream HTTP connection pool
+    upstream_max_connections: int = 100
+    upstream_max_keepalive_connections: int = 20
+    upstream_keepalive_expiry_seconds: float = 30.0
+    upstream_http2: bool = True
+    upstream_connect_timeout_seconds: float = 5.0
+    upstream_read_timeout_seconds: float = 30.0
+    upstream_warmup_connections: int = 2
+    # Serve immediately after a cold start and warm up behind /ready
+    warmup_in_background: bool = True
+
+    # Extra models routed alongside `model`, with hedging on slow first tokens
+    routing_models: list[str] = []
+    hedge_percentile: float = 0.95
+    hedge_min_delay_seconds: float = 0.25
+    hedge_max_delay_seconds: float = 3.0
+
+    # Persona definitions — None uses the bundled persona files
+    persona_dir: Optional[str] = None
+    persona_reload_interval_seconds: float = 2.0
+
+    # Retry transient upstream failures: before the first token with jittered
+    # backoff, after partial output by continuing from the emitted text
+    retry_enabled: bool = True
+    retry_max_attempts: int = 2
+    retry_max_continuations: int = 2
+    retry_base_delay_seconds: float = 0.25
+    retry_max_delay_seconds: float = 2.0
+
+    # Circuit breaker around the upstream — fail fast during outages
+    circuit_breaker_enabled: bool = True
+    circuit_failure_rate: float = 0.5
+    circuit_slow_call_seconds: float = 10.0
+    circuit_slow_call_rate: float = 0.8
+    circuit_window_size: int = 20
+    circuit_min_calls: int = 5
+    circuit_open_seconds: float = 15.0
+    circuit_half_open_probes: int = 2
+
+    # Background upstream probe reported by /health (0 disables)
+    health_probe_interval_seconds: float = 30.0
+    health_probe_timeout_seconds: float = 5.0
+
+    # Coalesce identical concurrent requests onto one upstream stream
+    single_flight_enabled: bool = True
+
+    # Upstream quota scheduler — initial limits, refined from x-ratelimit-* headers
+    quota_scheduler_enabled: bool = False
+    # Request quota per window; the window is re-derived from x-ratelimit-reset-requests once seen
+    quota_requests_limit: int = 30
+    quota_requests_window_seconds: float = 60.0
+    quota_tokens_per_minute: int = 12_000
+    quota_max_wait_seconds: float = 30.0
+
+    # Admission control — global stream cap and per-client rate limits
+    admission_max_in_flight: int = 64
+    admission_max_queue: int = 128
+    admission_queue_timeout_seconds: float = 10.0
+    rate_limit_enabled: bool = True
+    rate_limit_per_minute: float = 30.0
+    rate_limit_burst: int = 10
+    trust_forwarded_for: bool = False
+
+    # Host-wide shared state (None keeps it per worker): rate limits, the
+    # stream cap and the response cache live in memory-mapped files here
+    shared_state_dir: Optional[str] = None
+    shared_state_poll_seconds: float = 0.05
+    shared_rate_limit_max_keys: int = 65_536
+    shared_cache_entry_bytes: int = 8192
+
+    # Panel chats — persona generations running at once across all panels
+    panel_max_concurrency: int = 16
+
+    # SSE output — coalesce tokens into fewer, larger events
+    sse_flush_interval_seconds: float = 0.03
+    sse_flush_bytes: int = 512
+    sse_heartbeat_seconds: float = 15.0
+    sse_disconnect_poll_seconds: float = 1.0
+
+    # Resumable streams — per-generation replay buffers for Last-Event-ID
+    stream_buffer_max_chunks: int = 4096
+    stream_buffer_ttl_seconds: float = 60.0
+    stream_buffer_max_bytes: int = 32 * 1024 * 1024
+    # Kept short: the upstream keeps generating (and billing) until it expires
+    stream_resume_grace_seconds: float = 2.0
+
+    # Server-side conversation sessions
+    session_ttl_seconds: float = 1800.0
+    session_max_count: int = 10_000
+    session_max_bytes: int = 64 * 1024 * 1024
+    session_max_messages: int = 100
+
+    # Prompt context budget — each persona's max_tokens is reserved out of this
+    context_max_tokens: int = 8192
+
+    # Exact-match streaming response cache
+    response_cache_enabled: bool = True
+    response_cache_ttl_seconds: float = 600.0
+    response_cache_max_entries: int = 1024
+    response_cache_max_bytes: int = 16 * 1024 * 1024
+    response_cache_replay_delay_seconds: float = 0.005
+
+    # Streaming language guard: off, english (reply in Latin script) or match_input
+    language_guard_policy: LanguagePolicy = LanguagePolicy.ENGLISH
+    language_guard_max_foreign_ratio: float = 0.3
+    language_guard_min_letters: int = 24
+    language_guard_window_letters: int = 200
+    language_guard_max_regenerations: int = 1
+
+    # Near-duplicate cache for short turns (needs NumPy); personas may override the threshold
+    semantic_cache_enabled: bool = False
+    # The embedding is lexical: a negation ("is it not safe...") still scores ~0.89, so keep this high
+    semantic_cache_threshold: float = 0.92
+    semantic_cache_max_entries: int = 2048
+    semantic_cache_ttl_seconds: float = 600.0
+    semantic_cache_max_history: int = 2
+    semantic_cache_max_chars: int = 200
+    semantic_cache_dim: int = 1024
+
+    # Usage metering to a local SQLite file (None disables), written in batches
+    metering_db_path: Optional[str] = None
+    metering_batch_size: int = 200
+    metering_flush_interval_seconds: float = 2.0
+    metering_max_pending: int = 10_000
+    # Secret keying stored client digests; keep it stable across restarts and workers
+    # (unset: a random key per process, so per-client aggregates split)
+    metering_client_key: Optional[str] = None
+    # X-Admin-Key required by /usage when set; per-client reports are refused without it
+    usage_admin_key: Optional[str] = None
+
+    # Observability — Prometheus /metrics and optional OpenTelemetry spans
+    metrics_enabled: bool = True
+    tracing_enabled: bool = False
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 @lru_cache
@@ -7,7 +7,15 @@ from enum import StrEnum
 
 class ErrorCode(StrEnum):
     PERSONA_NOT_FOUND  = "PERSONA_NOT_FOUND"
+    SESSION_NOT_FOUND  = "SESSION_NOT_FOUND"
+    STREAM_NOT_FOUND   = "STREAM_NOT_FOUND"
     LLM_PROVIDER_ERROR = "LLM_PROVIDER_ERROR"
     LLM_TIMEOUT        = "LLM_TIMEOUT"
+    UPSTREAM_QUOTA_EXHAUSTED = "UPSTREAM_QUOTA_EXHAUSTED"
+    UPSTREAM_UNAVAILABLE = "UPSTREAM_UNAVAILABLE"
+    LANGUAGE_POLICY_VIOLATION = "LANGUAGE_POLICY_VIOLATION"
     INVALID_REQUEST    = "INVALID_REQUEST"
+    RATE_LIMITED       = "RATE_LIMITED"
+    SERVER_OVERLOADED  = "SERVER_OVERLOADED"
+    FORBIDDEN          = "FORBIDDEN"
     INTERNAL_ERROR     = "INTERNAL_ERROR"
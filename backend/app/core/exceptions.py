@@ -9,6 +9,58 @@ class PersonaNotFoundError(Exception):
     '''Raised when a requested persona is not found in the registry.'''
     code = ErrorCode.PERSONA_NOT_FOUND
 
+class SessionNotFoundError(Exception):
+    '''Raised when a chat session ID is unknown or has expired.'''
+    code = ErrorCode.SESSION_NOT_FOUND
+
+class StreamNotFoundError(Exception):
+    '''Raised when a stream to resume is unknown, expired, or no longer holds the requested offset.'''
+    code = ErrorCode.STREAM_NOT_FOUND
+
 class LLMProviderError(Exception):
-    '''Raised when the upstream LLM provider (e.g. Groq) returns an error.'''
+    '''
+    Raised when the upstream LLM provider (e.g. Groq) returns an error.
+    retryable marks transient failures (connection drops, timeouts, 5xx)
+    that a fresh attempt may get past.
+    '''
     code = ErrorCode.LLM_PROVIDER_ERROR
+
+    def __init__(self, message: str = "", retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+class QuotaExhaustedError(LLMProviderError):
+    '''Raised when a request would certainly exceed the upstream rate-limit quota.'''
+    code = ErrorCode.UPSTREAM_QUOTA_EXHAUSTED
+
+class CircuitOpenError(LLMProviderError):
+    '''Raised without calling upstream while the circuit breaker is open.'''
+    code = ErrorCode.UPSTREAM_UNAVAILABLE
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LanguagePolicyError(Exception):
+    '''Raised when a reply keeps coming back in a script the language policy forbids.'''
+    code = ErrorCode.LANGUAGE_POLICY_VIOLATION
+
+class RateLimitedError(Exception):
+    '''Raised when a client exceeds its per-client request rate.'''
+    code = ErrorCode.RATE_LIMITED
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdminKeyRequiredError(Exception):
+    '''Raised when an admin-only report is requested without the configured admin key.'''
+    code = ErrorCode.FORBIDDEN
+
+class ServiceOverloadedError(Exception):
+    '''Raised when the global stream cap and wait queue are exhausted.'''
+    code = ErrorCode.SERVER_OVERLOADED
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
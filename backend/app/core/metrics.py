@@ -0,0 +1,203 @@
+'''
+Metrics — minimal in-process Prometheus-style instruments.
+
+Instruments are module-level singletons registered in REGISTRY and
+rendered in the Prometheus text exposition format. Updates are plain
+dict operations on the event loop thread, cheap enough to call per
+chunk.
+'''
+from bisect import bisect_left
+from typing import Iterable
+
+# Latency buckets (seconds) spanning per-token gaps up to long generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Counter:
+    '''Monotonically increasing value, optionally split by labels.'''
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        '''Add `amount` to the series identified by `labels`.'''
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        '''Current value of one series (0 if never incremented).'''
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def samples(self) -> Iterable[tuple[str, tuple[tuple[str, str], ...], float]]:
+        for key, value in self._values.items():
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    '''Distribution of observed values in fixed buckets, optionally split by labels.'''
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        '''Record one observation; a bisect and three additions.'''
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        '''Number of observations in one series.'''
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        return series[2] if series else 0
+
+    def samples(self) -> Iterable[tuple[str, tuple[tuple[str, str], ...], float]]:
+        bounds = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+        for key, (counts, total, count) in self._series.items():
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", labels + (("le", bound),), cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class Registry:
+    '''Collection of instruments rendered together.'''
+    def __init__(self):
+        self._instruments: list = []
+
+    def register(self, instrument):
+        self._instruments.append(instrument)
+        return instrument
+
+    def render(self) -> str:
+        '''Render every instrument in the Prometheus text format.'''
+        lines = []
+        for instrument in self._instruments:
+            lines.append(f"# HELP {instrument.name} {instrument.help_text}")
+            lines.append(f"# TYPE {instrument.name} {instrument.kind}")
+            for name, labels, value in instrument.samples():
+                if labels:
+                    rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                    lines.append(f"{name}{{{rendered}}} {value:g}")
+                else:
+                    lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = Registry()
+
+STREAMS_CANCELLED = REGISTRY.register(Counter(
+    "persona_streams_cancelled_total",
+    "Chat generations stopped early because the client went away.",
+    ("persona",),
+))
+TOKENS_SAVED = REGISTRY.register(Counter(
+    "persona_tokens_saved_total",
+    "Estimated completion tokens not generated because an upstream stream was closed early "
+    "(the persona's mean completed reply length minus what was already streamed).",
+    ("persona",),
+))
+
+REQUEST_PARSE_SECONDS = REGISTRY.register(Histogram(
+    "persona_request_parse_seconds",
+    "Time from request arrival to the chat handler running (body read, validation, dependencies).",
+    ("persona",),
+))
+QUEUE_SECONDS = REGISTRY.register(Histogram(
+    "persona_queue_seconds",
+    "Time spent waiting for an admission slot.",
+    ("persona",),
+))
+UPSTREAM_TTFT_SECONDS = REGISTRY.register(Histogram(
+    "persona_upstream_ttft_seconds",
+    "Time from sending the upstream request to its first content chunk.",
+    ("persona", "model"),
+))
+INTER_TOKEN_SECONDS = REGISTRY.register(Histogram(
+    "persona_inter_token_seconds",
+    "Gap between consecutive upstream content chunks.",
+    ("persona", "model"),
+))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "persona_upstream_errors_total",
+    "Upstream calls that failed, by error code.",
+    ("persona", "model", "code"),
+))
+GENERATION_SECONDS = REGISTRY.register(Histogram(
+    "persona_generation_seconds",
+    "Total duration of a chat generation, by serving model and outcome (completed, cancelled, error).",
+    ("persona", "model", "outcome"),
+))
+EVENTS_SENT = REGISTRY.register(Counter(
+    "persona_sse_events_sent_total",
+    "SSE token events sent to clients.",
+    ("persona",),
+))
+BYTES_SENT = REGISTRY.register(Counter(
+    "persona_sse_bytes_sent_total",
+    "SSE token event bytes sent to clients.",
+    ("persona",),
+))
+ERRORS = REGISTRY.register(Counter(
+    "persona_errors_total",
+    "Errors returned to clients, as HTTP responses or in-stream error events, by ErrorCode.",
+    ("persona", "code"),
+))
+UPSTREAM_RETRIES = REGISTRY.register(Counter(
+    "persona_upstream_retries_total",
+    "Upstream attempts repeated after a transient failure: retry (before the first token) or continuation (after partial output).",
+    ("persona", "kind"),
+))
+SEMANTIC_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "persona_semantic_cache_lookups_total",
+    "Semantic cache lookups for short turns, by result (hit, miss); hits never reach the upstream.",
+    ("persona", "result"),
+))
+SEMANTIC_CACHE_SIMILARITY = REGISTRY.register(Histogram(
+    "persona_semantic_cache_similarity",
+    "Best cosine similarity found per semantic cache lookup, for tuning per-persona thresholds.",
+    ("persona",),
+    buckets=(0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.99),
+))
+LANGUAGE_VIOLATIONS = REGISTRY.register(Counter(
+    "persona_language_violations_total",
+    "Replies caught in the wrong script, by action taken (regenerated, failed).",
+    ("persona", "action"),
+))
+METERING_WRITTEN = REGISTRY.register(Counter(
+    "persona_metering_records_written_total",
+    "Usage records persisted to the metering store.",
+))
+METERING_DROPPED = REGISTRY.register(Counter(
+    "persona_metering_records_dropped_total",
+    "Usage records dropped instead of delaying requests, by reason (backpressure, write_failed).",
+    ("reason",),
+))
@@ -0,0 +1,66 @@
+'''
+Request context — per-request attributes visible to every layer.
+
+The LLMProvider contract only carries messages and config, but
+cross-cutting infrastructure (scheduling, metrics, metering) needs to
+know which client and persona a call belongs to. A ContextVar carries
+that without widening every signature; asyncio tasks copy it, so
+concurrent requests never see each other's values.
+
+reply_check lets the caller veto caching of a reply it is about to
+reject: the response caches store a completed stream before the caller
+has seen its end, so they ask reply_accepted() first.
+
+on_model works the other way round: the caller learns which model
+actually served the reply (routing and hedging pick it deep in the
+provider chain), and providers announce it through report_model().
+'''
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Callable, Optional
+
+
+# Lower is served first when calls queue for upstream quota: a person
+# waiting on one reply goes ahead of a panel fanning out to several
+PRIORITY_INTERACTIVE = 0
+PRIORITY_PANEL = 1
+
+
+@dataclass(frozen=True)
+class RequestContext:
+    '''Attributes of the request currently being served.'''
+    client_id: str = "anonymous"
+    persona_id: str = ""
+    priority: int = PRIORITY_INTERACTIVE
+    # Final verdict on the reply being streamed; False keeps it out of the caches
+    reply_check: Optional[Callable[[], bool]] = None
+    # Told which model served the reply, once per upstream stream that produces content
+    on_model: Optional[Callable[[str], None]] = None
+
+
+_current: ContextVar[RequestContext] = ContextVar("request_context", default=RequestContext())
+
+
+def current_request() -> RequestContext:
+    '''Return the context of the request being served.'''
+    return _current.get()
+
+
+def bind_request(**changes) -> RequestContext:
+    '''Update fields of the current request context and return the new value.'''
+    context = replace(_current.get(), **changes)
+    _current.set(context)
+    return context
+
+
+def reply_accepted() -> bool:
+    '''Whether the caller accepts the reply that just completed, so it may be cached.'''
+    check = _current.get().reply_check
+    return check is None or check()
+
+
+def report_model(model: str) -> None:
+    '''Tell the caller, if it asked, which model is serving the current reply.'''
+    listener = _current.get().on_model
+    if listener is not None:
+        listener(model)
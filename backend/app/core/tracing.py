@@ -0,0 +1,33 @@
+'''
+Tracing — optional OpenTelemetry spans around the chat pipeline.
+
+Spans are only created when tracing is enabled (configure_tracing(True))
+and the opentelemetry-api package is installed; otherwise span() is a
+shared no-op context manager, so instrumented code pays nothing. The
+exporter and SDK are configured by the deployment (e.g. via
+opentelemetry-instrument), not by this module.
+'''
+from contextlib import nullcontext
+from typing import Any, ContextManager
+
+try:
+    from opentelemetry import trace as _otel_trace
+except ImportError:  # optional dependency
+    _otel_trace = None
+
+_NOOP = nullcontext()
+_tracer = None
+
+
+def configure_tracing(enabled: bool) -> bool:
+    '''Enable or disable spans. Returns whether tracing is active.'''
+    global _tracer
+    _tracer = _otel_trace.get_tracer("persona") if enabled and _otel_trace is not None else None
+    return _tracer is not None
+
+
+def span(name: str, **attributes: Any) -> ContextManager:
+    '''Start a span as the current one, or return a no-op context when tracing is off.'''
+    if _tracer is None:
+        return _NOOP
+    return _tracer.start_as_current_span(name, attributes=attributes)
@@ -3,10 +3,40 @@ Message entity — represents a single turn in a conversation.
 Role is strictly typed via MessageRole to prevent invalid values.
 '''
 from dataclasses import dataclass
+from functools import cached_property
 from app.domain.enums import MessageRole
 
+# Fixed per-message cost of role and chat-template framing tokens.
+MESSAGE_TOKEN_OVERHEAD = 4
+
 @dataclass(frozen=True)
 class Message:
     '''Represents a single message in the chat history.'''
     role: MessageRole
     content: str
+
+    @cached_property
+    def token_estimate(self) -> int:
+        '''
+        Approximate token count, computed once per message.
+        Uses ~4 UTF-8 bytes per token, which also accounts for denser
+        scripts such as Arabic without needing a tokenizer.
+        '''
+        return len(self.content.encode("utf-8")) // 4 + MESSAGE_TOKEN_OVERHEAD
+
+    @cached_property
+    def payload(self) -> dict[str, str]:
+        '''Chat-completions wire format, built once and reused across requests.'''
+        return {"role": self.role.value, "content": self.content}
+
+    @classmethod
+    def from_payload(cls, role: MessageRole, payload: dict[str, str]) -> "Message":
+        '''
+        Build a message from an already validated wire dict ({"role", "content"}),
+        reusing that dict as the cached payload instead of building a new one.
+        '''
+        # Fill the instance dict directly: skips the frozen dataclass __init__
+        # (two object.__setattr__ calls) on the hot ingestion path.
+        message = cls.__new__(cls)
+        message.__dict__.update(role=role, content=payload["content"], payload=payload)
+        return message
@@ -5,9 +5,19 @@ and per-persona LLM tuning parameters.
 PersonaLLMConfig holds model hyperparameters that are unique to each
 character — allowing Sherlock to be precise (low temp) while Yoda
 remains creative (high temp).
+
+The final system message is compiled once per Persona instance; a
+reloaded persona definition is a new instance and recompiles lazily.
+
+semantic_cache_threshold overrides how similar a question must be to
+reuse a cached reply for this persona (None uses the global setting).
 '''
 from dataclasses import dataclass, field
-from app.domain.enums import PersonaID
+from functools import cached_property
+from typing import Optional
+from app.domain.entities.message import Message
+from app.domain.enums import MessageRole, PersonaID
+from app.domain.prompts import build_system_content
 
 @dataclass
 class PersonaLLMConfig:
@@ -24,3 +34,9 @@ class Persona:
     name: str
     system_prompt: str
     llm_config: PersonaLLMConfig = field(default_factory=PersonaLLMConfig)
+    semantic_cache_threshold: Optional[float] = None
+
+    @cached_property
+    def system_message(self) -> Message:
+        '''The precompiled system message sent ahead of every conversation.'''
+        return Message(role=MessageRole.SYSTEM, content=build_system_content(self.system_prompt))
@@ -0,0 +1,16 @@
+'''
+Session entity — a server-side conversation kept between chat turns.
+Holding the history on the server means a client only sends the new
+message on each turn instead of re-uploading the whole conversation.
+'''
+from dataclasses import dataclass, field
+from app.domain.entities.message import Message
+
+@dataclass
+class Session:
+    '''Represents a conversation whose history is stored server-side.'''
+    id: str
+    messages: list[Message] = field(default_factory=list)
+    created_at: float = 0.0
+    last_access: float = 0.0
+    size_bytes: int = 0
@@ -18,3 +18,19 @@ class MessageRole(StrEnum):
     SYSTEM    = "system"
     USER      = "user"
     ASSISTANT = "assistant"
+
+
+class Script(StrEnum):
+    LATIN      = "latin"
+    ARABIC     = "arabic"
+    CYRILLIC   = "cyrillic"
+    GREEK      = "greek"
+    HEBREW     = "hebrew"
+    DEVANAGARI = "devanagari"
+    CJK        = "cjk"
+
+
+class LanguagePolicy(StrEnum):
+    OFF         = "off"
+    ENGLISH     = "english"
+    MATCH_INPUT = "match_input"
@@ -18,3 +18,9 @@ class LLMProvider(ABC):
     ) -> AsyncIterator[str]:
         '''Streams response from the LLM provider.'''
         pass
+
+    async def warm_up(self) -> None:
+        '''Pre-establish upstream connections. Optional — no-op by default.'''
+
+    async def aclose(self) -> None:
+        '''Release upstream resources on shutdown. Optional — no-op by default.'''
@@ -0,0 +1,32 @@
+'''
+SessionStore interface — abstracts where conversation sessions live.
+The application layer depends on this interface so the in-process
+store can later be swapped for a shared backend without touching
+ChatUseCase.
+'''
+from abc import ABC, abstractmethod
+from app.domain.entities.message import Message
+from app.domain.entities.session import Session
+
+
+class SessionStore(ABC):
+    '''Interface for conversation session storage.'''
+    @abstractmethod
+    def create(self, history: list[Message]) -> Session:
+        '''Start a new session seeded with the given history.'''
+        ...
+
+    @abstractmethod
+    def get(self, session_id: str) -> Session:
+        '''Retrieve a live session, raising SessionNotFoundError if missing or expired.'''
+        ...
+
+    @abstractmethod
+    def append(self, session_id: str, messages: list[Message]) -> None:
+        '''Append completed turns to an existing session.'''
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        '''Discard a session. Unknown IDs are ignored.'''
+        ...
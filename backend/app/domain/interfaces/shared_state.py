@@ -0,0 +1,57 @@
+'''
+Shared-state interfaces — rate limits, in-flight slots and cached replies.
+
+Each has an in-process implementation (one copy per worker) and a
+host-wide one shared by every worker through memory-mapped files, so
+limits and cache hits hold across `WEB_CONCURRENCY` workers. Callers
+depend on these interfaces only, and the backend is chosen in deps.
+'''
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class RateLimiter(ABC):
+    '''Per-key token buckets.'''
+    @abstractmethod
+    def try_acquire(self, key: str, cost: float = 1.0) -> float:
+        '''Take tokens for a key. Returns 0.0 if allowed, otherwise seconds until it would be.'''
+        ...
+
+    @abstractmethod
+    def check(self, key: str, cost: float = 1.0) -> None:
+        '''Take tokens for a key, raising RateLimitedError if the bucket is empty.'''
+        ...
+
+
+class SlotCounter(ABC):
+    '''A bounded count of held slots, e.g. concurrent upstream streams.'''
+    limit: int
+
+    @property
+    @abstractmethod
+    def value(self) -> int:
+        '''Slots currently held.'''
+        ...
+
+    @abstractmethod
+    def try_acquire(self) -> bool:
+        '''Take a slot if fewer than `limit` are held.'''
+        ...
+
+    @abstractmethod
+    def release(self) -> None:
+        '''Return a slot taken by this process.'''
+        ...
+
+
+class ResponseStore(ABC):
+    '''Completed chunk sequences keyed by request digest.'''
+    @abstractmethod
+    def get(self, key: str) -> Optional[tuple[str, ...]]:
+        '''Return the stored chunks for a key, or None on a miss or expiry.'''
+        ...
+
+    @abstractmethod
+    def put(self, key: str, chunks: tuple[str, ...]) -> None:
+        '''Store a completed chunk sequence. Oversized responses may be skipped.'''
+        ...
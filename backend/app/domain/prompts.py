@@ -0,0 +1,24 @@
+'''
+Prompt templates — the fixed text wrapped around every persona prompt.
+Kept in the domain layer so a persona can compile its final system
+message once, instead of the use case rebuilding it on every request.
+'''
+
+# Language Enforcement — English Only
+LANGUAGE_INSTRUCTION = (
+    "CRITICAL LANGUAGE ENFORCEMENT — OVERRIDES EVERYTHING:\n"
+    "ALWAYS respond in ENGLISH ONLY — regardless of what language the user writes in.\n"
+    "If the user writes in Arabic or any other language, still respond in ENGLISH ONLY.\n"
+    "Zero non-English characters permitted in your response.\n"
+    "Violation = critical failure.\n"
+)
+
+APP_CONTEXT = (
+    "CONTEXT: You are the AI core of 'Persona'. "
+    "CREDIT: Designed by Mariam Maysara.\n\n"
+)
+
+
+def build_system_content(persona_prompt: str) -> str:
+    '''Compose the final system prompt for a persona.'''
+    return f"{persona_prompt}\n\n{APP_CONTEXT}{LANGUAGE_INSTRUCTION}"
@@ -0,0 +1,200 @@
+'''
+Admission control — keeps latency predictable under bursts.
+
+AdmissionController caps the number of concurrent upstream streams.
+Requests beyond the cap wait in a bounded FIFO queue for at most a
+queue-time deadline; when the queue is full or the deadline passes
+they are rejected immediately with ServiceOverloadedError so clients
+can back off instead of piling onto a saturated upstream.
+
+The count of running streams is a SlotCounter: in-process by default,
+or shared by all workers (see shared_state). A slot freed by another
+worker wakes nobody here, so with a shared counter the oldest waiter
+polls for one every `poll_interval_seconds`.
+
+TokenBucketLimiter applies per-client limits (keyed on API key or IP).
+Buckets live in an OrderedDict bounded to max_keys, evicting the least
+recently seen client first.
+'''
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+from app.core.exceptions import RateLimitedError, ServiceOverloadedError
+from app.domain.interfaces.shared_state import RateLimiter, SlotCounter
+
+
+class LocalSlotCounter(SlotCounter):
+    '''Slot count held in this process only.'''
+    def __init__(self, limit: int):
+        '''Allow up to `limit` slots to be held at once.'''
+        self.limit = limit
+        self._value = 0
+
+    @property
+    def value(self) -> int:
+        '''Slots currently held.'''
+        return self._value
+
+    def try_acquire(self) -> bool:
+        '''Take a slot if fewer than `limit` are held.'''
+        if self._value >= self.limit:
+            return False
+        self._value += 1
+        return True
+
+    def release(self) -> None:
+        '''Return a slot.'''
+        self._value = max(0, self._value - 1)
+
+
+class AdmissionTicket:
+    '''A held stream slot. release() is idempotent so every exit path can call it.'''
+    def __init__(self, controller: "AdmissionController", queue_seconds: float):
+        self.controller = controller
+        self.queue_seconds = queue_seconds
+        self._released = False
+
+    def release(self) -> None:
+        '''Return the slot to the controller once.'''
+        if not self._released:
+            self._released = True
+            self.controller.release()
+
+
+class AdmissionController:
+    '''Global in-flight stream cap with a bounded, deadline-limited wait queue.'''
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_queue: int = 128,
+        queue_timeout_seconds: float = 10.0,
+        slots: Optional[SlotCounter] = None,
+        poll_interval_seconds: Optional[float] = None,
+    ):
+        '''Configure the concurrency cap (or the counter that enforces it) and queueing limits.'''
+        self.slots = slots or LocalSlotCounter(max_in_flight)
+        self.max_in_flight = self.slots.limit
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._waiters: deque[asyncio.Future] = deque()
+        self.rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        '''Number of admitted streams currently running (across workers with a shared counter).'''
+        return self.slots.value
+
+    @property
+    def queued(self) -> int:
+        '''Number of requests waiting for a slot.'''
+        return sum(1 for w in self._waiters if not w.done())
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout_seconds))
+
+    async def acquire(self) -> float:
+        '''
+        Wait for a stream slot. Returns the time spent queued in seconds.
+        Raises ServiceOverloadedError if the queue is full or the deadline passes.
+        Every successful acquire() must be paired with release().
+        '''
+        if not self.queued and self.slots.try_acquire():
+            return 0.0
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ServiceOverloadedError("Server is at capacity.", retry_after=self._retry_after())
+
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await self._wait(waiter, started)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # A slot was handed over at the same moment the wait ended
+                if isinstance(e, asyncio.CancelledError):
+                    self.release()
+                    raise
+                return time.monotonic() - started
+            waiter.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected += 1
+            raise ServiceOverloadedError("Timed out waiting for capacity.", retry_after=self._retry_after())
+        return time.monotonic() - started
+
+    async def _wait(self, waiter: asyncio.Future, started: float) -> None:
+        '''Wait for a slot handed over locally or, when polling, freed by another worker.'''
+        if self.poll_interval_seconds is None:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_seconds)
+            return
+        deadline = started + self.queue_timeout_seconds
+        while not waiter.done():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            await asyncio.wait({waiter}, timeout=min(remaining, self.poll_interval_seconds))
+            if not waiter.done() and self._oldest_waiter() is waiter and self.slots.try_acquire():
+                waiter.set_result(None)
+
+    def _oldest_waiter(self) -> Optional[asyncio.Future]:
+        '''First waiter still pending; only it polls, which keeps the queue FIFO.'''
+        return next((w for w in self._waiters if not w.done()), None)
+
+    async def admit(self) -> AdmissionTicket:
+        '''Acquire a slot wrapped in a ticket that is safe to release more than once.'''
+        queue_seconds = await self.acquire()
+        return AdmissionTicket(self, queue_seconds)
+
+    def release(self) -> None:
+        '''Free a slot, handing it directly to the oldest live waiter if any.'''
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Slot ownership transfers — in_flight stays the same
+                waiter.set_result(None)
+                return
+        self.slots.release()
+
+
+class TokenBucketLimiter(RateLimiter):
+    '''Per-key token buckets with LRU-bounded key storage.'''
+    def __init__(
+        self,
+        rate_per_second: float = 0.5,
+        burst: int = 10,
+        max_keys: int = 100_000,
+    ):
+        '''Configure refill rate, bucket capacity and the number of tracked clients.'''
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> (tokens, last_refill)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def try_acquire(self, key: str, cost: float = 1.0) -> float:
+        '''Take tokens for a key. Returns 0.0 if allowed, otherwise seconds until it would be.'''
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate_per_second)
+
+        if tokens >= cost:
+            self._store(key, tokens - cost, now)
+            return 0.0
+        self._store(key, tokens, now)
+        return (cost - tokens) / self.rate_per_second
+
+    def check(self, key: str, cost: float = 1.0) -> None:
+        '''Take tokens for a key, raising RateLimitedError if the bucket is empty.'''
+        wait = self.try_acquire(key, cost)
+        if wait > 0:
+            raise RateLimitedError("Too many requests.", retry_after=max(1, math.ceil(wait)))
+
+    def _store(self, key: str, tokens: float, now: float) -> None:
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
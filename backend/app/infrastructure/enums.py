@@ -8,3 +8,16 @@ from enum import StrEnum
 
 class GroqModel(StrEnum):
     LLAMA_70B = "llama-3.3-70b-versatile"
+    LLAMA_8B  = "llama-3.1-8b-instant"
+
+
+class LLMProviderKind(StrEnum):
+    GROQ      = "groq"
+    SIMULATED = "simulated"
+    REPLAY    = "replay"
+
+
+class CircuitState(StrEnum):
+    CLOSED    = "closed"
+    OPEN      = "open"
+    HALF_OPEN = "half_open"
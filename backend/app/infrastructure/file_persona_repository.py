@@ -0,0 +1,90 @@
+'''
+FilePersonaRepository — PersonaRepository backed by a directory of
+YAML/JSON persona files, with hot reload.
+
+A background daemon thread polls file mtimes. Changed or new files are
+re-parsed into new Persona instances (which recompile their system
+message lazily, once); unchanged files keep their existing instance
+and its compiled prompt. The persona map is swapped in a single
+assignment, so request handlers never observe a half-applied reload.
+A file that fails to parse keeps its previous definition.
+'''
+import logging
+import threading
+from pathlib import Path
+from app.domain.entities.persona import Persona
+from app.infrastructure.persona_loader import (
+    DEFAULT_PERSONA_DIR,
+    load_persona_file,
+    persona_files,
+)
+from app.infrastructure.persona_registry import PersonaRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class FilePersonaRepository(PersonaRegistry):
+    '''Directory-backed persona registry that reloads changed files in the background.'''
+    def __init__(self, directory: Path = DEFAULT_PERSONA_DIR):
+        '''Load every persona file in the directory.'''
+        self.directory = Path(directory)
+        # path -> (mtime_ns, size, persona)
+        self._files: dict[Path, tuple[int, int, Persona]] = {}
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+        super().__init__(personas=[])
+        self.reload()
+
+    def reload(self) -> bool:
+        '''Re-read changed, new and deleted files. Returns True if anything changed.'''
+        files: dict[Path, tuple[int, int, Persona]] = {}
+        changed = False
+        for path in persona_files(self.directory):
+            stat = path.stat()
+            previous = self._files.get(path)
+            if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                files[path] = previous
+                continue
+            try:
+                persona = load_persona_file(path)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping persona file %s: %s", path.name, e)
+                if previous:
+                    files[path] = previous
+                continue
+            files[path] = (stat.st_mtime_ns, stat.st_size, persona)
+            changed = True
+
+        if changed or files.keys() != self._files.keys():
+            self._files = files
+            self._personas = {persona.id: persona for _, _, persona in files.values()}
+            logger.info("Loaded %d personas from %s", len(self._personas), self.directory)
+            return True
+        return False
+
+    def start_watching(self, interval_seconds: float = 2.0) -> None:
+        '''Start the background mtime watcher. Safe to call more than once.'''
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(interval_seconds,),
+            name="persona-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        '''Stop the background watcher.'''
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+        self._stop.clear()
+
+    def _watch(self, interval_seconds: float) -> None:
+        while not self._stop.wait(interval_seconds):
+            try:
+                self.reload()
+            except OSError as e:
+                logger.warning("Persona reload failed: %s", e)
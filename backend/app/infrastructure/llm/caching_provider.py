@@ -0,0 +1,91 @@
+'''
+CachingProvider — LLMProvider decorator that replays cached responses.
+
+The cache key is a digest of the system prompt (which identifies the
+persona), the prior history, the normalized final user message and
+the persona's PersonaLLMConfig. A miss streams from the wrapped
+provider and stores the chunk sequence once it completes; a hit
+replays the stored chunks at a configurable pace so clients see the
+same streaming behaviour at zero upstream token cost.
+'''
+import asyncio
+import hashlib
+from contextlib import aclosing
+from dataclasses import astuple
+from typing import AsyncIterator
+from app.core.request_context import reply_accepted, report_model
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.domain.interfaces.shared_state import ResponseStore
+
+
+def normalize_message(text: str) -> str:
+    '''Case-fold and collapse whitespace so trivial variations share a key.'''
+    return " ".join(text.split()).casefold()
+
+
+def cache_key(messages: list[Message], llm_config: PersonaLLMConfig) -> str:
+    '''Digest of the prompt, history, normalized user message and generation config.'''
+    digest = hashlib.blake2b(digest_size=20)
+    *context, last = messages
+    for message in context:
+        digest.update(message.role.encode())
+        digest.update(b"\x1f")
+        digest.update(message.content.encode("utf-8"))
+        digest.update(b"\x1e")
+    digest.update(last.role.encode())
+    digest.update(b"\x1f")
+    digest.update(normalize_message(last.content).encode("utf-8"))
+    digest.update(b"\x1e")
+    digest.update(repr(astuple(llm_config)).encode())
+    return digest.hexdigest()
+
+
+class CachingProvider(LLMProvider):
+    '''Wraps an LLMProvider with an exact-match streaming response cache.'''
+    def __init__(
+        self,
+        inner: LLMProvider,
+        cache: ResponseStore,
+        replay_delay_seconds: float = 0.0,
+    ):
+        '''Wrap a provider with a cache and the pacing used when replaying hits.'''
+        self.inner = inner
+        self.cache = cache
+        self.replay_delay_seconds = replay_delay_seconds
+
+    async def warm_up(self) -> None:
+        '''Warm up the wrapped provider.'''
+        await self.inner.warm_up()
+
+    async def aclose(self) -> None:
+        '''Close the wrapped provider.'''
+        await self.inner.aclose()
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        '''Replay a cached response, or stream from the inner provider and cache it.'''
+        key = cache_key(messages, llm_config)
+        cached = self.cache.get(key)
+        if cached is not None:
+            report_model("cache")
+            for chunk in cached:
+                yield chunk
+                if self.replay_delay_seconds:
+                    await asyncio.sleep(self.replay_delay_seconds)
+            return
+
+        chunks = []
+        async with aclosing(self.inner.stream(messages, llm_config=llm_config)) as stream:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+
+        # Only complete streams reach this point — failures and disconnects are never cached,
+        # nor replies the caller rejects (a short one in the wrong script)
+        if chunks and reply_accepted():
+            self.cache.put(key, tuple(chunks))
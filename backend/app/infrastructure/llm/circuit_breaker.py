@@ -0,0 +1,179 @@
+'''
+Circuit breaker — fail fast while the upstream is down.
+
+CircuitBreaker is the state machine; CircuitBreakerProvider applies it
+to an LLMProvider.
+
+- closed: calls pass through; the last `window_size` outcomes are kept.
+  Once `min_calls` are recorded, the circuit opens when the failure
+  rate reaches `failure_rate_threshold` or the share of slow calls
+  (time-to-first-token above `slow_call_seconds`) reaches
+  `slow_call_rate_threshold`.
+- open: calls raise CircuitOpenError immediately — no connection, no
+  SDK timeout or retries — until `open_seconds` have passed.
+- half_open: up to `half_open_probes` calls go through as probes. If
+  that many succeed the circuit closes; any failure reopens it.
+
+Only retryable errors (5xx, connection drops, timeouts) count as
+failures. Client errors — a bad request, a prompt over the context
+limit, a 429 — say nothing about the upstream's health, so one client
+sending bad prompts cannot open the circuit for everyone; they are
+neutral, like a QuotaExhaustedError, which the local quota scheduler
+raises without asking the upstream. Client cancellations are neutral
+too: a stream closed before its first token records no outcome. A
+stream cancelled after tokens arrived counts as a success, since the
+upstream was answering.
+'''
+import math
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Optional
+from app.core.exceptions import CircuitOpenError, LLMProviderError, QuotaExhaustedError
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.enums import CircuitState
+
+
+class CircuitBreaker:
+    '''Closed / open / half-open state machine driven by error rate and latency.'''
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        slow_call_rate_threshold: float = 0.8,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 15.0,
+        half_open_probes: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        '''Configure trip thresholds, the outcome window and recovery probing.'''
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        # (failed, slow) per recorded call, newest last
+        self._outcomes: deque[tuple[bool, bool]] = deque(maxlen=window_size)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        '''Current state; an open circuit whose timeout elapsed reports half_open.'''
+        if self._state == CircuitState.OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self._state = CircuitState.HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        return self._state
+
+    def retry_after(self) -> int:
+        '''Whole seconds until the circuit will admit a probe.'''
+        remaining = self.open_seconds - (self.clock() - self._opened_at)
+        return max(1, math.ceil(remaining))
+
+    def check(self) -> None:
+        '''Raise CircuitOpenError if a call would be rejected right now, without taking a probe slot.'''
+        state = self.state
+        if state == CircuitState.OPEN or (
+            state == CircuitState.HALF_OPEN and self._probes_in_flight >= self.half_open_probes
+        ):
+            raise CircuitOpenError("The AI service is temporarily unavailable.", retry_after=self.retry_after())
+
+    def before_call(self) -> None:
+        '''Admit a call (taking a probe slot when half-open) or raise CircuitOpenError.'''
+        self.check()
+        if self._state == CircuitState.HALF_OPEN:
+            self._probes_in_flight += 1
+
+    def abandon(self) -> None:
+        '''Release an admitted call that ended without an outcome (cancelled early).'''
+        if self._state == CircuitState.HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+
+    def record(self, success: bool, latency_seconds: float) -> None:
+        '''Record the outcome of an admitted call and update the state.'''
+        if self._state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if not success:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._state = CircuitState.CLOSED
+                self._outcomes.clear()
+            return
+        if self._state == CircuitState.OPEN:
+            # A call admitted before the circuit opened finished late
+            return
+
+        self._outcomes.append((not success, latency_seconds > self.slow_call_seconds))
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow = sum(1 for _, is_slow in self._outcomes if is_slow)
+        if failures / calls >= self.failure_rate_threshold or slow / calls >= self.slow_call_rate_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = self.clock()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._outcomes.clear()
+        self.times_opened += 1
+
+
+class CircuitBreakerProvider(LLMProvider):
+    '''Wraps an LLMProvider so calls fail fast while its circuit is open.'''
+    def __init__(self, inner: LLMProvider, breaker: CircuitBreaker):
+        '''Wrap a provider with the breaker that guards it.'''
+        self.inner = inner
+        self.breaker = breaker
+
+    async def warm_up(self) -> None:
+        '''Warm up the wrapped provider.'''
+        await self.inner.warm_up()
+
+    async def aclose(self) -> None:
+        '''Close the wrapped provider.'''
+        await self.inner.aclose()
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        '''Stream through the breaker, recording success, failure and time-to-first-token.'''
+        self.breaker.before_call()
+        started = time.monotonic()
+        first_token: Optional[float] = None
+        success: Optional[bool] = None
+        try:
+            async with aclosing(self.inner.stream(messages, llm_config)) as chunks:
+                async for chunk in chunks:
+                    if first_token is None:
+                        first_token = time.monotonic() - started
+                    yield chunk
+            success = True
+        except QuotaExhaustedError:
+            raise
+        except LLMProviderError as error:
+            if error.retryable:
+                success = False
+            raise
+        finally:
+            if success is None and first_token is not None:
+                success = True
+            if success is None:
+                self.breaker.abandon()
+            else:
+                self.breaker.record(success, first_token if first_token is not None else time.monotonic() - started)
@@ -2,48 +2,224 @@
 GroqProvider — concrete LLMProvider implementation using the Groq SDK.
 Streams responses token-by-token using llama-3.3-70b-versatile.
 Per-persona LLM config (temperature, top_p, etc.) is applied per call.
+When given an http_client, the provider uses that pooled client instead
+of the SDK default, and can pre-connect it with warm_up().
+With a StreamRecorder attached, every upstream stream is also written
+as a replayable fixture (see stream_fixtures). With a UsageMeter, the
+token usage Groq reports at the end of each stream is metered along
+with TTFT, duration and outcome.
 '''
+import asyncio
+import logging
+import time
 import groq
-from typing import AsyncIterator
+import httpx
+from groq.types import CompletionUsage
+from typing import AsyncIterator, Callable, Mapping, Optional
 from app.domain.entities.message import Message
 from app.domain.entities.persona import PersonaLLMConfig
 from app.domain.interfaces.llm_provider import LLMProvider
 from app.core.exceptions import LLMProviderError
+from app.core.metrics import INTER_TOKEN_SECONDS, TOKENS_SAVED, UPSTREAM_ERRORS, UPSTREAM_TTFT_SECONDS
+from app.core.request_context import current_request, report_model
+from app.core.tracing import span
 
 from app.infrastructure.enums import GroqModel
+from app.infrastructure.llm.stream_fixtures import StreamRecorder
+from app.infrastructure.metering import UsageMeter, UsageRecord
+
+logger = logging.getLogger(__name__)
+
+# Connection drops and timeouts, whether raised by the SDK or mid-stream by httpx
+_TRANSIENT_ERRORS = (groq.APIConnectionError, groq.APITimeoutError, httpx.TransportError)
+
+
+# Weight of the newest completed reply in a persona's mean completion length
+_COMPLETION_ALPHA = 0.1
+
+
+def _retryable_status(status_code: int) -> bool:
+    # 429 is left to the QuotaScheduler, which waits on the reported reset instead of blind backoff
+    return status_code in (408, 409) or status_code >= 500
+
 
 class GroqProvider(LLMProvider):
     '''Concrete implementation of LLMProvider for Groq Cloud API.'''
-    def __init__(self, api_key: str, model: str = GroqModel.LLAMA_70B):
-        '''Initialize the Groq client with API key and model selection.'''
-        self.client = groq.AsyncGroq(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = GroqModel.LLAMA_70B,
+        http_client: Optional[httpx.AsyncClient] = None,
+        warmup_connections: int = 2,
+        rate_limit_listener: Optional[Callable[[Mapping[str, str]], None]] = None,
+        recorder: Optional[StreamRecorder] = None,
+        max_retries: int = 2,
+        meter: Optional[UsageMeter] = None,
+    ):
+        '''Initialize the Groq client with API key, model selection and optional pooled HTTP client.'''
+        self.client = groq.AsyncGroq(api_key=api_key, http_client=http_client, max_retries=max_retries)
         self.model = model
+        self.warmup_connections = warmup_connections
+        # Receives the x-ratelimit-* headers of every response, including 429s
+        self.rate_limit_listener = rate_limit_listener
+        self.recorder = recorder
+        self.meter = meter
+        # Moving mean of completed replies' length per persona, for the tokens-saved estimate
+        self._mean_completion_tokens: dict[str, float] = {}
+
+    async def warm_up(self) -> None:
+        '''
+        Open warmup_connections pooled connections (DNS + TLS) with a cheap
+        authenticated call so the first user requests skip the handshake.
+        Failures are logged, never raised — startup must not depend on Groq.
+        '''
+        client = self.client.with_options(max_retries=0)
+        results = await asyncio.gather(
+            *(client.models.list() for _ in range(self.warmup_connections)),
+            return_exceptions=True,
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning("Groq warm-up failed for %d connection(s): %s", len(failures), failures[0])
+
+    async def ping(self, timeout_seconds: float = 5.0) -> None:
+        '''One cheap authenticated call without retries, for health probing. Raises on failure.'''
+        await self.client.with_options(max_retries=0, timeout=timeout_seconds).models.list()
+
+    async def aclose(self) -> None:
+        '''Close the underlying HTTP client and its pooled connections.'''
+        await self.client.close()
 
     async def stream(
         self, 
         messages: list[Message],
         llm_config: PersonaLLMConfig
     ) -> AsyncIterator[str]:
-        '''Stream completion chunks from Groq API based on domain messages and config.'''
+        '''
+        Stream completion chunks from Groq API based on domain messages and config.
+        Records time-to-first-token, inter-chunk gaps and failures per persona and model,
+        estimates the completion tokens saved when the stream is closed early, and meters
+        the call's usage when a UsageMeter is attached.
+        '''
+        persona_id = current_request().persona_id
+        recording = self.recorder.start(self.model, messages, llm_config) if self.recorder else None
+        sent = time.perf_counter()
+        first: Optional[float] = None
+        usage: Optional[CompletionUsage] = None
+        completion_bytes = 0
+        # Stays "cancelled" if the consumer closes the stream before it ends
+        outcome = "cancelled"
         try:
-            # Convert Domain Message to Groq Message Format
-            groq_messages = [
-                {"role": m.role, "content": m.content} for m in messages
-            ]
-            
-            completion = await self.client.chat.completions.create(
-                model=self.model,
-                messages=groq_messages,
-                max_tokens=llm_config.max_tokens,
-                temperature=llm_config.temperature,
-                top_p=llm_config.top_p,
-                presence_penalty=llm_config.presence_penalty,
-                stream=True,
-            )
-            
-            async for chunk in completion:
-                content = chunk.choices[0].delta.content
-                if content:
-                    yield content
+            with span("groq.stream", model=self.model, max_tokens=llm_config.max_tokens):
+                # Convert Domain Message to Groq Message Format
+                groq_messages = [m.payload for m in messages]
+
+                response = await self.client.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=groq_messages,
+                    max_tokens=llm_config.max_tokens,
+                    temperature=llm_config.temperature,
+                    top_p=llm_config.top_p,
+                    presence_penalty=llm_config.presence_penalty,
+                    stream=True,
+                )
+                if self.rate_limit_listener is not None:
+                    self.rate_limit_listener(response.headers)
+                completion = await response.parse()
+
+                # Closing the SDK stream releases the upstream HTTP response right away
+                # when the consumer stops early (client disconnect, cancellation).
+                try:
+                    last = None
+                    async for chunk in completion:
+                        # Groq reports usage on the final chunk
+                        if chunk.x_groq is not None and chunk.x_groq.usage is not None:
+                            usage = chunk.x_groq.usage
+                        elif chunk.usage is not None:
+                            usage = chunk.usage
+                        if not chunk.choices:
+                            continue
+                        content = chunk.choices[0].delta.content
+                        if content:
+                            now = time.perf_counter()
+                            if last is None:
+                                first = now
+                                report_model(self.model)
+                                UPSTREAM_TTFT_SECONDS.observe(now - sent, persona=persona_id, model=self.model)
+                            else:
+                                INTER_TOKEN_SECONDS.observe(now - last, persona=persona_id, model=self.model)
+                            last = now
+                            completion_bytes += len(content.encode("utf-8"))
+                            if recording is not None:
+                                recording.add(content)
+                            yield content
+                    if recording is not None:
+                        await recording.finish(complete=True)
+                    outcome = "completed"
+                    self._observe_completion(persona_id, usage, completion_bytes)
+                except (GeneratorExit, asyncio.CancelledError):
+                    # Closed before the end: Groq stops generating the rest, which
+                    # would have run about as long as this persona's replies usually do
+                    mean = self._mean_completion_tokens.get(persona_id)
+                    if mean is not None:
+                        expected = min(float(llm_config.max_tokens), mean)
+                        TOKENS_SAVED.inc(max(0.0, expected - completion_bytes // 4), persona=persona_id)
+                    raise
+                finally:
+                    await completion.close()
+        except groq.APIStatusError as e:
+            outcome = "error"
+            if recording is not None:
+                await recording.finish(complete=False)
+            if self.rate_limit_listener is not None:
+                self.rate_limit_listener(e.response.headers)
+            error = LLMProviderError(f"Groq API error: {str(e)}", retryable=_retryable_status(e.status_code))
+            UPSTREAM_ERRORS.inc(persona=persona_id, model=self.model, code=error.code)
+            raise error
         except Exception as e:
-            raise LLMProviderError(f"Groq API error: {str(e)}")
+            outcome = "error"
+            if recording is not None:
+                await recording.finish(complete=False)
+            error = LLMProviderError(f"Groq API error: {str(e)}", retryable=isinstance(e, _TRANSIENT_ERRORS))
+            UPSTREAM_ERRORS.inc(persona=persona_id, model=self.model, code=error.code)
+            raise error
+        finally:
+            if self.meter is not None:
+                self._meter(messages, sent, first, usage, completion_bytes, outcome)
+
+    def _observe_completion(self, persona_id: str, usage: Optional[CompletionUsage], completion_bytes: int) -> None:
+        '''Fold a completed reply's length (reported, else estimated) into the persona's mean.'''
+        tokens = usage.completion_tokens if usage is not None else completion_bytes // 4
+        mean = self._mean_completion_tokens.get(persona_id)
+        self._mean_completion_tokens[persona_id] = (
+            float(tokens) if mean is None else mean + _COMPLETION_ALPHA * (tokens - mean)
+        )
+
+    def _meter(
+        self,
+        messages: list[Message],
+        sent: float,
+        first: Optional[float],
+        usage: Optional[CompletionUsage],
+        completion_bytes: int,
+        outcome: str,
+    ) -> None:
+        '''Hand one usage record to the meter; estimates tokens when Groq reported none.'''
+        context = current_request()
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+        else:
+            prompt_tokens = sum(m.token_estimate for m in messages)
+            completion_tokens = completion_bytes // 4
+        self.meter.record(UsageRecord(
+            timestamp=time.time(),
+            client_id=self.meter.client(context.client_id),
+            persona_id=context.persona_id,
+            model=self.model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            ttft_ms=round((first - sent) * 1000, 1) if first is not None else None,
+            duration_ms=round((time.perf_counter() - sent) * 1000, 1),
+            outcome=outcome,
+            estimated=usage is None,
+        ))
@@ -0,0 +1,82 @@
+'''
+UpstreamHealthProbe — background upstream check with a cached result.
+
+Every `interval_seconds` the probe runs one cheap upstream call (for
+Groq, listing models with retries disabled) under `timeout_seconds`,
+and caches the outcome. /health reports the cached snapshot, so health
+checks never trigger upstream traffic of their own.
+'''
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamHealthProbe:
+    '''Periodically probes the upstream and keeps the latest result.'''
+    def __init__(
+        self,
+        check: Callable[[], Awaitable[None]],
+        interval_seconds: float = 30.0,
+        timeout_seconds: float = 5.0,
+    ):
+        '''Configure the probe call and how often / how long it may run.'''
+        self.check = check
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.status = "unknown"
+        self.checked_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def check_once(self) -> bool:
+        '''Run one probe and update the cached state. Returns whether upstream is up.'''
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.check(), timeout=self.timeout_seconds)
+        except Exception as exc:
+            self.status = "down"
+            self.last_error = f"{type(exc).__name__}: {exc}"[:200]
+            self.consecutive_failures += 1
+            if self.consecutive_failures == 1:
+                logger.warning("Upstream health probe failed: %s", self.last_error)
+        else:
+            if self.status == "down":
+                logger.info("Upstream health probe recovered")
+            self.status = "up"
+            self.last_error = None
+            self.consecutive_failures = 0
+        self.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.checked_at = time.time()
+        return self.status == "up"
+
+    def snapshot(self) -> dict:
+        '''Cached probe result for /health.'''
+        return {
+            "status": self.status,
+            "checked_at": self.checked_at,
+            "latency_ms": self.latency_ms,
+            "consecutive_failures": self.consecutive_failures,
+            "error": self.last_error,
+        }
+
+    def start(self) -> None:
+        '''Start probing in the background (idempotent).'''
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        '''Stop the background probe.'''
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.check_once()
+            await asyncio.sleep(self.interval_seconds)
@@ -0,0 +1,38 @@
+'''
+Upstream HTTP pool — builds the shared httpx.AsyncClient used by every
+GroqProvider. Owning the client lets us tune connection limits,
+keep-alive and timeouts, pre-connect at startup, and close the pool
+cleanly on shutdown instead of relying on SDK defaults.
+'''
+import importlib.util
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def build_http_client(
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry_seconds: float = 30.0,
+    http2: bool = True,
+    connect_timeout_seconds: float = 5.0,
+    read_timeout_seconds: float = 30.0,
+) -> httpx.AsyncClient:
+    '''Create a pooled async HTTP client. Falls back to HTTP/1.1 if h2 is not installed.'''
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1.")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_seconds,
+        ),
+        timeout=httpx.Timeout(
+            read_timeout_seconds,
+            connect=connect_timeout_seconds,
+        ),
+    )
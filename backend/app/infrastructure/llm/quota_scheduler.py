@@ -0,0 +1,237 @@
+'''
+QuotaScheduler — LLMProvider decorator that keeps traffic inside the
+upstream's request and token quotas.
+
+Each call is charged an estimated cost (prompt token estimate plus the
+persona's max_tokens) against a continuously refilling model of the
+remaining quota. The model is corrected from the x-ratelimit-* headers
+the provider reports, so it tracks the account's real limits.
+
+Calls that cannot be served immediately wait in a priority queue
+ordered by (priority, virtual finish time): the request context's
+priority puts interactive chat ahead of panel fan-out, and within a
+priority, virtual finish times are
+assigned per flow — one flow per (client, persona) pair — in the
+style of weighted fair queuing, so a single heavy client cannot starve
+the rest. A call whose cost exceeds the whole token limit, or whose
+expected wait exceeds max_wait_seconds, fails immediately with
+QuotaExhaustedError instead of spending a round-trip on a certain 429.
+'''
+import asyncio
+import heapq
+from contextlib import aclosing
+import itertools
+import re
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Mapping, Optional
+from app.core.exceptions import QuotaExhaustedError
+from app.core.request_context import current_request
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.interfaces.llm_provider import LLMProvider
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset(value: str) -> Optional[float]:
+    '''Parse Groq reset durations such as "2m59.56s" or "7.66s" into seconds.'''
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+@dataclass
+class QuotaBucket:
+    '''Continuously refilling model of one upstream quota.'''
+    limit: float
+    window_seconds: float
+    remaining: float = -1.0
+    updated: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        if self.remaining < 0:
+            self.remaining = self.limit
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.window_seconds
+
+    def refill(self, now: float) -> None:
+        self.remaining = min(self.limit, self.remaining + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, cost: float) -> float:
+        '''Seconds until `cost` units are available (0.0 if available now).'''
+        return max(0.0, (cost - self.remaining) / self.rate)
+
+    def observe(self, limit: Optional[str], remaining: Optional[str], reset: Optional[str], now: float) -> None:
+        '''Overwrite the local model with the authoritative header values.'''
+        if limit and limit.isdigit():
+            self.limit = float(limit)
+        if remaining and remaining.isdigit():
+            self.remaining = float(remaining)
+            self.updated = now
+        seconds = parse_reset(reset) if reset else None
+        if seconds and self.limit > self.remaining:
+            # Refill the used part of the quota over the reported reset time
+            self.window_seconds = max(1.0, seconds * self.limit / (self.limit - self.remaining))
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    finish: float
+    seq: int
+    cost: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class QuotaScheduler(LLMProvider):
+    '''Fair, quota-aware dispatcher in front of an LLMProvider.'''
+    def __init__(
+        self,
+        inner: LLMProvider,
+        requests_limit: float = 1000,
+        requests_window_seconds: float = 60,
+        tokens_limit: float = 12_000,
+        tokens_window_seconds: float = 60,
+        max_wait_seconds: float = 30.0,
+    ):
+        '''Wrap a provider with initial quota limits; headers refine them at runtime.'''
+        self.inner = inner
+        self.requests = QuotaBucket(requests_limit, requests_window_seconds)
+        self.tokens = QuotaBucket(tokens_limit, tokens_window_seconds)
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: list[_Ticket] = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._flow_finish: dict[tuple[str, str], float] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        '''Number of calls waiting for quota.'''
+        return len(self._queue)
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        '''Update the quota model from x-ratelimit-* response headers.'''
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        self.requests.observe(
+            headers.get("x-ratelimit-limit-requests"),
+            headers.get("x-ratelimit-remaining-requests"),
+            headers.get("x-ratelimit-reset-requests"),
+            now,
+        )
+        self.tokens.observe(
+            headers.get("x-ratelimit-limit-tokens"),
+            headers.get("x-ratelimit-remaining-tokens"),
+            headers.get("x-ratelimit-reset-tokens"),
+            now,
+        )
+        self._pump()
+
+    @staticmethod
+    def estimate_cost(messages: list[Message], llm_config: PersonaLLMConfig) -> int:
+        '''Prompt token estimate plus the completion budget.'''
+        return sum(m.token_estimate for m in messages) + llm_config.max_tokens
+
+    def _wait_time(self, cost: float) -> float:
+        return max(self.requests.wait_for(1), self.tokens.wait_for(cost))
+
+    def _pump(self) -> None:
+        '''Dispatch queued calls in order while quota allows; re-arm the timer otherwise.'''
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        while self._queue:
+            head = self._queue[0]
+            if head.future.done():
+                heapq.heappop(self._queue)
+                continue
+            wait = self._wait_time(head.cost)
+            if wait > 0:
+                self._arm(wait)
+                return
+            heapq.heappop(self._queue)
+            self._consume(head.cost, head.finish)
+            head.future.set_result(None)
+
+    def _arm(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+
+    def _consume(self, cost: float, finish: float) -> None:
+        self.requests.remaining -= 1
+        self.tokens.remaining -= cost
+        self._virtual_time = max(self._virtual_time, finish)
+
+    async def _admit(self, cost: float) -> None:
+        '''Wait until this call may be sent upstream, or fail fast.'''
+        if cost > self.tokens.limit:
+            self.rejected += 1
+            raise QuotaExhaustedError("Request exceeds the upstream token quota.")
+
+        context = current_request()
+        flow = (context.client_id, context.persona_id)
+        if len(self._flow_finish) > 10_000:
+            # Flows already behind virtual time have no backlog to remember
+            self._flow_finish = {
+                k: v for k, v in self._flow_finish.items() if v > self._virtual_time
+            }
+        finish = max(self._virtual_time, self._flow_finish.get(flow, 0.0)) + cost
+        self._flow_finish[flow] = finish
+
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        if not self._queue and self._wait_time(cost) == 0:
+            self._consume(cost, finish)
+            return
+
+        queued_cost = sum(t.cost for t in self._queue if not t.future.done())
+        if self.tokens.wait_for(queued_cost + cost) > self.max_wait_seconds:
+            self.rejected += 1
+            raise QuotaExhaustedError("Upstream quota is exhausted; try again later.")
+
+        ticket = _Ticket(
+            context.priority,
+            finish,
+            next(self._seq),
+            cost,
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._queue, ticket)
+        self._pump()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            ticket.future.cancel()
+            raise
+
+    async def warm_up(self) -> None:
+        '''Warm up the wrapped provider.'''
+        await self.inner.warm_up()
+
+    async def aclose(self) -> None:
+        '''Close the wrapped provider.'''
+        if self._timer is not None:
+            self._timer.cancel()
+        await self.inner.aclose()
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        '''Wait for quota under fair scheduling, then stream from the wrapped provider.'''
+        await self._admit(self.estimate_cost(messages, llm_config))
+        async with aclosing(self.inner.stream(messages, llm_config=llm_config)) as stream:
+            async for chunk in stream:
+                yield chunk
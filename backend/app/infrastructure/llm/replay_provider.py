@@ -0,0 +1,64 @@
+'''
+ReplayProvider — LLMProvider that serves recorded Groq streams.
+
+Fixtures written by GroqProvider's recording mode are replayed with
+their original chunk boundaries and timing, scaled by time_scale
+(1.0 = as recorded, 0.5 = twice as fast, 0 = no delays). A request is
+matched to a fixture by exact cache key first, then by persona, then
+round-robin over everything, so realistic traffic shapes can be
+benchmarked offline without the exact prompts that were recorded.
+'''
+import asyncio
+import itertools
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Iterator
+from app.core.exceptions import LLMProviderError
+from app.core.request_context import current_request, report_model
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.llm.caching_provider import cache_key
+from app.infrastructure.llm.stream_fixtures import StreamFixture
+
+
+class ReplayProvider(LLMProvider):
+    '''Replays recorded stream fixtures with original or scaled timing.'''
+    def __init__(self, fixtures: list[StreamFixture], time_scale: float = 1.0):
+        if not fixtures:
+            raise ValueError("ReplayProvider needs at least one stream fixture.")
+        self.time_scale = time_scale
+        self._by_key = {fixture.key: fixture for fixture in fixtures}
+        by_persona: dict[str, list[StreamFixture]] = defaultdict(list)
+        for fixture in fixtures:
+            by_persona[fixture.persona_id].append(fixture)
+        self._persona_cycles: dict[str, Iterator[StreamFixture]] = {
+            persona: itertools.cycle(items) for persona, items in by_persona.items()
+        }
+        self._all = itertools.cycle(fixtures)
+
+    def select(self, messages: list[Message], llm_config: PersonaLLMConfig) -> StreamFixture:
+        '''Pick the fixture to replay for a request.'''
+        exact = self._by_key.get(cache_key(messages, llm_config))
+        if exact is not None:
+            return exact
+        cycle = self._persona_cycles.get(current_request().persona_id)
+        return next(cycle if cycle is not None else self._all)
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        '''Yield the selected fixture's chunks at their recorded offsets.'''
+        fixture = self.select(messages, llm_config)
+        report_model(fixture.model)
+        start = time.perf_counter()
+        for offset_ms, text in fixture.chunks:
+            if self.time_scale > 0:
+                delay = offset_ms / 1000 * self.time_scale - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield text
+        if not fixture.complete:
+            raise LLMProviderError("Recorded upstream stream ended with an error.", retryable=True)
@@ -0,0 +1,81 @@
+'''
+ResponseCache — LRU + TTL store of completed LLM chunk sequences.
+Entries are kept in an OrderedDict in least-recently-used order and
+bounded by an idle TTL, an entry count and a global byte cap.
+'''
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.domain.interfaces.shared_state import ResponseStore
+
+# Rough per-chunk bookkeeping cost on top of the UTF-8 content.
+_CHUNK_OVERHEAD_BYTES = 56
+
+
+def _chunks_size(chunks: tuple[str, ...]) -> int:
+    '''Approximate the memory cost of a stored chunk sequence.'''
+    return sum(len(c.encode("utf-8")) + _CHUNK_OVERHEAD_BYTES for c in chunks)
+
+
+class ResponseCache(ResponseStore):
+    '''Bounded in-process cache of streamed responses keyed by request digest.'''
+    def __init__(
+        self,
+        ttl_seconds: float = 600.0,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+    ):
+        '''Configure eviction limits for the cache.'''
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (stored_at, size_bytes, chunks)
+        self._entries: OrderedDict[str, tuple[float, int, tuple[str, ...]]] = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def total_bytes(self) -> int:
+        '''Approximate bytes held by all cached responses.'''
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[tuple[str, ...]]:
+        '''Return the cached chunks for a key, or None on a miss or expiry.'''
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, _, chunks = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return chunks
+
+    def put(self, key: str, chunks: tuple[str, ...]) -> None:
+        '''Store a completed chunk sequence. Oversized responses are not cached.'''
+        size = _chunks_size(chunks)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic(), size, chunks)
+        self._total_bytes += size
+        self._evict()
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def _evict(self) -> None:
+        '''Drop least-recently-used entries until under both caps.'''
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
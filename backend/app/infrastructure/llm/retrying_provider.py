@@ -0,0 +1,139 @@
+'''
+RetryingProvider — recover from transient upstream failures mid-request.
+
+- Before the first token: a retryable LLMProviderError (connection drop,
+  timeout, 5xx) is retried up to `max_retries` times with full-jitter
+  exponential backoff, so simultaneous failures do not retry in lockstep.
+- After partial output: instead of failing the reply, a continuation
+  request is sent with the text emitted so far as an assistant prefix,
+  and max_tokens reduced by that text's estimated size, so the whole
+  reply stays within the persona's budget. Up to `max_continuations`.
+
+The continuation is stitched in seamlessly: its first `stitch_window`
+characters are held back so a restated tail of the emitted text (the
+model repeating itself across the seam) can be trimmed before anything
+reaches the client.
+
+Non-retryable errors (bad requests, quota, an open circuit) are raised
+straight away, as is any error once the attempts are spent.
+'''
+import asyncio
+import random
+from contextlib import aclosing
+from dataclasses import replace
+from typing import AsyncIterator, Optional
+from app.core.exceptions import LLMProviderError
+from app.core.metrics import UPSTREAM_RETRIES
+from app.core.request_context import current_request
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.domain.interfaces.llm_provider import LLMProvider
+
+
+def trim_overlap(emitted: str, continuation: str, min_overlap: int = 8) -> str:
+    '''
+    Drop the start of `continuation` that restates the end of `emitted`.
+    Overlaps shorter than min_overlap characters are kept, since a short
+    match is more likely coincidence than repetition.
+    '''
+    longest = min(len(emitted), len(continuation))
+    for size in range(longest, min_overlap - 1, -1):
+        if emitted.endswith(continuation[:size]):
+            return continuation[size:]
+    return continuation
+
+
+class RetryingProvider(LLMProvider):
+    '''Wraps an LLMProvider with pre-token retries and mid-stream continuation.'''
+    def __init__(
+        self,
+        inner: LLMProvider,
+        max_retries: int = 2,
+        max_continuations: int = 2,
+        base_delay_seconds: float = 0.25,
+        max_delay_seconds: float = 2.0,
+        stitch_window: int = 64,
+        rng: Optional[random.Random] = None,
+    ):
+        '''Configure attempt limits, the backoff curve and the seam look-ahead.'''
+        self.inner = inner
+        self.max_retries = max_retries
+        self.max_continuations = max_continuations
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.stitch_window = stitch_window
+        self._rng = rng or random.Random()
+
+    async def warm_up(self) -> None:
+        '''Warm up the wrapped provider.'''
+        await self.inner.warm_up()
+
+    async def aclose(self) -> None:
+        '''Close the wrapped provider.'''
+        await self.inner.aclose()
+
+    def backoff(self, attempt: int) -> float:
+        '''Full-jitter delay before retry number `attempt` (1-based).'''
+        cap = min(self.max_delay_seconds, self.base_delay_seconds * 2 ** (attempt - 1))
+        return self._rng.uniform(0, cap)
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        '''Stream from the wrapped provider, retrying or continuing after transient failures.'''
+        emitted: list[str] = []
+        retries = continuations = 0
+
+        while True:
+            prefix = "".join(emitted)
+            if prefix:
+                # Same ~4 bytes per token heuristic as Message.token_estimate
+                remaining = llm_config.max_tokens - len(prefix.encode("utf-8")) // 4
+                if remaining <= 0:
+                    return
+                attempt_messages = [*messages, Message(role=MessageRole.ASSISTANT, content=prefix)]
+                attempt_config = replace(llm_config, max_tokens=remaining)
+            else:
+                attempt_messages, attempt_config = messages, llm_config
+
+            # Continuation text held back until the seam has been checked
+            head: Optional[list[str]] = [] if prefix else None
+            head_chars = 0
+            try:
+                async with aclosing(self.inner.stream(attempt_messages, attempt_config)) as chunks:
+                    async for chunk in chunks:
+                        if head is not None:
+                            head.append(chunk)
+                            head_chars += len(chunk)
+                            if head_chars < self.stitch_window:
+                                continue
+                            chunk = trim_overlap(prefix, "".join(head))
+                            head = None
+                            if not chunk:
+                                continue
+                        emitted.append(chunk)
+                        yield chunk
+                if head:
+                    chunk = trim_overlap(prefix, "".join(head))
+                    if chunk:
+                        emitted.append(chunk)
+                        yield chunk
+                return
+            except LLMProviderError as e:
+                if not e.retryable:
+                    raise
+                persona_id = current_request().persona_id
+                if emitted:
+                    if continuations >= self.max_continuations:
+                        raise
+                    continuations += 1
+                    UPSTREAM_RETRIES.inc(persona=persona_id, kind="continuation")
+                else:
+                    if retries >= self.max_retries:
+                        raise
+                    retries += 1
+                    UPSTREAM_RETRIES.inc(persona=persona_id, kind="retry")
+            await asyncio.sleep(self.backoff(retries + continuations))
@@ -0,0 +1,237 @@
+'''
+RoutingProvider — LLMProvider that spreads requests across several
+backends and hedges slow starts.
+
+Each backend keeps a rolling window of time-to-first-token (TTFT)
+samples and an exponentially weighted error rate. A primary backend is
+picked at random, weighted towards low median TTFT and low error rate.
+If the primary has produced no token within a percentile of its own
+TTFT distribution, a hedged request is sent to the best other backend;
+whichever yields a first token first wins and the loser is cancelled.
+Failures before the first token fall over to the remaining attempt.
+Once a stream has started, errors propagate unchanged.
+
+Each attempt's stream is driven start to finish by its own pump task,
+which hands chunks over through a one-slot queue. The race only waits
+on the pumps' first-chunk futures, so no generator is ever stepped from
+two tasks (which would split its context variables and cancellation).
+A loser cancelled before its first token leaves no TTFT sample: its
+elapsed time is only a lower bound and would bias the hedge percentile.
+'''
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+from app.core.exceptions import LLMProviderError
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.interfaces.llm_provider import LLMProvider
+
+
+@dataclass
+class BackendStats:
+    '''Rolling latency and error statistics for one backend.'''
+    ttft_samples: deque = field(default_factory=lambda: deque(maxlen=200))
+    error_rate: float = 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        '''Return the q-th quantile of recent TTFT samples, or None without data.'''
+        if not self.ttft_samples:
+            return None
+        ordered = sorted(self.ttft_samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass
+class Backend:
+    '''A named LLMProvider plus its observed statistics.'''
+    name: str
+    provider: LLMProvider
+    stats: BackendStats = field(default_factory=BackendStats)
+
+
+# End of an attempt's stream: the first-chunk result of an empty reply, or the last queued item
+_END = object()
+
+
+class _Attempt:
+    '''One stream against a backend, pumped by its own task; `first` resolves with its first chunk.'''
+    def __init__(self, backend: Backend, messages: list[Message], llm_config: PersonaLLMConfig):
+        self.backend = backend
+        self.started = time.monotonic()
+        self.first: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._chunks: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._task = asyncio.create_task(self._pump(backend.provider.stream(messages, llm_config=llm_config)))
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        end: object = _END
+        try:
+            async with aclosing(source) as stream:
+                async for chunk in stream:
+                    if self.first.done():
+                        await self._chunks.put(chunk)
+                    else:
+                        self.first.set_result(chunk)
+        except Exception as exc:
+            end = exc
+        if not self.first.done():
+            if end is _END:
+                self.first.set_result(_END)
+            else:
+                self.first.set_exception(end)
+        else:
+            await self._chunks.put(end)
+
+    async def rest(self) -> AsyncIterator[str]:
+        '''Chunks after the first, re-raising the stream's error where it occurred.'''
+        while True:
+            item = await self._chunks.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def cancel(self) -> None:
+        '''Stop the pump without waiting for it.'''
+        self._task.cancel()
+
+    async def close(self) -> None:
+        '''Cancel the pump, which closes the upstream stream. A cancellation of the caller still propagates.'''
+        self.cancel()
+        try:
+            # wait() never raises the pump's own outcome, only the caller's cancellation
+            await asyncio.wait({self._task})
+        finally:
+            if self.first.done() and not self.first.cancelled():
+                # Retrieved here; failures were already recorded by the router
+                self.first.exception()
+
+
+def _failed(first: asyncio.Future) -> bool:
+    '''Whether a finished first-chunk future failed (an empty stream is not a failure).'''
+    return first.exception() is not None
+
+
+class RoutingProvider(LLMProvider):
+    '''Latency-aware router over several LLMProvider backends with hedged requests.'''
+    def __init__(
+        self,
+        backends: list[Backend],
+        hedge_percentile: float = 0.95,
+        hedge_min_delay_seconds: float = 0.25,
+        hedge_max_delay_seconds: float = 3.0,
+        default_ttft_seconds: float = 1.0,
+        error_alpha: float = 0.1,
+        error_penalty: float = 10.0,
+    ):
+        '''Configure backends and the hedging policy.'''
+        if not backends:
+            raise ValueError("RoutingProvider requires at least one backend.")
+        self.backends = backends
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay_seconds = hedge_min_delay_seconds
+        self.hedge_max_delay_seconds = hedge_max_delay_seconds
+        self.default_ttft_seconds = default_ttft_seconds
+        self.error_alpha = error_alpha
+        self.error_penalty = error_penalty
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def score(self, backend: Backend) -> float:
+        '''Expected cost of a backend — lower is better.'''
+        median = backend.stats.percentile(0.5) or self.default_ttft_seconds
+        return median * (1.0 + self.error_penalty * backend.stats.error_rate)
+
+    def hedge_delay(self, backend: Backend) -> float:
+        '''How long to wait for a first token before hedging.'''
+        delay = backend.stats.percentile(self.hedge_percentile) or self.default_ttft_seconds
+        return min(self.hedge_max_delay_seconds, max(self.hedge_min_delay_seconds, delay))
+
+    def _pick(self, exclude: Optional[Backend] = None) -> Optional[Backend]:
+        candidates = [b for b in self.backends if b is not exclude]
+        if not candidates:
+            return None
+        weights = [1.0 / max(self.score(b), 1e-6) for b in candidates]
+        return random.choices(candidates, weights=weights)[0]
+
+    def _best(self, exclude: Backend) -> Optional[Backend]:
+        candidates = [b for b in self.backends if b is not exclude]
+        return min(candidates, key=self.score) if candidates else None
+
+    def _record(self, backend: Backend, ttft: Optional[float], failed: bool) -> None:
+        stats = backend.stats
+        if ttft is not None:
+            stats.ttft_samples.append(ttft)
+        stats.error_rate += self.error_alpha * ((1.0 if failed else 0.0) - stats.error_rate)
+
+    async def warm_up(self) -> None:
+        '''Warm up every backend concurrently.'''
+        await asyncio.gather(*(b.provider.warm_up() for b in self.backends))
+
+    async def aclose(self) -> None:
+        '''Close every backend.'''
+        for backend in self.backends:
+            await backend.provider.aclose()
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        '''Stream from the fastest backend, hedging when the primary is slow to start.'''
+        primary = _Attempt(self._pick(), messages, llm_config)
+        attempts = [primary]
+        winner: Optional[_Attempt] = None
+        error: Optional[BaseException] = None
+
+        try:
+            await asyncio.wait({primary.first}, timeout=self.hedge_delay(primary.backend))
+            if not primary.first.done() or _failed(primary.first):
+                hedge_backend = self._best(exclude=primary.backend)
+                if hedge_backend is not None:
+                    attempts.append(_Attempt(hedge_backend, messages, llm_config))
+                    self.hedges_sent += 1
+
+            pending = {a.first: a for a in attempts}
+            while pending and winner is None:
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    attempt = pending.pop(task)
+                    elapsed = time.monotonic() - attempt.started
+                    if _failed(task):
+                        self._record(attempt.backend, None, failed=True)
+                        error = task.exception()
+                    elif winner is None:
+                        self._record(attempt.backend, elapsed, failed=False)
+                        winner = attempt
+        finally:
+            losers = [a for a in attempts if a is not winner]
+            # Cancel every loser before awaiting any, so none keeps streaming
+            for attempt in losers:
+                attempt.cancel()
+            for attempt in losers:
+                await attempt.close()
+
+        if winner is None:
+            if isinstance(error, LLMProviderError):
+                raise error
+            raise LLMProviderError(f"All routed backends failed: {error}", retryable=True)
+        if winner is not primary:
+            self.hedges_won += 1
+
+        try:
+            first = winner.first.result()
+            if first is _END:
+                return
+            yield first
+            async for chunk in winner.rest():
+                yield chunk
+        except LLMProviderError:
+            self._record(winner.backend, None, failed=True)
+            raise
+        finally:
+            await winner.close()
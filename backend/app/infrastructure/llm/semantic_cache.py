@@ -0,0 +1,295 @@
+'''
+Semantic cache — serve near-duplicate questions from stored replies.
+
+The exact-match CachingProvider misses "who are you", "Who are you??"
+and "tell me who you are". Here each user message is embedded locally
+— no network, no model — as a hashed bag of words and character
+trigrams: features are hashed into `dim` signed buckets and the vector
+is L2-normalised, so a dot product is the cosine similarity.
+
+Vectors live in one float32 matrix per scope (system prompt, prior
+history and generation config), kept compact by swap-removing evicted
+rows, and are searched with a single matrix product. A lookup hits when
+the best similarity reaches the persona's threshold.
+
+Only short turns qualify: at most `max_history_messages` prior turns
+and a user message of at most `max_message_chars`. Longer exchanges
+rarely repeat, and a reply to them depends on more than the question.
+Entries are evicted least-recently-used beyond `max_entries`, and
+expire after `ttl_seconds`.
+
+Requires NumPy (optional dependency); see available().
+'''
+import asyncio
+import hashlib
+import re
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import aclosing
+from dataclasses import astuple, dataclass
+from typing import AsyncIterator, Callable, Optional, Sequence
+from app.core.metrics import SEMANTIC_CACHE_LOOKUPS, SEMANTIC_CACHE_SIMILARITY
+from app.core.request_context import current_request, reply_accepted, report_model
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.domain.interfaces.llm_provider import LLMProvider
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+_WORD = re.compile(r"\w+")
+
+# A stored question this close to a new one is the same question; refresh it instead
+_DUPLICATE_SIMILARITY = 0.995
+
+
+def available() -> bool:
+    '''Whether NumPy is installed, which the semantic cache requires.'''
+    return np is not None
+
+
+def scope_key(context: list[Message], llm_config: PersonaLLMConfig) -> str:
+    '''Digest of everything but the final user message: prompt, history and generation config.'''
+    digest = hashlib.blake2b(digest_size=16)
+    for message in context:
+        digest.update(message.role.encode())
+        digest.update(b"\x1f")
+        digest.update(message.content.encode("utf-8"))
+        digest.update(b"\x1e")
+    digest.update(repr(astuple(llm_config)).encode())
+    return digest.hexdigest()
+
+
+class HashedNgramEmbedder:
+    '''Embeds text as a signed, hashed bag of words and character trigrams.'''
+    def __init__(self, dim: int = 1024):
+        '''Configure the vector width; more buckets mean fewer hash collisions.'''
+        self.dim = dim
+
+    @staticmethod
+    def features(text: str) -> list[str]:
+        '''Case-folded words plus the trigrams of each space-padded word.'''
+        words = _WORD.findall(text.casefold())
+        features = list(words)
+        for word in words:
+            padded = f" {word} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        '''Embed a batch of texts into a (len(texts), dim) matrix of unit rows.'''
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = self.features(text)
+            if not features:
+                continue
+            hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint32)
+            # High bit picks the sign so colliding features tend to cancel, not pile up
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+            vectors[row] = np.bincount((hashes % self.dim).astype(np.intp), weights=signs, minlength=self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class _ScopeIndex:
+    '''Contiguous matrix of the vectors stored for one scope, with their entry ids.'''
+    def __init__(self, dim: int):
+        self.vectors = np.empty((8, dim), dtype=np.float32)
+        self.ids: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, entry_id: int, vector: "np.ndarray") -> int:
+        '''Append a vector, growing the matrix geometrically; returns its row.'''
+        row = len(self.ids)
+        if row == len(self.vectors):
+            grown = np.empty((row * 2, self.vectors.shape[1]), dtype=np.float32)
+            grown[:row] = self.vectors
+            self.vectors = grown
+        self.vectors[row] = vector
+        self.ids.append(entry_id)
+        return row
+
+    def remove(self, row: int) -> Optional[int]:
+        '''Remove a row by moving the last row into it; returns the id of the moved entry.'''
+        last = len(self.ids) - 1
+        moved = None
+        if row != last:
+            self.vectors[row] = self.vectors[last]
+            self.ids[row] = moved = self.ids[last]
+        self.ids.pop()
+        return moved
+
+    def search(self, queries: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+        '''Best row and its cosine similarity for each query row, in one matrix product.'''
+        scores = queries @ self.vectors[:len(self.ids)].T
+        rows = scores.argmax(axis=1)
+        return rows, scores[np.arange(len(queries)), rows]
+
+
+@dataclass
+class _Entry:
+    scope: str
+    row: int
+    chunks: tuple[str, ...]
+    stored_at: float
+
+
+class SemanticCache:
+    '''Per-scope vector indexes over stored replies, with global LRU and TTL eviction.'''
+    def __init__(
+        self,
+        embedder: Optional[HashedNgramEmbedder] = None,
+        max_entries: int = 2048,
+        ttl_seconds: float = 600.0,
+        max_history_messages: int = 2,
+        max_message_chars: int = 200,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        '''Configure the embedder, eviction limits and which turns qualify.'''
+        if np is None:
+            raise RuntimeError("The semantic cache requires NumPy (pip install numpy).")
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_history_messages = max_history_messages
+        self.max_message_chars = max_message_chars
+        self.clock = clock
+        self._indexes: dict[str, _ScopeIndex] = {}
+        # entry id -> entry, least recently used first
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        '''Share of lookups served from the cache so far.'''
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def eligible(self, messages: list[Message]) -> bool:
+        '''Whether a request is a short turn the cache may answer and store.'''
+        *context, last = messages
+        if last.role != MessageRole.USER or len(last.content) > self.max_message_chars:
+            return False
+        history = sum(1 for m in context if m.role != MessageRole.SYSTEM)
+        return history <= self.max_history_messages
+
+    def embed(self, text: str) -> "np.ndarray":
+        '''Embed one message as a (1, dim) query.'''
+        return self.embedder.embed([text])
+
+    def lookup(self, scope: str, query: "np.ndarray", threshold: float) -> tuple[Optional[tuple[str, ...]], float]:
+        '''Return (chunks, similarity) of the closest stored reply, or (None, similarity) on a miss.'''
+        index = self._indexes.get(scope)
+        if not index:
+            self.misses += 1
+            return None, 0.0
+        rows, scores = index.search(query)
+        row, similarity = int(rows[0]), float(scores[0])
+        entry_id = index.ids[row]
+        entry = self._entries[entry_id]
+        if self.clock() - entry.stored_at > self.ttl_seconds:
+            self._remove(entry_id)
+            self.misses += 1
+            return None, similarity
+        if similarity < threshold:
+            self.misses += 1
+            return None, similarity
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        return entry.chunks, similarity
+
+    def store(self, scope: str, query: "np.ndarray", chunks: tuple[str, ...]) -> None:
+        '''Store a completed reply under its question's vector, then evict beyond max_entries.'''
+        index = self._indexes.get(scope)
+        if index:
+            rows, scores = index.search(query)
+            if scores[0] >= _DUPLICATE_SIMILARITY:
+                self._remove(index.ids[int(rows[0])])
+        index = self._indexes.setdefault(scope, _ScopeIndex(self.embedder.dim))
+        entry_id = self._next_id
+        self._next_id += 1
+        row = index.add(entry_id, query[0])
+        self._entries[entry_id] = _Entry(scope=scope, row=row, chunks=chunks, stored_at=self.clock())
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        index = self._indexes[entry.scope]
+        moved = index.remove(entry.row)
+        if moved is not None:
+            self._entries[moved].row = entry.row
+        if not index:
+            del self._indexes[entry.scope]
+
+
+class SemanticCachingProvider(LLMProvider):
+    '''Wraps an LLMProvider with a near-duplicate response cache for short turns.'''
+    def __init__(
+        self,
+        inner: LLMProvider,
+        cache: SemanticCache,
+        threshold_for: Callable[[str], float],
+        replay_delay_seconds: float = 0.0,
+    ):
+        '''Wrap a provider with a cache, a per-persona similarity threshold and the replay pacing.'''
+        self.inner = inner
+        self.cache = cache
+        self.threshold_for = threshold_for
+        self.replay_delay_seconds = replay_delay_seconds
+
+    async def warm_up(self) -> None:
+        '''Warm up the wrapped provider.'''
+        await self.inner.warm_up()
+
+    async def aclose(self) -> None:
+        '''Close the wrapped provider.'''
+        await self.inner.aclose()
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        '''Replay the reply to a near-identical earlier question, or stream and store this one.'''
+        if not self.cache.eligible(messages):
+            async with aclosing(self.inner.stream(messages, llm_config)) as stream:
+                async for chunk in stream:
+                    yield chunk
+            return
+
+        persona_id = current_request().persona_id
+        scope = scope_key(messages[:-1], llm_config)
+        query = self.cache.embed(messages[-1].content)
+        cached, similarity = self.cache.lookup(scope, query, self.threshold_for(persona_id))
+        SEMANTIC_CACHE_SIMILARITY.observe(similarity, persona=persona_id)
+        SEMANTIC_CACHE_LOOKUPS.inc(persona=persona_id, result="hit" if cached is not None else "miss")
+        if cached is not None:
+            report_model("cache")
+            for chunk in cached:
+                yield chunk
+                if self.replay_delay_seconds:
+                    await asyncio.sleep(self.replay_delay_seconds)
+            return
+
+        chunks = []
+        async with aclosing(self.inner.stream(messages, llm_config)) as stream:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+
+        # Only complete streams reach this point — failures, disconnects and rejected replies are never cached
+        if chunks and reply_accepted():
+            self.cache.store(scope, query, tuple(chunks))
@@ -0,0 +1,92 @@
+'''
+SimulatedProvider — offline LLMProvider with realistic streaming timing.
+
+Used for load tests and local development without a Groq key. Timing
+is drawn from configurable distributions:
+- time-to-first-token: log-normal around ttft_seconds
+- steady generation at tokens_per_second, emitted in chunks of
+  chunk_tokens_min..chunk_tokens_max tokens
+- optional injected errors (before or mid-stream) and stalls
+Reply length follows the persona's max_tokens, scaled by
+reply_fraction, so personas keep their relative verbosity.
+'''
+import asyncio
+import math
+import random
+from typing import AsyncIterator, Optional
+from app.core.exceptions import LLMProviderError
+from app.core.request_context import report_model
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.interfaces.llm_provider import LLMProvider
+
+_WORDS = (
+    "the evidence is clear and the conclusion follows from a careful "
+    "observation of every detail you have shared with me so far"
+).split()
+
+
+class SimulatedProvider(LLMProvider):
+    '''Synthetic token stream with configurable latency, errors and stalls.'''
+    def __init__(
+        self,
+        ttft_seconds: float = 0.3,
+        ttft_sigma: float = 0.4,
+        tokens_per_second: float = 250.0,
+        chunk_tokens_min: int = 1,
+        chunk_tokens_max: int = 3,
+        reply_fraction: float = 0.6,
+        error_rate: float = 0.0,
+        stall_probability: float = 0.0,
+        stall_seconds: float = 2.0,
+        seed: Optional[int] = None,
+    ):
+        '''Configure the latency distribution, chunking, and fault injection.'''
+        self.ttft_seconds = ttft_seconds
+        self.ttft_sigma = ttft_sigma
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens_min = chunk_tokens_min
+        self.chunk_tokens_max = max(chunk_tokens_min, chunk_tokens_max)
+        self.reply_fraction = reply_fraction
+        self.error_rate = error_rate
+        self.stall_probability = stall_probability
+        self.stall_seconds = stall_seconds
+        self._random = random.Random(seed)
+
+    def _ttft(self) -> float:
+        if self.ttft_seconds <= 0:
+            return 0.0
+        # Log-normal with the configured median
+        return self._random.lognormvariate(math.log(self.ttft_seconds), self.ttft_sigma)
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        '''Emit a synthetic reply with simulated timing and faults.'''
+        rng = self._random
+        fail_at = -1
+        if rng.random() < self.error_rate:
+            # Half the injected errors hit before the first token, half mid-stream
+            fail_at = 0 if rng.random() < 0.5 else rng.randint(1, 20)
+
+        await asyncio.sleep(self._ttft())
+        if fail_at == 0:
+            raise LLMProviderError("Simulated upstream error before first token.", retryable=True)
+        report_model("simulated")
+
+        total = max(1, int(llm_config.max_tokens * self.reply_fraction))
+        emitted = 0
+        chunk_index = 0
+        while emitted < total:
+            count = min(total - emitted, rng.randint(self.chunk_tokens_min, self.chunk_tokens_max))
+            chunk_index += 1
+            if chunk_index == fail_at:
+                raise LLMProviderError("Simulated upstream error mid-stream.", retryable=True)
+            if rng.random() < self.stall_probability:
+                await asyncio.sleep(self.stall_seconds)
+            yield "".join(" " + _WORDS[(emitted + i) % len(_WORDS)] for i in range(count))
+            emitted += count
+            if self.tokens_per_second > 0:
+                await asyncio.sleep(count / self.tokens_per_second)
@@ -0,0 +1,70 @@
+'''
+SingleFlightProvider — LLMProvider decorator that coalesces identical
+in-flight requests onto one upstream stream.
+
+Requests are identified by the same digest the response cache uses
+(system prompt, history, normalized user message, PersonaLLMConfig).
+The first request starts a StreamBuffer pumping the upstream stream;
+identical requests arriving while it runs read the same buffer,
+replaying the chunks produced so far and then following the live
+tail. The upstream is cancelled only when the last reader goes away.
+Completed flights are dropped immediately — repeated prompts after
+completion are the response cache's job.
+'''
+from contextlib import aclosing
+from typing import AsyncIterator
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.llm.caching_provider import cache_key
+from app.infrastructure.stream_buffer import StreamBuffer
+
+
+class SingleFlightProvider(LLMProvider):
+    '''Shares one upstream stream between identical concurrent requests.'''
+    def __init__(self, inner: LLMProvider):
+        '''Wrap a provider with request coalescing.'''
+        self.inner = inner
+        self._flights: dict[str, StreamBuffer] = {}
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        '''Number of distinct upstream streams currently running.'''
+        return sum(1 for f in self._flights.values() if not f.done)
+
+    async def warm_up(self) -> None:
+        '''Warm up the wrapped provider.'''
+        await self.inner.warm_up()
+
+    async def aclose(self) -> None:
+        '''Cancel running flights and close the wrapped provider.'''
+        for flight in list(self._flights.values()):
+            flight.cancel()
+        await self.inner.aclose()
+
+    def _on_idle(self, flight: StreamBuffer) -> None:
+        '''Last reader left: cancel the upstream and forget the flight.'''
+        flight.cancel()
+        if self._flights.get(flight.id) is flight:
+            del self._flights[flight.id]
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        '''Join an identical in-flight stream, or start one and let others join it.'''
+        key = cache_key(messages, llm_config)
+        flight = self._flights.get(key)
+        if flight is None or flight.done:
+            flight = StreamBuffer(key)
+            flight.on_idle = self._on_idle
+            self._flights[key] = flight
+            flight.start(self.inner.stream(messages, llm_config=llm_config))
+        else:
+            self.coalesced += 1
+
+        async with aclosing(flight.read()) as chunks:
+            async for chunk in chunks:
+                yield chunk
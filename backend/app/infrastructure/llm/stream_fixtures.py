@@ -0,0 +1,136 @@
+'''
+Stream fixtures — recorded upstream streams for offline replay.
+
+A fixture captures one upstream completion: the chunk texts with their
+offsets (ms since the request was sent, so the first offset is the
+time-to-first-token), the PersonaLLMConfig, the model, the persona and
+the request's cache key. Each fixture is one compact JSON file, so a
+recording directory can be committed and replayed in CI. Files are
+written on a worker thread so recording never blocks the event loop.
+'''
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+from app.core.request_context import current_request
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.infrastructure.llm.caching_provider import cache_key
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class StreamFixture:
+    '''One recorded upstream stream.'''
+    model: str
+    persona_id: str
+    key: str
+    config: PersonaLLMConfig
+    chunks: tuple[tuple[float, str], ...]
+    complete: bool = True
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "version": FIXTURE_VERSION,
+                "model": self.model,
+                "persona": self.persona_id,
+                "key": self.key,
+                "config": asdict(self.config),
+                "complete": self.complete,
+                "chunks": [[round(offset, 1), text] for offset, text in self.chunks],
+            },
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "StreamFixture":
+        data = json.loads(raw)
+        if data.get("version") != FIXTURE_VERSION:
+            raise ValueError(f"Unsupported fixture version: {data.get('version')!r}")
+        return cls(
+            model=data["model"],
+            persona_id=data.get("persona", ""),
+            key=data["key"],
+            config=PersonaLLMConfig(**data["config"]),
+            chunks=tuple((float(offset), text) for offset, text in data["chunks"]),
+            complete=data.get("complete", True),
+        )
+
+
+def load_fixtures(directory: str | Path) -> list[StreamFixture]:
+    '''Load every *.json fixture in a directory, skipping unreadable files.'''
+    fixtures = []
+    for path in sorted(Path(directory).glob("*.json")):
+        try:
+            fixtures.append(StreamFixture.from_json(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning("Skipping stream fixture %s: %s", path.name, exc)
+    return fixtures
+
+
+@dataclass
+class StreamRecording:
+    '''An in-progress recording; offsets are measured from creation.'''
+    recorder: "StreamRecorder"
+    model: str
+    persona_id: str
+    key: str
+    config: PersonaLLMConfig
+    started: float = field(default_factory=time.perf_counter)
+    chunks: list[tuple[float, str]] = field(default_factory=list)
+    finished: bool = False
+
+    def add(self, text: str) -> None:
+        self.chunks.append(((time.perf_counter() - self.started) * 1000, text))
+
+    async def finish(self, complete: bool) -> Optional[Path]:
+        '''Write the fixture once; streams that produced nothing are dropped.'''
+        if self.finished or not self.chunks:
+            return None
+        self.finished = True
+        fixture = StreamFixture(
+            model=self.model,
+            persona_id=self.persona_id,
+            key=self.key,
+            config=self.config,
+            chunks=tuple(self.chunks),
+            complete=complete,
+        )
+        return await self.recorder.save(fixture)
+
+
+class StreamRecorder:
+    '''Writes StreamFixture files into a directory.'''
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def start(self, model: str, messages: list[Message], llm_config: PersonaLLMConfig) -> StreamRecording:
+        '''Begin recording a stream for the current request.'''
+        return StreamRecording(
+            recorder=self,
+            model=model,
+            persona_id=current_request().persona_id,
+            key=cache_key(messages, llm_config),
+            config=llm_config,
+        )
+
+    async def save(self, fixture: StreamFixture) -> Optional[Path]:
+        '''Persist a fixture; I/O failures are logged so recording never breaks a stream.'''
+        name = f"{fixture.persona_id or 'unknown'}-{uuid.uuid4().hex[:12]}.json"
+        path = self.directory / name
+        try:
+            await asyncio.to_thread(path.write_text, fixture.to_json(), encoding="utf-8")
+        except OSError as exc:
+            logger.warning("Could not write stream fixture %s: %s", path, exc)
+            return None
+        return path
@@ -0,0 +1,259 @@
+'''
+Usage metering — per-request token usage, persisted write-behind.
+
+Every upstream call produces one UsageRecord: who asked (client,
+persona), which model answered, the prompt and completion tokens Groq
+reported (or an estimate when the stream ended before its usage
+arrived), time-to-first-token, duration and outcome.
+
+UsageMeter.record() only appends to an in-memory list, so metering
+adds no I/O or waiting to the streaming path. A background task flushes
+the list in batches — every `flush_interval_seconds`, or as soon as
+`batch_size` records are pending — to SqliteUsageStore on a worker
+thread, off the event loop. While a flush is slow the list keeps
+filling; beyond `max_pending` records are dropped and counted, never
+waited for.
+
+Neither API keys nor client IPs are stored: a client is metered as a
+short digest of its identifier, keyed with a secret (METERING_CLIENT_KEY)
+so that the 2^32 IPv4 addresses cannot simply be hashed and matched.
+The key must stay the same across restarts and workers, or per-client
+aggregates split; without one, each process draws a random key.
+
+SqliteUsageStore keeps the records in a local SQLite database in WAL
+mode, so aggregate queries read alongside the writer.
+'''
+import asyncio
+import hashlib
+import logging
+import secrets
+import sqlite3
+import threading
+from dataclasses import astuple, dataclass, fields
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+from app.core.metrics import METERING_DROPPED, METERING_WRITTEN
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class UsageRecord:
+    '''Usage of one upstream call.'''
+    timestamp: float
+    client_id: str
+    persona_id: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    ttft_ms: Optional[float]
+    duration_ms: float
+    outcome: str
+    # True when the token counts are estimates (no usage reported by the upstream)
+    estimated: bool = False
+
+
+def client_key(secret: Optional[str]) -> bytes:
+    '''Digest key derived from a configured secret, or a random one for this process.'''
+    if not secret:
+        return secrets.token_bytes(32)
+    return hashlib.blake2b(secret.encode("utf-8"), digest_size=32).digest()
+
+
+def metered_client(client_id: str, key: bytes) -> str:
+    '''Client id as stored: "key:<api key>" becomes "key:<digest>", "ip:<address>" "ip:<digest>".'''
+    kind, sep, value = client_id.partition(":")
+    if not sep:
+        return client_id
+    return f"{kind}:" + hashlib.blake2b(value.encode("utf-8"), key=key, digest_size=6).hexdigest()
+
+
+_COLUMNS = tuple(f.name for f in fields(UsageRecord))
+
+# group_by name -> column; the only identifiers ever interpolated into SQL
+GROUP_COLUMNS = {"persona": "persona_id", "client": "client_id", "model": "model", "outcome": "outcome"}
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS usage (
+    timestamp REAL NOT NULL,
+    client_id TEXT NOT NULL,
+    persona_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    ttft_ms REAL,
+    duration_ms REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    estimated INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS usage_timestamp ON usage (timestamp);
+'''
+
+
+class SqliteUsageStore:
+    '''Usage records in a local SQLite database (WAL mode).'''
+    def __init__(self, path: str):
+        '''Open (creating if needed) the database and its schema.'''
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Written from worker threads, one batch at a time
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def write(self, records: Sequence[UsageRecord]) -> None:
+        '''Insert a batch in one transaction.'''
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO usage ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                (astuple(r) for r in records),
+            )
+
+    def aggregate(
+        self,
+        group_by: Iterable[str] = ("persona",),
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> list[dict]:
+        '''
+        Totals per group between `since` and `until` (epoch seconds): requests,
+        prompt/completion tokens, estimated records, errors and mean latencies.
+        Runs on its own connection, so it never waits for the writer.
+        '''
+        keys = list(dict.fromkeys(group_by))
+        columns = [GROUP_COLUMNS[key] for key in keys]
+        where, params = [], []
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("timestamp < ?")
+            params.append(until)
+        select = ", ".join(columns + [
+            "COUNT(*)",
+            "SUM(prompt_tokens)",
+            "SUM(completion_tokens)",
+            "SUM(estimated)",
+            "SUM(outcome = 'error')",
+            "AVG(ttft_ms)",
+            "AVG(duration_ms)",
+        ])
+        query = f"SELECT {select} FROM usage"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        if columns:
+            query += f" GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+        groups = []
+        for row in rows:
+            requests, prompt, completion, estimated, errors, ttft, duration = row[len(keys):]
+            if not requests:
+                continue
+            groups.append({
+                **dict(zip(keys, row)),
+                "requests": requests,
+                "prompt_tokens": prompt,
+                "completion_tokens": completion,
+                "total_tokens": prompt + completion,
+                "estimated_requests": estimated,
+                "errors": errors,
+                "avg_ttft_ms": round(ttft, 1) if ttft is not None else None,
+                "avg_duration_ms": round(duration, 1),
+            })
+        return groups
+
+    def close(self) -> None:
+        '''Close the writer connection.'''
+        with self._lock:
+            self._conn.close()
+
+
+class UsageMeter:
+    '''In-memory buffer of usage records, flushed to a store in batches off the event loop.'''
+    def __init__(
+        self,
+        store: SqliteUsageStore,
+        batch_size: int = 200,
+        flush_interval_seconds: float = 2.0,
+        max_pending: int = 10_000,
+        client_secret: Optional[str] = None,
+    ):
+        '''Configure the store, the batching / backpressure limits and the client digest secret.'''
+        self.store = store
+        self._client_key = client_key(client_secret)
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+        self._pending: list[UsageRecord] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+
+    def client(self, client_id: str) -> str:
+        '''Client id as stored, digested with this meter's key.'''
+        return metered_client(client_id, self._client_key)
+
+    @property
+    def pending(self) -> int:
+        '''Records buffered and not yet handed to the store.'''
+        return len(self._pending)
+
+    def record(self, record: UsageRecord) -> None:
+        '''Buffer one record. Never blocks: a full buffer drops the record and counts it.'''
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            METERING_DROPPED.inc(reason="backpressure")
+            return
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size and self._wake is not None:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        '''Write everything buffered so far on a worker thread; returns the records written.'''
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self.store.write, batch)
+        except Exception as e:
+            logger.warning("Dropping %d usage records after a failed write: %s", len(batch), e)
+            self.dropped += len(batch)
+            METERING_DROPPED.inc(len(batch), reason="write_failed")
+            return 0
+        self.written += len(batch)
+        METERING_WRITTEN.inc(len(batch))
+        return len(batch)
+
+    def start(self) -> None:
+        '''Start the background flusher (idempotent).'''
+        if self._task is None or self._task.done():
+            # Created here so the event belongs to the running loop
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        '''Stop the flusher and write what is still buffered.'''
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
@@ -0,0 +1,58 @@
+'''
+Persona loader — parses persona definition files into Persona entities.
+Definitions live as one YAML or JSON file per persona. YAML support
+requires PyYAML; JSON files always load.
+'''
+import json
+from pathlib import Path
+from app.domain.entities.persona import Persona, PersonaLLMConfig
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - JSON-only deployments
+    yaml = None
+
+# Bundled persona definitions shipped with the backend.
+DEFAULT_PERSONA_DIR = Path(__file__).resolve().parents[2] / "personas"
+
+PERSONA_FILE_SUFFIXES = (".yaml", ".yml", ".json")
+
+
+def load_persona_file(path: Path) -> Persona:
+    '''Parse a single persona file, raising ValueError on malformed content.'''
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        data = json.loads(text)
+    elif yaml is None:
+        raise ValueError(f"PyYAML is required to load '{path.name}'.")
+    else:
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in '{path.name}': {e}") from e
+
+    if not isinstance(data, dict):
+        raise ValueError(f"Persona file '{path.name}' must contain a mapping.")
+    try:
+        return Persona(
+            id=data["id"],
+            name=data["name"],
+            system_prompt=data["system_prompt"],
+            llm_config=PersonaLLMConfig(**data.get("llm_config", {})),
+            semantic_cache_threshold=data.get("semantic_cache_threshold"),
+        )
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Invalid persona file '{path.name}': {e}") from e
+
+
+def persona_files(directory: Path) -> list[Path]:
+    '''List persona definition files in a directory, sorted by name.'''
+    return sorted(
+        p for p in directory.iterdir()
+        if p.is_file() and p.suffix in PERSONA_FILE_SUFFIXES
+    )
+
+
+def load_persona_dir(directory: Path = DEFAULT_PERSONA_DIR) -> list[Persona]:
+    '''Load every persona definition in a directory.'''
+    return [load_persona_file(p) for p in persona_files(directory)]
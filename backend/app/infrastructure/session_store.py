@@ -0,0 +1,128 @@
+'''
+InMemorySessionStore — in-process implementation of SessionStore.
+Sessions are kept in an OrderedDict in least-recently-used order so
+eviction is O(1) from the front. Three limits bound memory use:
+- an idle TTL after which a session expires
+- a maximum number of live sessions
+- a global byte cap over all stored message content
+Each session is also capped to its most recent messages, trimmed so the
+kept history always starts with a user turn.
+'''
+import secrets
+import time
+from collections import OrderedDict
+from app.core.exceptions import SessionNotFoundError
+from app.domain.entities.message import Message
+from app.domain.entities.session import Session
+from app.domain.enums import MessageRole
+from app.domain.interfaces.session_store import SessionStore
+
+# Rough per-message bookkeeping cost on top of the UTF-8 content.
+_MESSAGE_OVERHEAD_BYTES = 64
+
+
+def _message_size(message: Message) -> int:
+    '''Approximate the memory cost of a stored message.'''
+    return len(message.content.encode("utf-8")) + _MESSAGE_OVERHEAD_BYTES
+
+
+class InMemorySessionStore(SessionStore):
+    '''LRU + TTL session store with a global memory cap.'''
+    def __init__(
+        self,
+        ttl_seconds: float = 1800.0,
+        max_sessions: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_messages: int = 100,
+    ):
+        '''Configure eviction limits for the store.'''
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        '''Approximate bytes held by all live sessions.'''
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, history: list[Message]) -> Session:
+        '''Start a new session seeded with the client-supplied history.'''
+        now = time.monotonic()
+        session = Session(
+            id=secrets.token_urlsafe(16),
+            created_at=now,
+            last_access=now,
+        )
+        self._sessions[session.id] = session
+        self._extend(session, history)
+        self._evict(now)
+        return session
+
+    def get(self, session_id: str) -> Session:
+        '''Retrieve a session and mark it as most recently used.'''
+        now = time.monotonic()
+        session = self._sessions.get(session_id)
+        if session is None or now - session.last_access > self.ttl_seconds:
+            if session is not None:
+                self._remove(session_id)
+            raise SessionNotFoundError(f"Session '{session_id}' not found or expired.")
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def append(self, session_id: str, messages: list[Message]) -> None:
+        '''Append turns to a session. Silently ignored if it was evicted meanwhile.'''
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+        now = time.monotonic()
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        self._extend(session, messages)
+        self._evict(now)
+
+    def delete(self, session_id: str) -> None:
+        '''Discard a session if present.'''
+        if session_id in self._sessions:
+            self._remove(session_id)
+
+    def _extend(self, session: Session, messages: list[Message]) -> None:
+        '''Add messages to a session, trimming its oldest turns past max_messages.'''
+        added = sum(_message_size(m) for m in messages)
+        session.messages.extend(messages)
+        session.size_bytes += added
+        self._total_bytes += added
+
+        overflow = len(session.messages) - self.max_messages
+        if overflow > 0:
+            # Drop whole turns: never leave a reply without the question it answers
+            while overflow < len(session.messages) and session.messages[overflow].role != MessageRole.USER:
+                overflow += 1
+            dropped = sum(_message_size(m) for m in session.messages[:overflow])
+            del session.messages[:overflow]
+            session.size_bytes -= dropped
+            self._total_bytes -= dropped
+
+    def _remove(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id)
+        self._total_bytes -= session.size_bytes
+
+    def _evict(self, now: float) -> None:
+        '''Drop expired sessions, then least-recently-used ones until under all caps.'''
+        # The most recently used session is always at the end and is never evicted here.
+        while len(self._sessions) > 1:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            expired = now - oldest.last_access > self.ttl_seconds
+            over_cap = (
+                len(self._sessions) > self.max_sessions
+                or self._total_bytes > self.max_bytes
+            )
+            if not (expired or over_cap):
+                break
+            self._remove(oldest_id)
@@ -0,0 +1,370 @@
+'''
+Host-wide shared state — rate limits, in-flight slots and a response
+cache shared by every worker process on one machine.
+
+Each structure lives in its own memory-mapped file (put them under
+/dev/shm so they never touch a disk). Python has no atomic operations
+on shared memory, so every read-modify-write is done under a POSIX
+byte-range lock (fcntl.lockf) covering only the records it touches:
+a token bucket's 8-slot group, a 4-entry cache group, or the small
+slot table. Locks are held for a few microseconds and never across an
+await. fcntl locks belong to the process, so a thread lock is taken as
+well for the sync dependencies FastAPI runs on its thread pool.
+
+A file is laid out on first open. A worker that finds a file written
+with a different layout (e.g. after a limit changed) replaces it with a
+fresh one, which only resets counters. Records are fixed-size and evicted in
+place, so the files never grow.
+
+Slot rows are owned by a process identified by pid and start time, so a
+reused pid never inherits a dead worker's slots, and a table left over
+from a previous run is cleared when the first worker opens it.
+
+Unix only: deps imports this module lazily, when SHARED_STATE_DIR is set.
+'''
+import fcntl
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+from app.core.exceptions import RateLimitedError
+from app.domain.interfaces.shared_state import RateLimiter, ResponseStore, SlotCounter
+
+_MAGIC = b"PSS1"
+# magic, structure kind, data size in bytes
+_HEADER = struct.Struct("<4s12sQ")
+_HEADER_SIZE = 64
+
+
+class MappedFile:
+    '''A fixed-size memory-mapped file with byte-range locking.'''
+    def __init__(self, path: str, kind: bytes, data_size: int):
+        '''Open (creating or re-initialising if needed) a file holding `data_size` bytes of records.'''
+        self.path = path
+        self.data_size = data_size
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._thread_lock = threading.Lock()
+        header = _HEADER.pack(_MAGIC, kind, data_size)
+        size = _HEADER_SIZE + data_size
+        # Layout checks and re-initialisation are serialised on a side lock file
+        lock_fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(lock_fd, fcntl.LOCK_EX)
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.pread(self._fd, _HEADER.size, 0) != header or os.fstat(self._fd).st_size != size:
+                # Swap in a fresh file rather than resizing this one under
+                # workers that still map it with the old layout
+                os.close(self._fd)
+                self._fd = self._create(path, header, size)
+        finally:
+            os.close(lock_fd)
+        self.buffer = mmap.mmap(self._fd, size)
+
+    @staticmethod
+    def _create(path: str, header: bytes, size: int) -> int:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.ftruncate(fd, size)
+        os.pwrite(fd, header, 0)
+        os.replace(tmp, path)
+        return fd
+
+    @contextmanager
+    def locked(self, offset: int, length: int) -> Iterator[mmap.mmap]:
+        '''Hold an exclusive lock on a record range; yields the whole mapping.'''
+        start = _HEADER_SIZE + offset
+        with self._thread_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, start)
+            try:
+                yield self.buffer
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, length, start)
+
+    def close(self) -> None:
+        '''Unmap and close the file; the shared data stays for other workers.'''
+        self.buffer.close()
+        os.close(self._fd)
+
+
+def _digest(key: str, size: int) -> bytes:
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=size).digest()
+
+
+# key hash (0 = empty), tokens, last refill (epoch seconds)
+_BUCKET = struct.Struct("<Qdd")
+_BUCKET_WAYS = 8
+
+
+class SharedTokenBucketLimiter(RateLimiter):
+    '''
+    Per-key token buckets shared by all workers. Keys hash to 8-way groups;
+    a new key takes an empty slot, else the group's least recently seen one.
+    '''
+    def __init__(
+        self,
+        path: str,
+        rate_per_second: float = 0.5,
+        burst: int = 10,
+        max_keys: int = 65_536,
+    ):
+        '''Configure refill rate, bucket capacity and the number of tracked clients.'''
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.groups = max(1, math.ceil(max_keys / _BUCKET_WAYS))
+        self._group_size = _BUCKET.size * _BUCKET_WAYS
+        self.file = MappedFile(path, b"buckets", self.groups * self._group_size)
+
+    def try_acquire(self, key: str, cost: float = 1.0) -> float:
+        '''Take tokens for a key. Returns 0.0 if allowed, otherwise seconds until it would be.'''
+        key_hash = int.from_bytes(_digest(key, 8), "little") or 1
+        group = key_hash % self.groups * self._group_size
+        with self.file.locked(group, self._group_size) as buffer:
+            start = _HEADER_SIZE + group
+            slots = list(_BUCKET.iter_unpack(buffer[start:start + self._group_size]))
+            now = time.time()
+            slot = next((i for i, (stored, _, _) in enumerate(slots) if stored == key_hash), None)
+            if slot is None:
+                # Take an empty slot, else evict the least recently seen key
+                slot = min(range(_BUCKET_WAYS), key=lambda i: (slots[i][0] != 0, slots[i][2]))
+                tokens, last = float(self.burst), now
+            else:
+                _, tokens, last = slots[slot]
+            # Wall clock, so every process agrees; a step backwards refills nothing
+            tokens = min(float(self.burst), tokens + max(0.0, now - last) * self.rate_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            _BUCKET.pack_into(buffer, start + slot * _BUCKET.size, key_hash, tokens, now)
+        return 0.0 if allowed else (cost - tokens) / self.rate_per_second
+
+    def check(self, key: str, cost: float = 1.0) -> None:
+        '''Take tokens for a key, raising RateLimitedError if the bucket is empty.'''
+        wait = self.try_acquire(key, cost)
+        if wait > 0:
+            raise RateLimitedError("Too many requests.", retry_after=max(1, math.ceil(wait)))
+
+    def close(self) -> None:
+        '''Release the mapping.'''
+        self.file.close()
+
+
+# Total slots held, then one row per worker: pid (0 = free), slots held, process start time
+_TOTAL = struct.Struct("<q")
+_WORKER = struct.Struct("<IiQ")
+
+
+class SharedSlotCounter(SlotCounter):
+    '''
+    A slot count shared by all workers. The total is one counter; each
+    worker also keeps its own share in a per-process row, so the slots of
+    a worker that died are reclaimed (when the cap is hit) instead of leaking.
+    Opening the table reclaims too, which clears one left by a previous run.
+    '''
+    def __init__(self, path: str, limit: int, max_workers: int = 128):
+        '''Allow up to `limit` slots to be held at once across at most `max_workers` processes.'''
+        self.limit = limit
+        self.max_workers = max_workers
+        self._table_size = _TOTAL.size + _WORKER.size * max_workers
+        self.file = MappedFile(path, b"slots", self._table_size)
+        self._pid: Optional[int] = None
+        self._started = 0
+        self._row_offset = 0
+        with self.file.locked(0, self._table_size) as buffer:
+            self._reclaim(buffer)
+
+    def _rows(self, buffer: mmap.mmap) -> Iterator[tuple[int, int, int, int]]:
+        start = _HEADER_SIZE + _TOTAL.size
+        rows = _WORKER.iter_unpack(buffer[start:start + _WORKER.size * self.max_workers])
+        for i, (pid, held, started) in enumerate(rows):
+            yield start + i * _WORKER.size, pid, held, started
+
+    def _reclaim(self, buffer: mmap.mmap) -> int:
+        '''Free the rows of processes that no longer exist; returns the total recounted from live rows.'''
+        total = 0
+        for offset, pid, held, started in self._rows(buffer):
+            if not pid:
+                continue
+            if _alive(pid, started):
+                total += held
+            else:
+                _WORKER.pack_into(buffer, offset, 0, 0, 0)
+        _TOTAL.pack_into(buffer, _HEADER_SIZE, total)
+        return total
+
+    def _own_row(self, buffer: mmap.mmap) -> Optional[int]:
+        '''Offset of this process's row, registering it on first use (and again after a fork).'''
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._row_offset
+        self._reclaim(buffer)
+        free = next((offset for offset, row_pid, _, _ in self._rows(buffer) if row_pid == 0), None)
+        if free is None:
+            return None
+        started = _start_time(pid)
+        _WORKER.pack_into(buffer, free, pid, 0, started)
+        self._pid, self._started, self._row_offset = pid, started, free
+        return free
+
+    @property
+    def value(self) -> int:
+        '''Slots currently held by all workers.'''
+        with self.file.locked(0, self._table_size) as buffer:
+            return _TOTAL.unpack_from(buffer, _HEADER_SIZE)[0]
+
+    def try_acquire(self) -> bool:
+        '''Take a slot if fewer than `limit` are held across workers.'''
+        with self.file.locked(0, self._table_size) as buffer:
+            (total,) = _TOTAL.unpack_from(buffer, _HEADER_SIZE)
+            if total >= self.limit:
+                total = self._reclaim(buffer)
+                if total >= self.limit:
+                    return False
+            row = self._own_row(buffer)
+            if row is None:
+                # More live processes than rows: refuse rather than miscount
+                return False
+            (total,) = _TOTAL.unpack_from(buffer, _HEADER_SIZE)
+            pid, held, started = _WORKER.unpack_from(buffer, row)
+            _WORKER.pack_into(buffer, row, pid, held + 1, started)
+            _TOTAL.pack_into(buffer, _HEADER_SIZE, total + 1)
+            return True
+
+    def release(self) -> None:
+        '''Return a slot taken by this process.'''
+        if self._pid != os.getpid():
+            return
+        with self.file.locked(0, self._table_size) as buffer:
+            pid, held, started = _WORKER.unpack_from(buffer, self._row_offset)
+            if pid != self._pid or started != self._started or held <= 0:
+                return
+            (total,) = _TOTAL.unpack_from(buffer, _HEADER_SIZE)
+            _WORKER.pack_into(buffer, self._row_offset, pid, held - 1, started)
+            _TOTAL.pack_into(buffer, _HEADER_SIZE, max(0, total - 1))
+
+    def close(self) -> None:
+        '''Release the mapping.'''
+        self.file.close()
+
+
+def _start_time(pid: int) -> int:
+    '''Start time of a process in clock ticks since boot, or 0 where /proc is unavailable.'''
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as stat:
+            # Fields after the parenthesised command name; starttime is field 22
+            return int(stat.read().rsplit(b")", 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _alive(pid: int, started: int) -> bool:
+    '''Whether the process that wrote a row still runs, rather than another one reusing its pid.'''
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return not started or _start_time(pid) in (0, started)
+
+
+# key digest (zeros = empty), stored_at, used_at (epoch seconds), payload length
+_ENTRY = struct.Struct("<16sddI")
+_EMPTY = bytes(16)
+_CACHE_WAYS = 4
+
+
+class SharedResponseCache(ResponseStore):
+    '''
+    Completed chunk sequences shared by all workers, in fixed-size entries.
+    Keys hash to 4-way groups and the least recently used entry of a full
+    group is replaced; responses larger than an entry are not cached.
+    '''
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 600.0,
+        max_entries: int = 1024,
+        entry_bytes: int = 8192,
+    ):
+        '''Configure the TTL, the number of entries and the size of each.'''
+        self.ttl_seconds = ttl_seconds
+        self.entry_bytes = entry_bytes
+        self.max_payload = entry_bytes - _ENTRY.size
+        self.groups = max(1, math.ceil(max_entries / _CACHE_WAYS))
+        self._group_size = entry_bytes * _CACHE_WAYS
+        self.file = MappedFile(path, b"responses", self.groups * self._group_size)
+        # Counted per worker
+        self.hits = 0
+        self.misses = 0
+
+    def _locate(self, key: str) -> tuple[bytes, int]:
+        digest = _digest(key, 16)
+        return digest, int.from_bytes(digest[:8], "little") % self.groups * self._group_size
+
+    def _entries(self, buffer: mmap.mmap, group: int) -> Iterator[tuple[int, tuple]]:
+        for way in range(_CACHE_WAYS):
+            offset = _HEADER_SIZE + group + way * self.entry_bytes
+            yield offset, _ENTRY.unpack_from(buffer, offset)
+
+    def get(self, key: str) -> Optional[tuple[str, ...]]:
+        '''Return the cached chunks for a key, or None on a miss or expiry.'''
+        digest, group = self._locate(key)
+        payload = None
+        with self.file.locked(group, self._group_size) as buffer:
+            now = time.time()
+            for offset, (stored, stored_at, _, length) in self._entries(buffer, group):
+                if stored != digest:
+                    continue
+                if now - stored_at > self.ttl_seconds:
+                    _ENTRY.pack_into(buffer, offset, _EMPTY, 0.0, 0.0, 0)
+                    break
+                _ENTRY.pack_into(buffer, offset, digest, stored_at, now, length)
+                start = offset + _ENTRY.size
+                payload = bytes(buffer[start:start + length])
+                break
+        chunks = None
+        if payload is not None:
+            try:
+                chunks = tuple(json.loads(payload))
+            except (UnicodeDecodeError, ValueError):
+                # A torn or foreign entry is a miss, never an error on the request path
+                chunks = None
+        if chunks is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return chunks
+
+    def put(self, key: str, chunks: tuple[str, ...]) -> None:
+        '''Store a completed chunk sequence. Responses larger than an entry are not cached.'''
+        payload = json.dumps(list(chunks), ensure_ascii=False).encode("utf-8")
+        if len(payload) > self.max_payload:
+            return
+        digest, group = self._locate(key)
+        with self.file.locked(group, self._group_size) as buffer:
+            target = None
+            for offset, (stored, _, used_at, _) in self._entries(buffer, group):
+                if stored == digest or stored == _EMPTY:
+                    target = (-1.0, offset)
+                    break
+                if target is None or used_at < target[0]:
+                    target = (used_at, offset)
+            offset = target[1]
+            now = time.time()
+            start = offset + _ENTRY.size
+            # Clear the header first: a worker dying mid-write leaves an empty
+            # entry, never the old header over a half-written payload
+            _ENTRY.pack_into(buffer, offset, _EMPTY, 0.0, 0.0, 0)
+            buffer[start:start + len(payload)] = payload
+            _ENTRY.pack_into(buffer, offset, digest, now, now, len(payload))
+
+    def close(self) -> None:
+        '''Release the mapping.'''
+        self.file.close()
@@ -0,0 +1,226 @@
+'''
+Stream buffers — decouple an upstream generation from its readers.
+
+A StreamBuffer runs a background pump that reads a chunk iterator into
+a bounded ring buffer. Any number of readers can follow it from any
+offset still retained: a reader first replays the buffered chunks and
+then follows the live tail. When the last reader leaves, the owner is
+notified through on_idle so it can decide whether to cancel.
+
+StreamRegistry keeps buffers addressable by stream ID so that a client
+whose connection dropped can resume with Last-Event-ID. A buffer records
+the client that started it, and only that client can resume it. Completed
+buffers are kept for a short TTL; a global byte cap evicts the oldest
+completed buffers first. Idle buffers that are still generating are
+cancelled after a grace period if nobody reconnects; a cancelled buffer
+can no longer be resumed.
+'''
+import asyncio
+import secrets
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Callable, Optional
+from app.core.exceptions import StreamNotFoundError
+
+# Rough per-chunk bookkeeping cost on top of the UTF-8 content.
+_CHUNK_OVERHEAD_BYTES = 56
+
+# With no resume grace period, how long a new buffer waits for its first
+# reader (a response normally subscribes within milliseconds)
+_FIRST_READER_SECONDS = 1.0
+
+
+class StreamBuffer:
+    '''Chunks from one background generation, readable from any retained offset.'''
+    def __init__(
+        self,
+        stream_id: str = "",
+        max_chunks: Optional[int] = None,
+        persona_id: str = "",
+        client_id: str = "",
+    ):
+        '''Create an empty buffer; max_chunks bounds the ring (None = unbounded).'''
+        self.id = stream_id
+        self.persona_id = persona_id
+        self.client_id = client_id
+        self._chunks: deque[str] = deque(maxlen=max_chunks)
+        self.base_offset = 0
+        self.done = False
+        self.cancelled = False
+        self.error: Optional[BaseException] = None
+        self.finished_at: Optional[float] = None
+        self.size_bytes = 0
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.on_idle: Optional[Callable[["StreamBuffer"], None]] = None
+        self._changed = asyncio.Event()
+        self._started = False
+
+    @property
+    def end_offset(self) -> int:
+        '''Offset one past the newest chunk.'''
+        return self.base_offset + len(self._chunks)
+
+    def start(self, source: AsyncIterator[str]) -> None:
+        '''Start pumping the source in a background task.'''
+        self.task = asyncio.create_task(self._pump(source))
+
+    def cancel(self) -> None:
+        '''Stop the background pump if it is still running.'''
+        if self.task is None or self.done:
+            return
+        if not self._started:
+            # A task cancelled before its first step never runs the pump's
+            # cleanup (or the source's): cancel once it is running instead
+            asyncio.get_running_loop().call_soon(self.cancel)
+            return
+        self.task.cancel()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _append(self, chunk: str) -> None:
+        if self._chunks.maxlen is not None and len(self._chunks) == self._chunks.maxlen:
+            dropped = self._chunks[0]
+            self.base_offset += 1
+            self.size_bytes -= len(dropped.encode("utf-8")) + _CHUNK_OVERHEAD_BYTES
+        self._chunks.append(chunk)
+        self.size_bytes += len(chunk.encode("utf-8")) + _CHUNK_OVERHEAD_BYTES
+        self._notify()
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        self._started = True
+        try:
+            async for chunk in source:
+                self._append(chunk)
+        except asyncio.CancelledError:
+            # Readers get an ordinary error, not a cancellation of their own task
+            self.cancelled = True
+            self.error = StreamNotFoundError(f"Stream '{self.id}' was cancelled before it finished.")
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._notify()
+            await source.aclose()
+
+    async def read(self, offset: int = 0) -> AsyncIterator[str]:
+        '''
+        Yield chunks from `offset`, then follow the live tail until the pump ends.
+        Re-raises the pump's error. Raises StreamNotFoundError if the offset has
+        already been dropped from the ring.
+        '''
+        if offset < self.base_offset:
+            raise StreamNotFoundError(f"Stream '{self.id}' no longer holds offset {offset}.")
+        self.subscribers += 1
+        position = offset
+        try:
+            while True:
+                while position < self.end_offset:
+                    if position < self.base_offset:
+                        raise StreamNotFoundError(f"Reader of stream '{self.id}' fell behind the buffer.")
+                    yield self._chunks[position - self.base_offset]
+                    position += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and self.on_idle is not None:
+                self.on_idle(self)
+
+
+class StreamRegistry:
+    '''Resumable stream buffers addressable by ID, with TTL and memory cap.'''
+    def __init__(
+        self,
+        max_chunks: int = 4096,
+        ttl_seconds: float = 60.0,
+        max_bytes: int = 32 * 1024 * 1024,
+        resume_grace_seconds: float = 15.0,
+    ):
+        '''Configure ring size, retention, memory cap and the reconnect grace period.'''
+        self.max_chunks = max_chunks
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.resume_grace_seconds = resume_grace_seconds
+        self._buffers: OrderedDict[str, StreamBuffer] = OrderedDict()
+        self._idle_timers: dict[str, asyncio.TimerHandle] = {}
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    @property
+    def total_bytes(self) -> int:
+        '''Approximate bytes held by all buffers.'''
+        return sum(b.size_bytes for b in self._buffers.values())
+
+    def create(self, source: AsyncIterator[str], persona_id: str = "", client_id: str = "") -> StreamBuffer:
+        '''Register a new buffer owned by client_id and start generating into it.'''
+        self._evict()
+        buffer = StreamBuffer(
+            secrets.token_urlsafe(12), max_chunks=self.max_chunks, persona_id=persona_id, client_id=client_id,
+        )
+        buffer.on_idle = self._on_idle
+        self._buffers[buffer.id] = buffer
+        buffer.start(source)
+        # Until a reader subscribes the buffer counts as idle, so a client that
+        # vanishes before the response starts still gets the upstream cancelled.
+        first_reader = self.resume_grace_seconds if self.resume_grace_seconds > 0 else _FIRST_READER_SECONDS
+        self._arm_idle_timer(buffer, first_reader)
+        return buffer
+
+    def get(self, stream_id: str, client_id: Optional[str] = None) -> StreamBuffer:
+        '''
+        Look up a buffer for resumption, raising StreamNotFoundError if gone —
+        or, when client_id is given, owned by another client (indistinguishable
+        from unknown, so stream IDs cannot be probed).
+        '''
+        self._evict()
+        buffer = self._buffers.get(stream_id)
+        if buffer is None or buffer.cancelled or (client_id is not None and buffer.client_id != client_id):
+            raise StreamNotFoundError(f"Stream '{stream_id}' not found or expired.")
+        timer = self._idle_timers.pop(stream_id, None)
+        if timer is not None:
+            timer.cancel()
+        return buffer
+
+    def _on_idle(self, buffer: StreamBuffer) -> None:
+        '''Give a disconnected reader a grace period to resume before cancelling.'''
+        if buffer.done:
+            return
+        if self.resume_grace_seconds <= 0:
+            buffer.cancel()
+            return
+        self._arm_idle_timer(buffer, self.resume_grace_seconds)
+
+    def _arm_idle_timer(self, buffer: StreamBuffer, delay: float) -> None:
+        previous = self._idle_timers.pop(buffer.id, None)
+        if previous is not None:
+            previous.cancel()
+        self._idle_timers[buffer.id] = asyncio.get_running_loop().call_later(delay, self._expire_idle, buffer)
+
+    def _expire_idle(self, buffer: StreamBuffer) -> None:
+        self._idle_timers.pop(buffer.id, None)
+        if buffer.subscribers == 0:
+            buffer.cancel()
+
+    def _evict(self) -> None:
+        '''Drop expired completed buffers, then the oldest completed ones over the byte cap.'''
+        now = time.monotonic()
+        for stream_id, buffer in list(self._buffers.items()):
+            if buffer.done and now - buffer.finished_at > self.ttl_seconds:
+                del self._buffers[stream_id]
+
+        total = self.total_bytes
+        for stream_id, buffer in list(self._buffers.items()):
+            if total <= self.max_bytes:
+                break
+            if buffer.done and buffer.subscribers == 0:
+                total -= buffer.size_bytes
+                del self._buffers[stream_id]
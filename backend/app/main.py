@@ -2,27 +2,114 @@
 Application factory — creates and configures the FastAPI app.
 
 Responsibilities:
+- Lifespan hooks (persona precompile and upstream warm-up, pool shutdown)
 - CORS middleware setup
 - Route registration
-- Global exception handlers
-- Health check endpoint
+- Global exception handlers (errors are counted by ErrorCode)
+- Health (liveness), readiness and Prometheus /metrics endpoints
+- Starting and draining the usage meter, when metering is enabled
+
+By default warm-up runs in the background so the server accepts
+connections immediately after a cold start; /ready turns green once
+personas are precompiled and upstream connections are warm.
 '''
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.v1.routes import chat
+from app.api.deps import (
+    get_circuit_breaker,
+    get_health_probe,
+    get_http_client,
+    get_llm_provider,
+    get_persona_registry,
+    get_usage_meter,
+)
+from app.api.middleware import RequestTimingMiddleware
+from app.api.v1.routes import chat, chat_ws, usage
 from app.core.config import get_settings
-from app.core.exceptions import PersonaNotFoundError, LLMProviderError
+from app.core.metrics import ERRORS, REGISTRY
+from app.core.request_context import current_request
+from app.core.tracing import configure_tracing
+from app.core.exceptions import (
+    AdminKeyRequiredError,
+    CircuitOpenError,
+    PersonaNotFoundError,
+    SessionNotFoundError,
+    StreamNotFoundError,
+    LLMProviderError,
+    RateLimitedError,
+    ServiceOverloadedError,
+)
 from app.core.enums import ErrorCode
 
+logger = logging.getLogger(__name__)
+
+
+def _error_response(status_code: int, message: str, code: ErrorCode, headers: dict | None = None) -> JSONResponse:
+    '''Build the standard error body and count the error for /metrics.'''
+    ERRORS.inc(persona=current_request().persona_id, code=code)
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": message, "code": code},
+        headers=headers,
+    )
+
+async def warm_up(app: FastAPI) -> None:
+    '''Precompile every persona's system prompt and pre-connect upstream, then mark the app ready.'''
+    try:
+        for persona in get_persona_registry().all():
+            persona.system_message
+        await get_llm_provider().warm_up()
+    except Exception:
+        # Stay not-ready so the orchestrator keeps traffic away and restarts us
+        logger.exception("Startup warm-up failed")
+        return
+    app.state.ready = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    '''Warm up (in the background by default) and close upstream resources on shutdown.'''
+    app.state.ready = False
+    probe = get_health_probe()
+    if probe is not None:
+        probe.start()
+    meter = get_usage_meter()
+    if meter is not None:
+        meter.start()
+    if get_settings().warmup_in_background:
+        task = asyncio.create_task(warm_up(app))
+    else:
+        task = None
+        await warm_up(app)
+    yield
+    # Draining: stop advertising readiness while shutting down
+    app.state.ready = False
+    if probe is not None:
+        await probe.stop()
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    await get_llm_provider().aclose()
+    if meter is not None:
+        # After the provider closed, so the last streams' usage is written too
+        await meter.stop()
+    # Only close the pool if a Groq provider ever created it
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+
 def create_app() -> FastAPI:
     '''Initialize and configure the FastAPI application instance.'''
     settings = get_settings()
+    configure_tracing(settings.tracing_enabled)
     app = FastAPI(
         title="Persona AI", 
         description="Clean Architecture Refactor of Persona AI Backend",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan,
     )
 
     # Middleware
@@ -32,38 +119,81 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[chat.SESSION_HEADER, chat.STREAM_HEADER, "Retry-After"],
     )
+    app.add_middleware(RequestTimingMiddleware)
 
     # Routers
     app.include_router(chat.router, prefix="/api/v1")
+    app.include_router(chat_ws.router, prefix="/api/v1")
+    if settings.metering_db_path:
+        app.include_router(usage.router, prefix="/api/v1")
 
     # Exception Handlers
     @app.exception_handler(PersonaNotFoundError)
     async def persona_not_found_handler(request: Request, exc: PersonaNotFoundError):
-        return JSONResponse(
-            status_code=404,
-            content={"error": str(exc), "code": exc.code},
+        return _error_response(404, str(exc), exc.code)
+
+    @app.exception_handler(SessionNotFoundError)
+    @app.exception_handler(StreamNotFoundError)
+    async def session_not_found_handler(request: Request, exc: SessionNotFoundError | StreamNotFoundError):
+        return _error_response(404, str(exc), exc.code)
+
+    @app.exception_handler(AdminKeyRequiredError)
+    async def admin_key_required_handler(request: Request, exc: AdminKeyRequiredError):
+        return _error_response(403, str(exc), exc.code)
+
+    @app.exception_handler(RateLimitedError)
+    @app.exception_handler(ServiceOverloadedError)
+    async def too_many_requests_handler(request: Request, exc: RateLimitedError | ServiceOverloadedError):
+        return _error_response(429, str(exc), exc.code, headers={"Retry-After": str(exc.retry_after)})
+
+    @app.exception_handler(CircuitOpenError)
+    async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+        return _error_response(
+            503, "The AI service is temporarily unavailable.", exc.code,
+            headers={"Retry-After": str(exc.retry_after)},
         )
 
     @app.exception_handler(LLMProviderError)
     async def llm_provider_error_handler(request: Request, exc: LLMProviderError):
-        return JSONResponse(
-            status_code=503,
-            content={"error": "The AI service is temporarily unavailable.", "code": exc.code},
-        )
+        logger.warning("LLM provider error on %s: %s", request.url.path, exc)
+        return _error_response(503, "The AI service is temporarily unavailable.", exc.code)
 
     @app.exception_handler(Exception)
     async def global_exception_handler(request: Request, exc: Exception):
-        # In production, you'd log the stack trace here
-        return JSONResponse(
-            status_code=500,
-            content={"error": "An internal server error occurred.", "code": ErrorCode.INTERNAL_ERROR},
-        )
+        logger.exception("Unhandled error on %s %s", request.method, request.url.path, exc_info=exc)
+        return _error_response(500, "An internal server error occurred.", ErrorCode.INTERNAL_ERROR)
 
     @app.get("/health")
     async def health():
-        '''Basic health check endpoint to verify service availability.'''
-        return {"status": "ok", "version": "1.0.0"}
+        '''
+        Liveness plus cached upstream state: the circuit breaker state and the
+        last background probe result. Never calls the upstream itself.
+        '''
+        body = {"status": "ok", "version": "1.0.0"}
+        breaker = get_circuit_breaker()
+        probe = get_health_probe()
+        if breaker is not None:
+            body["circuit"] = breaker.state
+        if probe is not None:
+            body["upstream"] = probe.snapshot()
+        if body.get("circuit", "closed") != "closed" or (probe is not None and probe.status == "down"):
+            body["status"] = "degraded"
+        return body
+
+    @app.get("/ready")
+    async def ready(request: Request):
+        '''Readiness: 200 once personas are precompiled and upstream warm-up finished, else 503.'''
+        if getattr(request.app.state, "ready", False):
+            return {"status": "ready"}
+        return JSONResponse(status_code=503, content={"status": "starting"})
+
+    if settings.metrics_enabled:
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics():
+            '''Prometheus text exposition of every registered instrument.'''
+            return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
     return app
 
@@ -1,16 +1,35 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Literal, List, Optional
 
-from app.domain.enums import MessageRole, PersonaID
+from app.domain.enums import MessageRole
 
 class HistoryItem(BaseModel):
     role: MessageRole
     content: str
 
 class ChatRequest(BaseModel):
-    character: PersonaID
+    # Plain string so personas added as files are accepted without a deploy;
+    # unknown IDs surface as PERSONA_NOT_FOUND from the repository.
+    character: str
     message: str
     history: List[HistoryItem] = []
+    # When set, history is loaded server-side and the request history is ignored.
+    session_id: Optional[str] = None
+
+class PanelRequest(BaseModel):
+    # Personas answering together; duplicates are ignored
+    characters: List[str] = Field(min_length=1, max_length=5)
+    message: str
+    history: List[HistoryItem] = []
+
+class ChatTurnFrame(BaseModel):
+    # One turn over the WebSocket transport; character defaults to the previous turn's,
+    # and history only seeds the connection's session on its first turn.
+    type: Literal["chat"]
+    character: Optional[str] = None
+    message: str
+    history: List[HistoryItem] = []
+    session_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     content: str
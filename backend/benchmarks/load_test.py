@@ -0,0 +1,259 @@
+'''
+Load test — drive concurrent streaming chats and report latency and throughput.
+
+By default a local uvicorn server is started with the simulated LLM provider,
+so runs are reproducible and cost no upstream quota. --replay-dir serves
+recorded Groq streams instead (see LLM_RECORD_DIR), keeping each persona's
+real chunk sizes and timing. Point --url at a running server to measure it
+instead (CPU per stream is then not reported).
+
+Reports requests/sec, time-to-first-token and inter-event latency
+percentiles (p50/p95/p99), error counts, and server CPU seconds per stream.
+Gaps are timed between received SSE token events, each of which may carry
+several coalesced tokens, so they are not per-token pacing.
+Results are written as JSON under benchmarks/results/ so runs can be
+compared with --compare.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --concurrency 50 --requests 500
+    python -m benchmarks.load_test --label after --compare benchmarks/results/before.json
+    python -m benchmarks.load_test --replay-dir fixtures/streams --replay-time-scale 0.5
+'''
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+RESULTS_DIR = Path(__file__).parent / "results"
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class StreamResult:
+    '''Timing of one streamed chat request, relative to its start.'''
+    ttft: Optional[float] = None
+    gaps: list[float] = field(default_factory=list)
+    events: int = 0
+    error: Optional[str] = None
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    '''Nearest-rank percentile, or None for an empty sample.'''
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cpu_seconds(pid: int) -> Optional[float]:
+    '''User + system CPU time of a process, from /proc (Linux only).'''
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    ticks = int(fields[11]) + int(fields[12])
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+
+async def _one_request(client: httpx.AsyncClient, url: str, body: dict) -> StreamResult:
+    result = StreamResult()
+    start = time.perf_counter()
+    last = start
+    event = None
+    try:
+        async with client.stream("POST", url, json=body) as response:
+            if response.status_code != 200:
+                await response.aread()
+                result.error = f"http_{response.status_code}"
+                return result
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:") and event == "token":
+                    now = time.perf_counter()
+                    if result.ttft is None:
+                        result.ttft = now - start
+                    else:
+                        result.gaps.append(now - last)
+                    last = now
+                    result.events += 1
+                elif line.startswith("data:") and event == "error":
+                    result.error = json.loads(line[5:]).get("code", "stream_error")
+    except httpx.HTTPError as exc:
+        result.error = type(exc).__name__
+    return result
+
+
+async def run_load(base_url: str, args: argparse.Namespace) -> tuple[list[StreamResult], float]:
+    '''Issue args.requests chats with at most args.concurrency in flight.'''
+    url = f"{base_url}/api/v1/chat"
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        async def worker(index: int) -> StreamResult:
+            # Distinct messages by default so caching and coalescing don't hide load
+            message = args.message if args.same_message else f"{args.message} (#{index})"
+            body = {"character": args.persona, "message": message, "history": []}
+            async with semaphore:
+                return await _one_request(client, url, body)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(worker(i) for i in range(args.requests)))
+        return list(results), time.perf_counter() - start
+
+
+def summarize(results: list[StreamResult], elapsed: float, cpu_seconds: Optional[float]) -> dict:
+    '''Aggregate per-stream timings into the report written to disk.'''
+    ok = [r for r in results if r.error is None]
+    ttfts = [r.ttft for r in ok if r.ttft is not None]
+    gaps = [gap for r in ok for gap in r.gaps]
+    errors: dict[str, int] = {}
+    for r in results:
+        if r.error is not None:
+            errors[r.error] = errors.get(r.error, 0) + 1
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "requests": len(results),
+        "succeeded": len(ok),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(len(results) / elapsed, 2) if elapsed else None,
+        "ttft_ms": {f"p{p}": ms(percentile(ttfts, p)) for p in (50, 95, 99)},
+        "inter_event_ms": {f"p{p}": ms(percentile(gaps, p)) for p in (50, 95, 99)},
+        "mean_events_per_stream": round(statistics.fmean(r.events for r in ok), 1) if ok else None,
+        "server_cpu_ms_per_stream": ms(cpu_seconds / len(results)) if cpu_seconds is not None and results else None,
+    }
+
+
+def start_server(args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+    '''Start uvicorn with the simulated or replay provider and wait for /health.'''
+    port = _free_port()
+    if args.replay_dir:
+        provider_env = {
+            "LLM_PROVIDER": "replay",
+            "REPLAY_FIXTURE_DIR": str(Path(args.replay_dir).resolve()),
+            "REPLAY_TIME_SCALE": str(args.replay_time_scale),
+        }
+    else:
+        provider_env = {
+            "LLM_PROVIDER": "simulated",
+            "SIM_TTFT_SECONDS": str(args.sim_ttft),
+            "SIM_TOKENS_PER_SECOND": str(args.sim_tps),
+            "SIM_ERROR_RATE": str(args.sim_error_rate),
+        }
+    env = {
+        **os.environ,
+        **provider_env,
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "load-test"),
+        "RATE_LIMIT_ENABLED": "false",
+        "ADMISSION_MAX_IN_FLIGHT": str(max(args.concurrency, 64)),
+        "ADMISSION_MAX_QUEUE": str(max(args.concurrency, 128)),
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/health", timeout=1.0)
+            return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not become healthy within 30s")
+
+
+def print_comparison(report: dict, baseline_path: Path) -> None:
+    '''Print key metrics next to a previous run's values.'''
+    baseline = json.loads(baseline_path.read_text())
+    rows = [
+        ("requests_per_second",),
+        ("ttft_ms", "p50"), ("ttft_ms", "p95"), ("ttft_ms", "p99"),
+        ("inter_event_ms", "p50"), ("inter_event_ms", "p95"), ("inter_event_ms", "p99"),
+        ("server_cpu_ms_per_stream",),
+    ]
+    print(f"\n{'metric':<28}{'baseline':>12}{'current':>12}")
+    for path in rows:
+        old, new = baseline, report
+        for key in path:
+            old = old.get(key) if isinstance(old, dict) else None
+            new = new.get(key) if isinstance(new, dict) else None
+        print(f"{'.'.join(path):<28}{str(old):>12}{str(new):>12}")
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--persona", default="sherlock")
+    parser.add_argument("--message", default="What do you deduce about me?")
+    parser.add_argument("--same-message", action="store_true", help="Send identical messages (exercises caching/coalescing)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--sim-ttft", type=float, default=0.3)
+    parser.add_argument("--sim-tps", type=float, default=250.0)
+    parser.add_argument("--sim-error-rate", type=float, default=0.0)
+    parser.add_argument("--replay-dir", help="Replay recorded stream fixtures instead of simulating")
+    parser.add_argument("--replay-time-scale", type=float, default=1.0)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--compare", type=Path, help="Previous results JSON to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = parse_args(argv)
+    process = None
+    base_url = args.url
+    if base_url is None:
+        process, base_url = start_server(args)
+    try:
+        cpu_before = _cpu_seconds(process.pid) if process else None
+        results, elapsed = asyncio.run(run_load(base_url, args))
+        cpu_after = _cpu_seconds(process.pid) if process else None
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    report = {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        **summarize(results, elapsed, cpu),
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out = RESULTS_DIR / f"{args.label}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    print(f"\nSaved to {out}")
+    if args.compare:
+        print_comparison(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+'''
+Message pipeline micro-benchmark — request body to provider payload.
+
+Compares the previous ingestion path (FastAPI JSON parse + ChatRequest
+validation, HistoryItem -> Message conversion, role filtering, payload
+dicts) with the one-pass decoder in app.api.ingest, at several history
+lengths. Both paths end with the list of dicts handed to the provider.
+
+Usage (from backend/):
+    python -m benchmarks.message_pipeline
+    python -m benchmarks.message_pipeline --lengths 0 10 100 1000 --repeat 500
+'''
+import argparse
+import json
+import os
+import timeit
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from app.api.ingest import decode_chat_request  # noqa: E402
+from app.domain.entities.message import Message  # noqa: E402
+from app.domain.enums import MessageRole  # noqa: E402
+from app.schemas.chat import ChatRequest  # noqa: E402
+
+_ROLES = (MessageRole.USER, MessageRole.ASSISTANT)
+
+
+def make_body(turns: int) -> bytes:
+    '''A chat request with `turns` alternating user/assistant history items.'''
+    history = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Turn {i}: " + "words of history " * 12}
+        for i in range(turns)
+    ]
+    return json.dumps({"character": "sherlock", "message": "And now?", "history": history}).encode()
+
+
+def legacy_path(raw: bytes) -> list[dict]:
+    request = ChatRequest.model_validate(json.loads(raw))
+    history = [Message(role=item.role, content=item.content) for item in request.history]
+    clean = [m for m in history if m.role in _ROLES]
+    return [m.payload for m in clean]
+
+
+def one_pass(raw: bytes) -> list[dict]:
+    return [m.payload for m in decode_chat_request(raw).history]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[0, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'turns':>6}{'legacy µs':>12}{'one-pass µs':>14}{'speedup':>10}")
+    for turns in args.lengths:
+        raw = make_body(turns)
+        assert legacy_path(raw) == one_pass(raw)
+        legacy = min(timeit.repeat(lambda: legacy_path(raw), number=args.repeat, repeat=3)) / args.repeat
+        fast = min(timeit.repeat(lambda: one_pass(raw), number=args.repeat, repeat=3)) / args.repeat
+        print(f"{turns:>6}{legacy * 1e6:>12.1f}{fast * 1e6:>14.1f}{legacy / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+'''
+Shared-state micro-benchmark — in-process vs host-wide structures.
+
+Times one operation of each structure behind the shared-state
+interfaces: a rate-limit check, a response-cache hit and store, and a
+stream slot acquire + release. The in-process versions are what each
+worker uses by default; the shared ones (app.infrastructure.shared_state)
+are what SHARED_STATE_DIR switches on. Then checks that the shared limit
+actually holds across processes: N workers draw from the same client's
+bucket, and together they are allowed `burst` requests, not N x burst.
+
+Usage (from backend/):
+    python -m benchmarks.shared_state
+    python -m benchmarks.shared_state --dir /dev/shm --repeat 20000 --workers 8
+'''
+import argparse
+import multiprocessing
+import os
+import tempfile
+import timeit
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from app.infrastructure.admission import LocalSlotCounter, TokenBucketLimiter  # noqa: E402
+from app.infrastructure.llm.response_cache import ResponseCache  # noqa: E402
+from app.infrastructure.shared_state import (  # noqa: E402
+    SharedResponseCache,
+    SharedSlotCounter,
+    SharedTokenBucketLimiter,
+)
+
+_REPLY = tuple(f"chunk {i} of a typical persona reply " for i in range(40))
+
+
+def _slot_cycle(slots) -> None:
+    slots.try_acquire()
+    slots.release()
+
+
+def _draw(path: str, attempts: int, start, results) -> None:
+    limiter = SharedTokenBucketLimiter(path, rate_per_second=1e-9, burst=50)
+    start.wait()
+    results.put(sum(limiter.try_acquire("ip:10.0.0.1") == 0.0 for _ in range(attempts)))
+
+
+def cross_process_admitted(path: str, workers: int, attempts: int) -> int:
+    '''Requests admitted from one client's burst of 50 by `workers` processes together.'''
+    SharedTokenBucketLimiter(path, rate_per_second=1e-9, burst=50).close()
+    start, results = multiprocessing.Event(), multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_draw, args=(path, attempts, start, results)) for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    start.set()
+    admitted = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return admitted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    parser.add_argument("--repeat", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        shared_limiter = SharedTokenBucketLimiter(os.path.join(directory, "rate_limits.bin"), rate_per_second=1e6)
+        shared_cache = SharedResponseCache(os.path.join(directory, "response_cache.bin"))
+        shared_slots = SharedSlotCounter(os.path.join(directory, "admission.bin"), limit=64)
+        local_limiter = TokenBucketLimiter(rate_per_second=1e6)
+        local_cache = ResponseCache()
+        local_slots = LocalSlotCounter(64)
+        for cache in (local_cache, shared_cache):
+            cache.put("hit", _REPLY)
+        assert shared_cache.get("hit") == local_cache.get("hit")
+
+        cases = [
+            ("rate limit check", lambda: local_limiter.try_acquire("ip:1"), lambda: shared_limiter.try_acquire("ip:1")),
+            ("cache get (hit)", lambda: local_cache.get("hit"), lambda: shared_cache.get("hit")),
+            ("cache put", lambda: local_cache.put("put", _REPLY), lambda: shared_cache.put("put", _REPLY)),
+            ("slot acquire+release", lambda: _slot_cycle(local_slots), lambda: _slot_cycle(shared_slots)),
+        ]
+        print(f"{'operation':<22}{'local µs':>10}{'shared µs':>11}{'ratio':>8}")
+        for name, local_op, shared_op in cases:
+            local = min(timeit.repeat(local_op, number=args.repeat, repeat=3)) / args.repeat
+            shared = min(timeit.repeat(shared_op, number=args.repeat, repeat=3)) / args.repeat
+            print(f"{name:<22}{local * 1e6:>10.2f}{shared * 1e6:>11.2f}{shared / local:>7.1f}x")
+
+        admitted = cross_process_admitted(os.path.join(directory, "burst.bin"), args.workers, attempts=100)
+        print(f"\n{args.workers} processes x 100 requests against one burst of 50: {admitted} admitted")
+
+
+if __name__ == "__main__":
+    main()
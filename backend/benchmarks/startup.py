@@ -0,0 +1,142 @@
+'''
+Startup benchmark — import time and time-to-ready for cold starts.
+
+Measures, in fresh processes:
+- import: wall time of `import app.main`
+- health / ready: time from spawning uvicorn until /health and /ready
+  first answer 200
+
+Runs with the simulated provider by default so no network is involved;
+pass --provider groq (with GROQ_API_KEY set) to include real upstream
+warm-up in time-to-ready. Results are saved under benchmarks/results/.
+
+Usage (from backend/):
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --label after --compare benchmarks/results/startup-before-<ts>.json
+    python -m benchmarks.startup --top 15    # also list the slowest imports
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from benchmarks.load_test import BACKEND_DIR, RESULTS_DIR, _free_port
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def _env(provider: str) -> dict:
+    return {
+        **os.environ,
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "startup-benchmark"),
+        "LLM_PROVIDER": provider,
+    }
+
+
+def measure_import(provider: str) -> float:
+    '''Seconds to import app.main in a fresh interpreter.'''
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=BACKEND_DIR, env=_env(provider), capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(provider: str, top: int) -> list[tuple[str, float]]:
+    '''Cumulative import time per module from -X importtime, slowest first.'''
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=_env(provider), capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((parts[2].rstrip(), int(parts[1]) / 1e6))
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+def measure_startup(provider: str, timeout: float = 60.0) -> tuple[Optional[float], Optional[float]]:
+    '''Seconds from spawning uvicorn until /health and /ready return 200.'''
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env(provider),
+    )
+    health = ready = None
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while ready is None and time.perf_counter() - start < timeout:
+                try:
+                    if health is None and client.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                        health = time.perf_counter() - start
+                    if health is not None and client.get(f"http://127.0.0.1:{port}/ready").status_code == 200:
+                        ready = time.perf_counter() - start
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return health, ready
+
+
+def _stats(values: list[float]) -> dict:
+    values = [v for v in values if v is not None]
+    if not values:
+        return {"median_ms": None, "min_ms": None, "max_ms": None}
+    return {
+        "median_ms": round(statistics.median(values) * 1000, 1),
+        "min_ms": round(min(values) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--provider", default="simulated", choices=["simulated", "groq"])
+    parser.add_argument("--top", type=int, default=0, help="List the N slowest imports")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--compare", type=Path, help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    imports = [measure_import(args.provider) for _ in range(args.runs)]
+    startups = [measure_startup(args.provider) for _ in range(args.runs)]
+    report = {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "provider": args.provider,
+        "runs": args.runs,
+        "import": _stats(imports),
+        "health": _stats([h for h, _ in startups]),
+        "ready": _stats([r for _, r in startups]),
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out = RESULTS_DIR / f"startup-{args.label}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    print(f"\nSaved to {out}")
+
+    if args.top:
+        print(f"\nSlowest imports (cumulative):")
+        for module, seconds in slowest_imports(args.provider, args.top):
+            print(f"{seconds * 1000:>9.1f} ms  {module}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        print(f"\n{'metric':<16}{'baseline':>12}{'current':>12}")
+        for key in ("import", "health", "ready"):
+            print(f"{key + ' median':<16}{str(baseline[key]['median_ms']):>12}{str(report[key]['median_ms']):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,44 @@
-from app.main import app
+'''
+Launcher — production entry point: `python main.py`.
+
+Configured through the environment:
+- HOST / PORT (default 0.0.0.0:8000)
+- WEB_CONCURRENCY: number of worker processes (default 1). Sessions,
+  resumable streams and caches live in each worker's memory, so more
+  than one worker needs sticky routing for session_id and resume.
+- RELOAD=true: development mode (single worker, auto-reload)
+
+The app is only imported inside the workers, keeping the supervisor
+process light; `uvicorn main:app` still works through __getattr__.
+'''
+import os
 import uvicorn
 
+
+def __getattr__(name: str):
+    if name == "app":
+        from app.main import app
+        return app
+    raise AttributeError(name)
+
+
+def _flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+def main() -> None:
+    reload = _flag("RELOAD")
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=1 if reload else int(os.getenv("WEB_CONCURRENCY", "1")),
+        reload=reload,
+        proxy_headers=True,
+        timeout_keep_alive=int(os.getenv("KEEP_ALIVE_SECONDS", "30")),
+        log_level=os.getenv("LOG_LEVEL", "info"),
+    )
+
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    main()
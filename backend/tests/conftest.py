@@ -0,0 +1,14 @@
+'''
+Shared test configuration.
+
+Integration tests run against the simulated LLM provider with fast timing
+so the suite is hermetic and never reaches the Groq API. Per-client rate
+limiting is disabled because every TestClient request shares one address.
+'''
+import os
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("LLM_PROVIDER", "simulated")
+os.environ.setdefault("SIM_TTFT_SECONDS", "0")
+os.environ.setdefault("SIM_TOKENS_PER_SECOND", "0")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
@@ -1,8 +1,11 @@
 '''
 Integration tests for POST /api/v1/chat.
 Tests the full request/response cycle using FastAPI's TestClient.
-Covers: invalid persona (404), valid persona (200 streaming).
+Covers: invalid persona (404), valid persona (200 streaming), no session for
+rejected requests, resuming only one's own stream, panel streaming,
+readiness, /metrics.
 '''
+import time
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -35,8 +38,10 @@ def test_chat_endpoint_success():
             "history": []
         }
     )
-    # With mocked LLM this should return 200
+    # Runs against the simulated provider (see tests/conftest.py)
     assert response.status_code == 200
+    assert "event: token" in response.text
+    assert "event: done" in response.text
 
 def test_chat_endpoint_invalid_persona():
     from app.core.enums import ErrorCode
@@ -50,3 +55,83 @@ def test_chat_endpoint_invalid_persona():
     )
     assert response.status_code == 404
     assert response.json()["code"] == ErrorCode.PERSONA_NOT_FOUND
+
+def test_rejected_chat_creates_no_session():
+    from app.api.deps import get_admission_controller, get_session_store
+    from app.infrastructure.admission import AdmissionController
+    from app.infrastructure.session_store import InMemorySessionStore
+
+    sessions = InMemorySessionStore()
+    app.dependency_overrides[get_admission_controller] = lambda: AdmissionController(max_in_flight=0, max_queue=0)
+    app.dependency_overrides[get_session_store] = lambda: sessions
+    try:
+        response = client.post("/api/v1/chat", json={"character": "sherlock", "message": "Hi", "history": []})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 429
+    assert len(sessions) == 0
+
+def test_resume_unknown_stream():
+    response = client.get("/api/v1/chat/resume", headers={"Last-Event-ID": "missing:3"})
+    assert response.status_code == 404
+    assert response.json()["code"] == ErrorCode.STREAM_NOT_FOUND
+
+def test_resume_is_limited_to_the_owning_client():
+    response = client.post("/api/v1/chat", json={"character": "sherlock", "message": "Hi", "history": []})
+    stream_id = response.headers["X-Stream-ID"]
+
+    foreign = client.get(
+        "/api/v1/chat/resume", headers={"Last-Event-ID": f"{stream_id}:0", "X-API-Key": "someone-else"},
+    )
+    assert foreign.status_code == 404
+    assert foreign.json()["code"] == ErrorCode.STREAM_NOT_FOUND
+    own = client.get("/api/v1/chat/resume", headers={"Last-Event-ID": f"{stream_id}:0"})
+    assert own.status_code == 200
+    assert "event: done" in own.text
+
+def test_metrics_endpoint_reports_chat_stages():
+    client.post("/api/v1/chat", json={"character": "sherlock", "message": "Metrics?", "history": []})
+    client.post("/api/v1/chat", json={"character": "nonexistent", "message": "Hi", "history": []})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert 'persona_request_parse_seconds_count{persona="sherlock"}' in body
+    assert 'persona_queue_seconds_count{persona="sherlock"}' in body
+    assert 'persona_generation_seconds_count{persona="sherlock",model="simulated",outcome="completed"}' in body
+    assert 'persona_sse_events_sent_total{persona="sherlock"}' in body
+    assert f'persona_errors_total{{persona="nonexistent",code="{ErrorCode.PERSONA_NOT_FOUND}"}}' in body
+
+def test_panel_endpoint_streams_each_persona():
+    response = client.post(
+        "/api/v1/chat/panel",
+        json={"characters": ["sherlock", "yoda"], "message": "Who are you?", "history": []},
+    )
+    assert response.status_code == 200
+    assert '"persona":"sherlock"' in response.text
+    assert '"persona":"yoda"' in response.text
+    assert response.text.count("event: persona_done") == 2
+    metrics = client.get("/metrics").text
+    assert 'persona_sse_events_sent_total{persona="yoda"}' in metrics
+    assert 'persona_sse_bytes_sent_total{persona="yoda"}' in metrics
+
+def test_panel_endpoint_unknown_persona():
+    response = client.post(
+        "/api/v1/chat/panel",
+        json={"characters": ["sherlock", "nonexistent"], "message": "Hi"},
+    )
+    assert response.status_code == 404
+    assert response.json()["code"] == ErrorCode.PERSONA_NOT_FOUND
+
+def test_ready_turns_green_after_warm_up():
+    # Lifespan only runs when the client is used as a context manager
+    assert client.get("/ready").status_code == 503
+    with TestClient(app) as started:
+        for _ in range(100):
+            response = started.get("/ready")
+            if response.status_code == 200:
+                break
+            time.sleep(0.01)
+        assert response.json() == {"status": "ready"}
+        health = started.get("/health").json()
+        assert health["status"] == "ok" and health["circuit"] == "closed"
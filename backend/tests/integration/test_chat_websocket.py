@@ -0,0 +1,103 @@
+'''
+Integration tests for the WebSocket chat transport at /api/v1/chat/ws.
+Tests cover: multi-turn conversations on one session, in-band cancel,
+unknown personas, malformed frames, and disallowed origins.
+'''
+import asyncio
+import pytest
+from typing import AsyncIterator
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app.main import app
+from app.api.deps import get_chat_use_case, get_persona_registry, get_session_store
+from app.application.use_cases.chat_use_case import ChatUseCase
+from app.core.enums import ErrorCode
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.interfaces.llm_provider import LLMProvider
+from tests.unit.test_chat_use_case import MockLLM
+
+client = TestClient(app)
+
+
+class SlowLLM(LLMProvider):
+    def __init__(self):
+        self.closed = False
+
+    async def stream(self, messages: list[Message], llm_config: PersonaLLMConfig) -> AsyncIterator[str]:
+        try:
+            while True:
+                await asyncio.sleep(0.01)
+                yield "word "
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def use_llm():
+    def install(llm: LLMProvider):
+        use_case = ChatUseCase(llm=llm, registry=get_persona_registry(), sessions=get_session_store())
+        app.dependency_overrides[get_chat_use_case] = lambda: use_case
+        return use_case
+    yield install
+    app.dependency_overrides.pop(get_chat_use_case, None)
+
+
+def _read_turn(ws) -> list[dict]:
+    frames = []
+    while True:
+        frame = ws.receive_json()
+        frames.append(frame)
+        if frame["type"] in ("done", "error", "cancelled"):
+            return frames
+
+
+def test_multiple_turns_share_one_session(use_llm):
+    use_case = use_llm(MockLLM())
+    with client.websocket_connect("/api/v1/chat/ws") as ws:
+        ws.send_json({"type": "chat", "character": "sherlock", "message": "First"})
+        first = _read_turn(ws)
+        ws.send_json({"type": "chat", "message": "Second"})
+        second = _read_turn(ws)
+
+    assert first[0]["type"] == "start" and first[0]["turn"] == 1
+    assert "".join(f["content"] for f in first if f["type"] == "token") == "Elementary. The answer is clear."
+    assert first[-1]["type"] == "done"
+    assert second[0]["persona"] == "sherlock"
+    assert second[0]["session_id"] == first[0]["session_id"]
+
+    session = use_case.sessions.get(first[0]["session_id"])
+    assert [m.content for m in session.messages if m.role == "user"] == ["First", "Second"]
+
+
+def test_cancel_stops_generation(use_llm):
+    llm = SlowLLM()
+    use_llm(llm)
+    with client.websocket_connect("/api/v1/chat/ws") as ws:
+        ws.send_json({"type": "chat", "character": "yoda", "message": "Talk forever"})
+        assert ws.receive_json()["type"] == "start"
+        assert ws.receive_json()["type"] == "token"
+        ws.send_json({"type": "cancel"})
+        frames = _read_turn(ws)
+        assert frames[-1] == {"type": "cancelled", "turn": 1}
+        assert llm.closed
+
+        # The connection stays usable after a cancel
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+
+
+def test_unknown_persona_and_bad_frames():
+    with client.websocket_connect("/api/v1/chat/ws") as ws:
+        ws.send_json({"type": "chat", "character": "nonexistent", "message": "Hi"})
+        assert ws.receive_json()["code"] == ErrorCode.PERSONA_NOT_FOUND
+        ws.send_text("not json")
+        assert ws.receive_json()["code"] == ErrorCode.INVALID_REQUEST
+        ws.send_json({"type": "chat", "character": "sherlock"})
+        assert ws.receive_json()["code"] == ErrorCode.INVALID_REQUEST
+
+
+def test_disallowed_origin_is_rejected():
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/api/v1/chat/ws", headers={"origin": "https://evil.example"}) as ws:
+            ws.receive_json()
@@ -0,0 +1,75 @@
+'''
+Unit tests for AdmissionController and TokenBucketLimiter.
+Tests cover: immediate admission, FIFO hand-over, full-queue and
+deadline rejection, idempotent tickets, and token-bucket refills.
+'''
+import asyncio
+import pytest
+from app.core.exceptions import RateLimitedError, ServiceOverloadedError
+from app.infrastructure.admission import AdmissionController, TokenBucketLimiter
+
+
+@pytest.mark.asyncio
+async def test_release_hands_slot_to_waiter():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout_seconds=1)
+    first = await controller.admit()
+    waiter = asyncio.create_task(controller.admit())
+    await asyncio.sleep(0)
+    assert controller.queued == 1
+
+    first.release()
+    second = await waiter
+    assert controller.in_flight == 1
+    second.release()
+    second.release()
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately():
+    controller = AdmissionController(max_in_flight=1, max_queue=0)
+    await controller.admit()
+    with pytest.raises(ServiceOverloadedError) as exc:
+        await controller.admit()
+    assert exc.value.retry_after >= 1
+
+
+@pytest.mark.asyncio
+async def test_queue_deadline_rejects():
+    controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout_seconds=0.01)
+    await controller.admit()
+    with pytest.raises(ServiceOverloadedError):
+        await controller.admit()
+    assert controller.queued == 0
+    assert controller.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout_seconds=5)
+    ticket = await controller.admit()
+    waiter = asyncio.create_task(controller.admit())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    ticket.release()
+    assert controller.in_flight == 0
+
+
+def test_token_bucket_limits_and_isolates_clients():
+    limiter = TokenBucketLimiter(rate_per_second=0.001, burst=2)
+    limiter.check("ip:a")
+    limiter.check("ip:a")
+    with pytest.raises(RateLimitedError) as exc:
+        limiter.check("ip:a")
+    assert exc.value.retry_after > 1
+    limiter.check("ip:b")
+
+
+def test_token_bucket_refills():
+    limiter = TokenBucketLimiter(rate_per_second=1000, burst=1)
+    assert limiter.try_acquire("k") == 0.0
+    assert limiter.try_acquire("k") > 0.0
+    limiter._buckets["k"] = (0.0, limiter._buckets["k"][1] - 1)
+    assert limiter.try_acquire("k") == 0.0
@@ -0,0 +1,75 @@
+'''
+Unit tests for CachingProvider and ResponseCache.
+Tests cover: replay on hit, key normalization, config-sensitive keys,
+failed streams not cached, and byte-cap eviction.
+'''
+import pytest
+from typing import AsyncIterator
+from app.core.exceptions import LLMProviderError
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.llm.caching_provider import CachingProvider
+from app.infrastructure.llm.response_cache import ResponseCache
+
+SYSTEM = Message(role=MessageRole.SYSTEM, content="You are Yoda.")
+
+
+class CountingLLM(LLMProvider):
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        self.calls += 1
+        yield "Strong"
+        if self.fail:
+            raise LLMProviderError("boom")
+        yield " you are."
+
+
+async def _collect(provider: LLMProvider, text: str, config: PersonaLLMConfig = None) -> str:
+    messages = [SYSTEM, Message(role=MessageRole.USER, content=text)]
+    return "".join([c async for c in provider.stream(messages, config or PersonaLLMConfig())])
+
+
+@pytest.mark.asyncio
+async def test_hit_replays_without_upstream_call():
+    inner = CountingLLM()
+    provider = CachingProvider(inner, ResponseCache())
+    assert await _collect(provider, "Who are you?") == "Strong you are."
+    assert await _collect(provider, "  who ARE   you? ") == "Strong you are."
+    assert inner.calls == 1
+    assert provider.cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_different_config_misses():
+    inner = CountingLLM()
+    provider = CachingProvider(inner, ResponseCache())
+    await _collect(provider, "Hi")
+    await _collect(provider, "Hi", PersonaLLMConfig(temperature=0.1))
+    assert inner.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_is_not_cached():
+    inner = CountingLLM(fail=True)
+    provider = CachingProvider(inner, ResponseCache())
+    with pytest.raises(LLMProviderError):
+        await _collect(provider, "Hi")
+    assert len(provider.cache) == 0
+
+
+def test_byte_cap_evicts_least_recently_used():
+    cache = ResponseCache(max_bytes=300)
+    cache.put("a", ("x" * 100,))
+    cache.put("b", ("y" * 100,))
+    assert cache.get("a") is None
+    assert cache.get("b") == ("y" * 100,)
+    assert cache.total_bytes <= 300
@@ -1,7 +1,8 @@
 '''
 Unit tests for ChatUseCase.
 Uses a mock LLMProvider — no real Groq API calls are made.
-Tests cover: happy path, persona not found, empty history.
+Tests cover: happy path, persona not found, empty history, early close,
+sessions without a session store, generation time labelled by serving model.
 '''
 import pytest
 from typing import AsyncIterator
@@ -9,7 +10,9 @@ from app.application.use_cases.chat_use_case import ChatUseCase
 from app.domain.entities.message import Message
 from app.domain.interfaces.llm_provider import LLMProvider
 from app.domain.interfaces.persona_repository import PersonaRepository
-from app.core.exceptions import PersonaNotFoundError
+from app.core.exceptions import PersonaNotFoundError, SessionNotFoundError
+from app.core.metrics import GENERATION_SECONDS
+from app.core.request_context import report_model
 from app.domain.enums import MessageRole, PersonaID
 
 from app.domain.entities.persona import PersonaLLMConfig
@@ -57,3 +60,68 @@ async def test_chat_use_case_arabic_detection(use_case):
     async for chunk in use_case.execute(PersonaID.SHERLOCK, "مرحبا", []):
         chunks.append(chunk)
     assert len(chunks) > 0
+
+class EndlessLLM(LLMProvider):
+    def __init__(self):
+        self.closed = False
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        try:
+            while True:
+                yield "word "
+        finally:
+            self.closed = True
+
+@pytest.mark.asyncio
+async def test_chat_use_case_close_cancels_upstream(registry):
+    from app.core.metrics import STREAMS_CANCELLED, TOKENS_SAVED
+    llm = EndlessLLM()
+    use_case = ChatUseCase(llm=llm, registry=registry)
+    before = STREAMS_CANCELLED.value(persona=PersonaID.SHERLOCK)
+    saved_before = TOKENS_SAVED.value(persona=PersonaID.SHERLOCK)
+
+    stream = use_case.execute(PersonaID.SHERLOCK, "Hello", [])
+    await stream.__anext__()
+    await stream.aclose()
+
+    assert llm.closed
+    assert STREAMS_CANCELLED.value(persona=PersonaID.SHERLOCK) == before + 1
+    # Saved tokens are counted by the provider that closed an upstream stream
+    assert TOKENS_SAVED.value(persona=PersonaID.SHERLOCK) == saved_before
+
+
+@pytest.mark.asyncio
+async def test_open_session_without_store_is_transient(use_case):
+    history = [Message(role=MessageRole.USER, content="Hi")]
+    session = use_case.open_session(None, history)
+    assert session.id and session.messages == history
+
+    chunks = [c async for c in use_case.execute(PersonaID.SHERLOCK, "Hello", session.messages, session_id=session.id)]
+    assert chunks
+    with pytest.raises(SessionNotFoundError):
+        use_case.open_session(session.id, [])
+
+
+class HedgedLLM(LLMProvider):
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        report_model("fast-model")
+        yield "Elementary."
+        # A losing hedge reporting afterwards does not relabel the reply
+        report_model("slow-model")
+
+@pytest.mark.asyncio
+async def test_generation_time_is_labelled_with_the_serving_model(registry):
+    use_case = ChatUseCase(llm=HedgedLLM(), registry=registry)
+    before = GENERATION_SECONDS.count(persona=PersonaID.SHERLOCK, model="fast-model", outcome="completed")
+    async for _ in use_case.execute(PersonaID.SHERLOCK, "Hello", []):
+        pass
+    assert GENERATION_SECONDS.count(persona=PersonaID.SHERLOCK, model="fast-model", outcome="completed") == before + 1
+    assert GENERATION_SECONDS.count(persona=PersonaID.SHERLOCK, model="slow-model", outcome="completed") == 0
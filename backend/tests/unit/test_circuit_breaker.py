@@ -0,0 +1,182 @@
+'''
+Unit tests for CircuitBreaker, CircuitBreakerProvider and UpstreamHealthProbe.
+Uses mock LLMProviders and a fake clock — no real Groq API calls are made.
+Tests cover: tripping on error rate and on slow calls, fail-fast while
+open, half-open probing and recovery, neutral cancellations, client
+errors and local quota rejections, and the cached health probe.
+'''
+import asyncio
+import pytest
+from typing import AsyncIterator
+from app.core.enums import ErrorCode
+from app.core.exceptions import CircuitOpenError, LLMProviderError, QuotaExhaustedError
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.enums import CircuitState
+from app.infrastructure.llm.circuit_breaker import CircuitBreaker, CircuitBreakerProvider
+from app.infrastructure.llm.health_probe import UpstreamHealthProbe
+
+MESSAGES = [Message(role="user", content="Hi")]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FlakyLLM(LLMProvider):
+    def __init__(self):
+        self.failing = True
+        self.calls = 0
+
+    async def stream(self, messages: list[Message], llm_config: PersonaLLMConfig) -> AsyncIterator[str]:
+        self.calls += 1
+        if self.failing:
+            raise LLMProviderError("upstream down", retryable=True)
+        yield "ok"
+
+
+async def _call(provider: LLMProvider) -> list[str]:
+    return [c async for c in provider.stream(MESSAGES, PersonaLLMConfig())]
+
+
+def _breaker(clock: FakeClock, **kwargs) -> CircuitBreaker:
+    options = dict(window_size=10, min_calls=4, open_seconds=5.0, half_open_probes=2, clock=clock)
+    options.update(kwargs)
+    return CircuitBreaker(**options)
+
+
+@pytest.mark.asyncio
+async def test_opens_on_errors_and_fails_fast():
+    clock = FakeClock()
+    llm = FlakyLLM()
+    provider = CircuitBreakerProvider(llm, _breaker(clock))
+
+    for _ in range(4):
+        with pytest.raises(LLMProviderError):
+            await _call(provider)
+    assert provider.breaker.state == CircuitState.OPEN
+
+    with pytest.raises(CircuitOpenError) as info:
+        await _call(provider)
+    assert info.value.code == ErrorCode.UPSTREAM_UNAVAILABLE
+    assert info.value.retry_after == 5
+    assert llm.calls == 4  # rejected without touching the upstream
+
+
+@pytest.mark.asyncio
+async def test_half_open_probes_close_or_reopen():
+    clock = FakeClock()
+    llm = FlakyLLM()
+    provider = CircuitBreakerProvider(llm, _breaker(clock))
+    for _ in range(4):
+        with pytest.raises(LLMProviderError):
+            await _call(provider)
+
+    # Probe fails -> open again
+    clock.now = 5.0
+    assert provider.breaker.state == CircuitState.HALF_OPEN
+    with pytest.raises(LLMProviderError):
+        await _call(provider)
+    assert provider.breaker.state == CircuitState.OPEN
+
+    # Two successful probes -> closed
+    clock.now = 10.0
+    llm.failing = False
+    assert await _call(provider) == ["ok"]
+    assert provider.breaker.state == CircuitState.HALF_OPEN
+    assert await _call(provider) == ["ok"]
+    assert provider.breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_limits_concurrent_probes():
+    clock = FakeClock()
+    breaker = _breaker(clock, half_open_probes=1)
+    for _ in range(4):
+        breaker.before_call()
+        breaker.record(False, 0.1)
+    clock.now = 5.0
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    # An abandoned probe frees its slot
+    breaker.abandon()
+    breaker.before_call()
+
+
+def test_slow_calls_trip_the_circuit():
+    breaker = _breaker(FakeClock(), slow_call_seconds=1.0, slow_call_rate_threshold=0.75)
+    for latency in (2.0, 2.0, 0.1, 2.0):
+        breaker.before_call()
+        breaker.record(True, latency)
+    assert breaker.state == CircuitState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_cancellation_before_first_token_is_neutral():
+    class HangingLLM(LLMProvider):
+        async def stream(self, messages, llm_config) -> AsyncIterator[str]:
+            await asyncio.sleep(10)
+            yield "never"
+
+    breaker = _breaker(FakeClock(), min_calls=1)
+    task = asyncio.create_task(_call(CircuitBreakerProvider(HangingLLM(), breaker)))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert breaker.state == CircuitState.CLOSED
+    assert len(breaker._outcomes) == 0
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_trip_the_circuit():
+    class BadRequestLLM(LLMProvider):
+        async def stream(self, messages, llm_config) -> AsyncIterator[str]:
+            raise LLMProviderError("Groq API error: 400 context_length_exceeded", retryable=False)
+            yield
+
+    breaker = _breaker(FakeClock(), min_calls=1)
+    provider = CircuitBreakerProvider(BadRequestLLM(), breaker)
+    for _ in range(10):
+        with pytest.raises(LLMProviderError):
+            await _call(provider)
+    assert breaker.state == CircuitState.CLOSED
+    assert len(breaker._outcomes) == 0
+
+
+@pytest.mark.asyncio
+async def test_quota_rejection_is_neutral():
+    class ExhaustedLLM(LLMProvider):
+        async def stream(self, messages, llm_config) -> AsyncIterator[str]:
+            raise QuotaExhaustedError("Upstream quota is exhausted.")
+            yield
+
+    breaker = _breaker(FakeClock(), min_calls=1)
+    with pytest.raises(QuotaExhaustedError):
+        await _call(CircuitBreakerProvider(ExhaustedLLM(), breaker))
+    assert breaker.state == CircuitState.CLOSED
+    assert len(breaker._outcomes) == 0
+
+
+@pytest.mark.asyncio
+async def test_health_probe_caches_result():
+    outcomes = [None, RuntimeError("dns")]
+
+    async def check():
+        outcome = outcomes.pop(0)
+        if outcome is not None:
+            raise outcome
+
+    probe = UpstreamHealthProbe(check, interval_seconds=60, timeout_seconds=1)
+    assert probe.snapshot()["status"] == "unknown"
+    assert await probe.check_once() is True
+    assert probe.snapshot()["status"] == "up"
+    assert await probe.check_once() is False
+    snapshot = probe.snapshot()
+    assert snapshot["status"] == "down" and snapshot["consecutive_failures"] == 1
+    assert "dns" in snapshot["error"]
@@ -0,0 +1,70 @@
+'''
+Unit tests for FilePersonaRepository.
+Tests cover: loading YAML/JSON files, reloading changed files,
+keeping the last good definition, and precompiled system messages.
+'''
+import json
+import os
+import pytest
+from app.core.exceptions import PersonaNotFoundError
+from app.domain.enums import MessageRole
+from app.infrastructure.file_persona_repository import FilePersonaRepository
+
+
+def _write(path, prompt: str, mtime_ns: int) -> None:
+    path.write_text(json.dumps({
+        "id": "watson",
+        "name": "Dr. Watson",
+        "system_prompt": prompt,
+        "llm_config": {"temperature": 0.4},
+    }))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_loads_yaml_and_json(tmp_path):
+    (tmp_path / "lestrade.yaml").write_text(
+        "id: lestrade\nname: Inspector Lestrade\nsystem_prompt: |\n  You are Lestrade.\n"
+    )
+    _write(tmp_path / "watson.json", "You are Watson.", 1_000_000_000)
+    repo = FilePersonaRepository(tmp_path)
+    assert {p.id for p in repo.all()} == {"lestrade", "watson"}
+    assert repo.get("watson").llm_config.temperature == 0.4
+
+
+def test_reload_picks_up_changes_and_deletions(tmp_path):
+    path = tmp_path / "watson.json"
+    _write(path, "You are Watson.", 1_000_000_000)
+    repo = FilePersonaRepository(tmp_path)
+    original = repo.get("watson")
+
+    assert repo.reload() is False
+    assert repo.get("watson") is original
+
+    _write(path, "You are John Watson.", 2_000_000_000)
+    assert repo.reload() is True
+    assert repo.get("watson").system_prompt == "You are John Watson."
+
+    path.unlink()
+    repo.reload()
+    with pytest.raises(PersonaNotFoundError):
+        repo.get("watson")
+
+
+def test_invalid_file_keeps_previous_definition(tmp_path):
+    path = tmp_path / "watson.json"
+    _write(path, "You are Watson.", 1_000_000_000)
+    repo = FilePersonaRepository(tmp_path)
+
+    path.write_text("{not json")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    repo.reload()
+    assert repo.get("watson").system_prompt == "You are Watson."
+
+
+def test_system_message_is_precompiled_once(tmp_path):
+    _write(tmp_path / "watson.json", "You are Watson.", 1_000_000_000)
+    persona = FilePersonaRepository(tmp_path).get("watson")
+    message = persona.system_message
+    assert message is persona.system_message
+    assert message.role == MessageRole.SYSTEM
+    assert message.content.startswith("You are Watson.\n\n")
@@ -0,0 +1,155 @@
+'''
+Unit tests for GroqProvider against a mocked HTTP transport.
+No real Groq API calls are made.
+Tests cover: pooled client usage, warm-up, warm-up failures,
+rate-limit header reporting, latency/error metrics, tokens saved by
+closing a stream early, and which failures are marked retryable.
+'''
+import json
+import httpx
+import pytest
+from app.core.exceptions import LLMProviderError
+from app.core.metrics import INTER_TOKEN_SECONDS, TOKENS_SAVED, UPSTREAM_ERRORS, UPSTREAM_TTFT_SECONDS
+from app.core.request_context import bind_request
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.infrastructure.llm.groq_provider import GroqProvider
+
+MESSAGES = [Message(role=MessageRole.USER, content="Hi")]
+
+
+def _provider(handler, warmup_connections: int = 2) -> GroqProvider:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return GroqProvider(api_key="test", http_client=client, warmup_connections=warmup_connections)
+
+
+@pytest.mark.asyncio
+async def test_warm_up_uses_pooled_client():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        return httpx.Response(200, json={"object": "list", "data": []})
+
+    provider = _provider(handler, warmup_connections=3)
+    await provider.warm_up()
+    await provider.aclose()
+    assert seen == ["/openai/v1/models"] * 3
+
+
+@pytest.mark.asyncio
+async def test_warm_up_failure_does_not_raise():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("unreachable")
+
+    provider = _provider(handler)
+    await provider.warm_up()
+    await provider.aclose()
+
+
+def _sse(*contents: str) -> bytes:
+    events = [
+        'data: {"id":"c","object":"chat.completion.chunk","created":0,"model":"m",'
+        '"choices":[{"index":0,"delta":{"content":%s},"finish_reason":null}]}\n\n' % json.dumps(c)
+        for c in contents
+    ]
+    return ("".join(events) + "data: [DONE]\n\n").encode()
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_rate_limit_headers():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream", "x-ratelimit-remaining-tokens": "1234"},
+            content=_sse("Elementary", "."),
+        )
+
+    provider = _provider(handler)
+    provider.rate_limit_listener = lambda headers: seen.append(headers["x-ratelimit-remaining-tokens"])
+    chunks = [c async for c in provider.stream(MESSAGES, PersonaLLMConfig())]
+    await provider.aclose()
+    assert chunks == ["Elementary", "."]
+    assert seen == ["1234"]
+
+
+@pytest.mark.asyncio
+async def test_closing_stream_early_counts_saved_tokens():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=_sse("Elementary", ", my dear", "."))
+
+    async def cancel_after_first_chunk(provider: GroqProvider) -> None:
+        stream = provider.stream(MESSAGES, PersonaLLMConfig(max_tokens=100))
+        assert await stream.__anext__() == "Elementary"
+        await stream.aclose()
+
+    provider = _provider(handler)
+    bind_request(persona_id="saved-tokens")
+    before = TOKENS_SAVED.value(persona="saved-tokens")
+
+    # No completed reply seen yet: nothing to estimate the remainder from
+    await cancel_after_first_chunk(provider)
+    assert TOKENS_SAVED.value(persona="saved-tokens") == before
+
+    assert [c async for c in provider.stream(MESSAGES, PersonaLLMConfig(max_tokens=100))] == ["Elementary", ", my dear", "."]
+    assert TOKENS_SAVED.value(persona="saved-tokens") == before
+
+    # The typical reply, not max_tokens, bounds what closing early saved
+    await cancel_after_first_chunk(provider)
+    await provider.aclose()
+    expected = len("Elementary, my dear.") // 4 - len("Elementary") // 4
+    assert TOKENS_SAVED.value(persona="saved-tokens") == before + expected
+
+
+@pytest.mark.asyncio
+async def test_stream_records_latency_and_error_metrics():
+    def ok(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=_sse("a", "b", "c"))
+
+    provider = _provider(ok)
+    provider.model = "metrics-model"
+    ttft_before = UPSTREAM_TTFT_SECONDS.count(model="metrics-model")
+    gaps_before = INTER_TOKEN_SECONDS.count(model="metrics-model")
+    [c async for c in provider.stream(MESSAGES, PersonaLLMConfig())]
+    assert UPSTREAM_TTFT_SECONDS.count(model="metrics-model") == ttft_before + 1
+    assert INTER_TOKEN_SECONDS.count(model="metrics-model") == gaps_before + 2
+
+    def failing(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(400, json={"error": {"message": "bad"}})
+
+    provider = _provider(failing)
+    provider.model = "metrics-model"
+    with pytest.raises(LLMProviderError):
+        [c async for c in provider.stream(MESSAGES, PersonaLLMConfig())]
+    await provider.aclose()
+    assert UPSTREAM_ERRORS.value(model="metrics-model", code=LLMProviderError.code) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status, retryable", [(400, False), (401, False), (429, False), (503, True)])
+async def test_stream_marks_transient_failures_retryable(status, retryable):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(status, json={"error": {"message": "failed"}})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = GroqProvider(api_key="test", http_client=client, max_retries=0)
+    with pytest.raises(LLMProviderError) as exc_info:
+        [c async for c in provider.stream(MESSAGES, PersonaLLMConfig())]
+    await provider.aclose()
+    assert exc_info.value.retryable is retryable
+
+
+@pytest.mark.asyncio
+async def test_connection_drop_is_retryable():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection reset", request=request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = GroqProvider(api_key="test", http_client=client, max_retries=0)
+    with pytest.raises(LLMProviderError) as exc_info:
+        [c async for c in provider.stream(MESSAGES, PersonaLLMConfig())]
+    await provider.aclose()
+    assert exc_info.value.retryable is True
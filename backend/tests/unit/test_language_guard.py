@@ -0,0 +1,137 @@
+'''
+Unit tests for LanguageGuard and its use in ChatUseCase.
+Uses scripted mock LLMProviders — no real Groq API calls are made.
+Tests cover: script detection, incremental verdicts and tolerance for
+foreign names, regenerating a reply that starts in the wrong script
+without leaking it, failing fast (and closing the upstream) on a drift
+after text was sent, keeping a rejected short reply out of the response
+cache, and the match_input policy.
+'''
+import pytest
+from typing import AsyncIterator
+from app.application.services.language_guard import LanguageGuard, ScriptMonitor, detect_script
+from app.application.use_cases.chat_use_case import ChatUseCase
+from app.core.exceptions import LanguagePolicyError
+from app.core.metrics import LANGUAGE_VIOLATIONS
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import LanguagePolicy, MessageRole, PersonaID, Script
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.llm.caching_provider import CachingProvider
+from app.infrastructure.llm.response_cache import ResponseCache
+from app.infrastructure.persona_registry import PersonaRegistry
+
+ENGLISH = ["Elementary, ", "my dear Watson. ", "The mud on your boots ", "says it all."]
+ARABIC = ["بالطبع يا ", "واطسون العزيز، ", "الطين على حذائك ", "يكشف كل شيء."]
+
+
+class ScriptedLLM(LLMProvider):
+    '''Each call streams the next reply; records requests and how far each stream was read.'''
+    def __init__(self, *replies: list[str]):
+        self.replies = list(replies)
+        self.calls: list[list[Message]] = []
+        self.closed_after: list[int] = []
+
+    async def stream(self, messages: list[Message], llm_config: PersonaLLMConfig) -> AsyncIterator[str]:
+        self.calls.append(messages)
+        sent = 0
+        try:
+            for chunk in self.replies.pop(0):
+                yield chunk
+                sent += 1
+        finally:
+            self.closed_after.append(sent)
+
+
+def _use_case(llm: LLMProvider, **kwargs) -> ChatUseCase:
+    return ChatUseCase(llm=llm, registry=PersonaRegistry(), language_guard=LanguageGuard(**kwargs))
+
+
+async def _chat(use_case: ChatUseCase, message: str = "What do you see?") -> list[str]:
+    return [c async for c in use_case.execute(PersonaID.SHERLOCK, message, [])]
+
+
+def test_detect_script_and_monitor_verdicts():
+    assert detect_script("مرحبا، كيف حالك؟") == Script.ARABIC
+    assert detect_script("Hello there") == Script.LATIN
+    assert detect_script("42 :) !!") is None
+
+    monitor = ScriptMonitor(Script.LATIN, max_foreign_ratio=0.3, min_letters=24, window_letters=200)
+    assert not monitor.feed("Yes")
+    assert not monitor.decided
+    # A foreign name inside an English sentence is tolerated
+    assert not monitor.feed(" — as Ibn Sina (ابن سينا) wrote, medicine is a science of the body.")
+    assert monitor.decided
+    # ...but a switch of language mid-reply is caught
+    for chunk in ARABIC * 3:
+        monitor.feed(chunk)
+    assert monitor.violated
+
+
+@pytest.mark.asyncio
+async def test_english_reply_streams_unchanged():
+    llm = ScriptedLLM(ENGLISH)
+    assert await _chat(_use_case(llm)) == ENGLISH
+    assert len(llm.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_wrong_script_start_is_regenerated_unseen():
+    llm = ScriptedLLM(ARABIC * 5, ENGLISH)
+    before = LANGUAGE_VIOLATIONS.value(persona=PersonaID.SHERLOCK, action="regenerated")
+
+    assert await _chat(_use_case(llm), "ماذا ترى؟") == ENGLISH
+
+    assert len(llm.calls) == 2
+    # The first stream was abandoned within a few chunks, not read to the end
+    assert llm.closed_after[0] < len(ARABIC)
+    reminder = llm.calls[1][-1]
+    assert reminder.role == MessageRole.SYSTEM and "English" in reminder.content
+    assert LANGUAGE_VIOLATIONS.value(persona=PersonaID.SHERLOCK, action="regenerated") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_short_wrong_reply_is_judged_before_release():
+    llm = ScriptedLLM(["نعم."], ["Yes."])
+    assert await _chat(_use_case(llm)) == ["Yes."]
+
+
+@pytest.mark.asyncio
+async def test_rejected_short_reply_is_not_cached():
+    cache = ResponseCache()
+    use_case = _use_case(CachingProvider(ScriptedLLM(["نعم."], ["Yes."], ["Yes."]), cache))
+
+    assert await _chat(use_case) == ["Yes."]
+    # Only the regenerated reply was stored, so asking again cannot replay the rejected one
+    assert len(cache) == 1
+    assert await _chat(use_case) == ["Yes."]
+
+
+@pytest.mark.asyncio
+async def test_drift_after_text_was_sent_fails_fast():
+    llm = ScriptedLLM(ENGLISH + ARABIC * 20)
+    received = []
+    with pytest.raises(LanguagePolicyError):
+        async for chunk in _use_case(llm).execute(PersonaID.SHERLOCK, "What do you see?", []):
+            received.append(chunk)
+    assert received[:len(ENGLISH)] == ENGLISH
+    assert llm.closed_after[0] < len(ENGLISH) + 2 * len(ARABIC)
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_regenerations():
+    llm = ScriptedLLM(ARABIC * 5, ARABIC * 5)
+    with pytest.raises(LanguagePolicyError):
+        await _chat(_use_case(llm, max_regenerations=1))
+    assert len(llm.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_match_input_policy_follows_user_script():
+    llm = ScriptedLLM(ARABIC, ENGLISH * 5, ARABIC)
+    use_case = _use_case(llm, policy=LanguagePolicy.MATCH_INPUT)
+
+    assert await _chat(use_case, "ماذا ترى؟") == ARABIC
+    # An English reply to an Arabic message is the violation now
+    assert await _chat(use_case, "ماذا ترى؟") == ARABIC
+    assert len(llm.calls) == 3
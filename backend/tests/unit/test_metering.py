@@ -0,0 +1,211 @@
+'''
+Unit tests for usage metering.
+Uses a temporary SQLite file and a mocked Groq HTTP transport — no real
+Groq API calls are made.
+Tests cover: batched writes and aggregation in WAL mode, the background
+flusher, dropping (and counting) records under backpressure and on
+failed writes, API key and IP redaction, usage capture in GroqProvider
+with an estimate when usage is missing, and the /api/v1/usage endpoint
+with its admin key.
+'''
+import asyncio
+import json
+import sqlite3
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.deps import get_usage_meter
+from app.api.v1.routes import usage
+from app.core.config import get_settings
+from app.core.exceptions import AdminKeyRequiredError
+from app.core.request_context import bind_request
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.infrastructure.llm.groq_provider import GroqProvider
+from app.infrastructure.metering import SqliteUsageStore, UsageMeter, UsageRecord, client_key, metered_client
+
+MESSAGES = [Message(role=MessageRole.USER, content="Hi")]
+
+
+def _record(persona: str = "sherlock", model: str = "m", prompt: int = 10, completion: int = 20, **kwargs) -> UsageRecord:
+    options = dict(
+        timestamp=1000.0, client_id="ip:1.2.3.4", persona_id=persona, model=model,
+        prompt_tokens=prompt, completion_tokens=completion, ttft_ms=100.0,
+        duration_ms=900.0, outcome="completed",
+    )
+    options.update(kwargs)
+    return UsageRecord(**options)
+
+
+class CollectingStore:
+    def __init__(self):
+        self.records: list[UsageRecord] = []
+
+    def write(self, records):
+        self.records.extend(records)
+
+
+class FailingStore:
+    def write(self, records):
+        raise sqlite3.OperationalError("disk I/O error")
+
+
+def test_store_writes_batches_and_aggregates(tmp_path):
+    store = SqliteUsageStore(str(tmp_path / "usage.db"))
+    store.write([
+        _record(),
+        _record(prompt=30, completion=40, ttft_ms=300.0),
+        _record(persona="yoda", outcome="error", completion=0, ttft_ms=None, timestamp=2000.0),
+    ])
+
+    journal = sqlite3.connect(store.path).execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal == "wal"
+
+    groups = store.aggregate(["persona"])
+    assert groups[0] == {
+        "persona": "sherlock", "requests": 2, "prompt_tokens": 40, "completion_tokens": 60,
+        "total_tokens": 100, "estimated_requests": 0, "errors": 0,
+        "avg_ttft_ms": 200.0, "avg_duration_ms": 900.0,
+    }
+    assert groups[1]["persona"] == "yoda" and groups[1]["errors"] == 1
+    assert [g["requests"] for g in store.aggregate(["model"], since=1500)] == [1]
+    assert store.aggregate([], until=0) == []
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_meter_flushes_in_background_batches(tmp_path):
+    store = SqliteUsageStore(str(tmp_path / "usage.db"))
+    meter = UsageMeter(store, batch_size=3, flush_interval_seconds=60)
+    meter.start()
+
+    for _ in range(3):
+        meter.record(_record())
+    # A full batch wakes the flusher without waiting for the interval
+    for _ in range(50):
+        if meter.written:
+            break
+        await asyncio.sleep(0.01)
+    assert meter.written == 3
+
+    meter.record(_record())
+    await meter.stop()
+    assert meter.written == 4
+    assert store.aggregate([])[0]["requests"] == 4
+
+
+@pytest.mark.asyncio
+async def test_meter_drops_instead_of_blocking():
+    meter = UsageMeter(FailingStore(), batch_size=100, max_pending=2)
+    for _ in range(5):
+        meter.record(_record())
+    assert meter.pending == 2
+    assert meter.dropped == 3
+
+    assert await meter.flush() == 0
+    assert meter.dropped == 5
+    assert meter.pending == 0
+
+
+def test_api_keys_and_ips_are_not_stored():
+    key = client_key("metering-secret")
+    redacted = metered_client("key:secret-api-key", key)
+    assert redacted.startswith("key:") and "secret" not in redacted
+    assert redacted == metered_client("key:secret-api-key", client_key("metering-secret"))
+    address = metered_client("ip:10.0.0.1", key)
+    assert address.startswith("ip:") and "10.0" not in address
+    assert metered_client("anonymous", key) == "anonymous"
+    # Keyed: without the secret, hashing every address does not find the match
+    assert address != metered_client("ip:10.0.0.1", client_key("other-secret"))
+    assert UsageMeter(None).client("ip:10.0.0.1") != UsageMeter(None).client("ip:10.0.0.1")
+
+
+def _sse_with_usage(*contents: str, usage: dict | None) -> bytes:
+    events = [
+        'data: {"id":"c","object":"chat.completion.chunk","created":0,"model":"m",'
+        '"choices":[{"index":0,"delta":{"content":%s},"finish_reason":null}]}\n\n' % json.dumps(c)
+        for c in contents
+    ]
+    if usage is not None:
+        events.append(
+            'data: {"id":"c","object":"chat.completion.chunk","created":0,"model":"m",'
+            '"choices":[{"index":0,"delta":{},"finish_reason":"stop"}],'
+            '"x_groq":{"id":"r","usage":%s}}\n\n' % json.dumps(usage)
+        )
+    return ("".join(events) + "data: [DONE]\n\n").encode()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("reported", [True, False])
+async def test_groq_provider_meters_usage(reported):
+    usage_payload = {"prompt_tokens": 42, "completion_tokens": 7, "total_tokens": 49} if reported else None
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=_sse_with_usage("Elementary, ", "my dear Watson.", usage=usage_payload),
+        )
+
+    store = CollectingStore()
+    meter = UsageMeter(store)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = GroqProvider(api_key="test", http_client=client, meter=meter)
+    bind_request(client_id="key:abc", persona_id="sherlock")
+    chunks = [c async for c in provider.stream(MESSAGES, PersonaLLMConfig())]
+    await provider.aclose()
+    await meter.flush()
+
+    assert chunks == ["Elementary, ", "my dear Watson."]
+    [record] = store.records
+    assert record.persona_id == "sherlock"
+    assert record.client_id == meter.client("key:abc")
+    assert record.outcome == "completed"
+    assert record.ttft_ms is not None
+    if reported:
+        assert (record.prompt_tokens, record.completion_tokens, record.estimated) == (42, 7, False)
+    else:
+        assert record.estimated
+        assert record.prompt_tokens == MESSAGES[0].token_estimate
+        assert record.completion_tokens == len("Elementary, my dear Watson.") // 4
+
+
+def _usage_client(meter: UsageMeter) -> TestClient:
+    app = FastAPI()
+    app.include_router(usage.router, prefix="/api/v1")
+    app.dependency_overrides[get_usage_meter] = lambda: meter
+    return TestClient(app)
+
+
+def test_usage_endpoint_aggregates(tmp_path):
+    meter = UsageMeter(SqliteUsageStore(str(tmp_path / "usage.db")))
+    meter.record(_record())
+    meter.record(_record(persona="yoda", model="other"))
+    client = _usage_client(meter)
+
+    body = client.get("/api/v1/usage", params={"group_by": ["persona", "model"]}).json()
+    assert [(g["persona"], g["model"], g["total_tokens"]) for g in body["groups"]] == [
+        ("sherlock", "m", 30), ("yoda", "other", 30),
+    ]
+    assert body["dropped_records"] == 0
+    assert client.get("/api/v1/usage", params={"group_by": "secret_column"}).status_code == 422
+
+
+def test_usage_endpoint_requires_admin_key(tmp_path, monkeypatch):
+    meter = UsageMeter(SqliteUsageStore(str(tmp_path / "usage.db")))
+    meter.record(_record())
+    client = _usage_client(meter)
+
+    # Without a configured key, per-client reports are refused outright
+    with pytest.raises(AdminKeyRequiredError):
+        client.get("/api/v1/usage", params={"group_by": "client"})
+
+    monkeypatch.setattr(get_settings(), "usage_admin_key", "s3cret")
+    with pytest.raises(AdminKeyRequiredError):
+        client.get("/api/v1/usage")
+    with pytest.raises(AdminKeyRequiredError):
+        client.get("/api/v1/usage", headers={"X-Admin-Key": "wrong"})
+    body = client.get("/api/v1/usage", params={"group_by": "client"}, headers={"X-Admin-Key": "s3cret"}).json()
+    assert [g["client"] for g in body["groups"]] == ["ip:1.2.3.4"]
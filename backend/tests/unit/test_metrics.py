@@ -0,0 +1,30 @@
+'''
+Unit tests for the in-process metrics instruments.
+Tests cover: counter labels, histogram bucketing and Prometheus rendering.
+'''
+from app.core.metrics import Counter, Histogram, Registry
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.register(Histogram("latency_seconds", "Latency.", ("persona",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, persona="yoda")
+
+    rendered = registry.render()
+    assert "# TYPE latency_seconds histogram" in rendered
+    assert 'latency_seconds_bucket{persona="yoda",le="0.1"} 1' in rendered
+    assert 'latency_seconds_bucket{persona="yoda",le="1"} 3' in rendered
+    assert 'latency_seconds_bucket{persona="yoda",le="+Inf"} 4' in rendered
+    assert 'latency_seconds_sum{persona="yoda"} 4.25' in rendered
+    assert 'latency_seconds_count{persona="yoda"} 4' in rendered
+    assert histogram.count(persona="yoda") == 4
+
+
+def test_counter_renders_escaped_labels():
+    registry = Registry()
+    counter = registry.register(Counter("errors_total", "Errors.", ("code",)))
+    counter.inc(code='bad"code')
+    counter.inc(2, code='bad"code')
+    assert counter.value(code='bad"code') == 3
+    assert 'errors_total{code="bad\\"code"} 3' in registry.render()
@@ -0,0 +1,119 @@
+'''
+Unit tests for PanelUseCase and the panel SSE framing.
+Uses mock LLMProviders — no real Groq API calls are made.
+Tests cover: concurrent fan-out, failure isolation, the shared
+concurrency cap, one admission slot per persona, upfront persona
+validation, and panel SSE events.
+'''
+import asyncio
+import json
+import time
+import pytest
+from typing import AsyncIterator
+from app.api.sse import panel_sse_stream
+from app.application.use_cases.chat_use_case import ChatUseCase
+from app.application.use_cases.panel_use_case import PanelUseCase
+from app.core.exceptions import LLMProviderError, PersonaNotFoundError, ServiceOverloadedError
+from app.core.request_context import current_request
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.admission import AdmissionController
+from app.infrastructure.persona_registry import PersonaRegistry
+
+
+class PanelLLM(LLMProvider):
+    '''Sleeps per chunk, fails for the persona named in fail_for, and tracks concurrency.'''
+    def __init__(self, delay: float = 0.05, fail_for: str = ""):
+        self.delay = delay
+        self.fail_for = fail_for
+        self.active = 0
+        self.peak = 0
+
+    async def stream(self, messages: list[Message], llm_config: PersonaLLMConfig) -> AsyncIterator[str]:
+        persona_id = current_request().persona_id
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            for word in ("one", " two"):
+                await asyncio.sleep(self.delay)
+                if persona_id == self.fail_for:
+                    raise LLMProviderError("boom")
+                yield f"{persona_id}:{word}"
+        finally:
+            self.active -= 1
+
+
+def _panel(llm: LLMProvider, limiter=None, admit=None) -> PanelUseCase:
+    return PanelUseCase(ChatUseCase(llm=llm, registry=PersonaRegistry()), limiter=limiter, admit=admit)
+
+
+async def _collect(panel: PanelUseCase, ids: list[str]):
+    return [event async for event in panel.execute(ids, "Hello", [])]
+
+
+@pytest.mark.asyncio
+async def test_personas_stream_concurrently():
+    llm = PanelLLM(delay=0.05)
+    start = time.perf_counter()
+    events = await _collect(_panel(llm), ["sherlock", "yoda", "mittens"])
+    elapsed = time.perf_counter() - start
+
+    assert llm.peak == 3
+    assert elapsed < 0.25  # the slowest persona (~0.1s), not the sum (~0.3s)
+    for persona_id in ("sherlock", "yoda", "mittens"):
+        mine = [e for e in events if e.persona_id == persona_id]
+        assert "".join(e.content for e in mine) == f"{persona_id}:one{persona_id}: two"
+        assert mine[-1].done and mine[-1].error is None
+
+
+@pytest.mark.asyncio
+async def test_failure_is_isolated():
+    events = await _collect(_panel(PanelLLM(delay=0.01, fail_for="yoda")), ["sherlock", "yoda"])
+    finals = {e.persona_id: e for e in events if e.done}
+    assert isinstance(finals["yoda"].error, LLMProviderError)
+    assert finals["sherlock"].error is None
+    assert sum(1 for e in events if e.persona_id == "sherlock" and not e.done) == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_limiter_caps_concurrency():
+    llm = PanelLLM(delay=0.01)
+    await _collect(_panel(llm, limiter=asyncio.Semaphore(1)), ["sherlock", "yoda", "mittens"])
+    assert llm.peak == 1
+
+
+@pytest.mark.asyncio
+async def test_each_persona_takes_an_admission_slot():
+    admission = AdmissionController(max_in_flight=2, max_queue=0)
+    llm = PanelLLM(delay=0.01)
+    events = await _collect(_panel(llm, admit=admission.admit), ["sherlock", "yoda", "mittens"])
+
+    # Two personas fit under the global cap; the third is rejected on its own
+    assert llm.peak == 2
+    failed = [e for e in events if e.done and e.error is not None]
+    assert len(failed) == 1 and isinstance(failed[0].error, ServiceOverloadedError)
+    assert admission.in_flight == 0
+
+
+def test_validate_rejects_unknown_and_dedupes():
+    panel = _panel(PanelLLM())
+    assert panel.validate(["yoda", "sherlock", "yoda"]) == ["yoda", "sherlock"]
+    with pytest.raises(PersonaNotFoundError):
+        panel.validate(["yoda", "nobody"])
+
+
+@pytest.mark.asyncio
+async def test_panel_sse_tags_events_by_persona():
+    panel = _panel(PanelLLM(delay=0.01, fail_for="yoda"))
+    raw = b"".join([f async for f in panel_sse_stream(panel.execute(["sherlock", "yoda"], "Hi", []))])
+    blocks = [b for b in raw.decode().split("\n\n") if b]
+    events = [(dict(l.split(": ", 1) for l in b.split("\n"))) for b in blocks]
+
+    tokens = [json.loads(e["data"]) for e in events if e["event"] == "token"]
+    assert {t["persona"] for t in tokens} == {"sherlock"}
+    assert "".join(t["content"] for t in tokens) == "sherlock:onesherlock: two"
+    assert [json.loads(e["data"])["persona"] for e in events if e["event"] == "persona_error"] == ["yoda"]
+    assert [json.loads(e["data"])["persona"] for e in events if e["event"] == "persona_done"] == ["sherlock"]
+    final = json.loads(events[-1]["data"])
+    assert events[-1]["event"] == "done" and final["personas"] == 2 and final["failed"] == 1
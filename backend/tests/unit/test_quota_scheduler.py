@@ -0,0 +1,134 @@
+'''
+Unit tests for QuotaScheduler.
+Tests cover: header parsing, immediate dispatch, fail-fast on
+impossible requests, queued dispatch after refill, fair ordering,
+interactive calls ahead of panel calls, and one scheduler per routed
+model.
+'''
+import asyncio
+import pytest
+from app.core.exceptions import QuotaExhaustedError
+from app.core.request_context import PRIORITY_PANEL, bind_request
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.infrastructure.llm.quota_scheduler import QuotaScheduler, parse_reset
+
+from tests.unit.test_chat_use_case import MockLLM
+
+MESSAGES = [Message(role=MessageRole.USER, content="Hi")]
+
+
+async def _collect(scheduler: QuotaScheduler, max_tokens: int = 10) -> str:
+    config = PersonaLLMConfig(max_tokens=max_tokens)
+    return "".join([c async for c in scheduler.stream(MESSAGES, config)])
+
+
+def test_parse_reset_durations():
+    assert parse_reset("2m59.56s") == pytest.approx(179.56)
+    assert parse_reset("7.66s") == pytest.approx(7.66)
+    assert parse_reset("120ms") == pytest.approx(0.12)
+    assert parse_reset("soon") is None
+
+
+def test_headers_override_local_model():
+    scheduler = QuotaScheduler(MockLLM(), tokens_limit=100)
+    scheduler.observe_headers({
+        "x-ratelimit-limit-tokens": "6000",
+        "x-ratelimit-remaining-tokens": "42",
+        "x-ratelimit-reset-tokens": "7.5s",
+    })
+    assert scheduler.tokens.limit == 6000
+    assert scheduler.tokens.remaining == pytest.approx(42, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_dispatches_immediately_with_quota():
+    scheduler = QuotaScheduler(MockLLM())
+    assert await _collect(scheduler) == "Elementary. The answer is clear."
+    assert scheduler.tokens.remaining < scheduler.tokens.limit
+
+
+@pytest.mark.asyncio
+async def test_request_larger_than_quota_fails_fast():
+    scheduler = QuotaScheduler(MockLLM(), tokens_limit=50)
+    with pytest.raises(QuotaExhaustedError):
+        await _collect(scheduler, max_tokens=100)
+
+
+@pytest.mark.asyncio
+async def test_long_wait_fails_fast():
+    scheduler = QuotaScheduler(MockLLM(), tokens_limit=100, tokens_window_seconds=60, max_wait_seconds=1)
+    scheduler.tokens.remaining = 0
+    with pytest.raises(QuotaExhaustedError):
+        await _collect(scheduler)
+
+
+@pytest.mark.asyncio
+async def test_queued_requests_dispatch_fairly_after_refill():
+    scheduler = QuotaScheduler(MockLLM(), tokens_limit=1000, tokens_window_seconds=1)
+    scheduler.tokens.remaining = 0
+    order = []
+
+    async def client(name: str):
+        bind_request(client_id=name)
+        await _collect(scheduler)
+        order.append(name)
+
+    heavy = [asyncio.create_task(client("heavy")) for _ in range(3)]
+    await asyncio.sleep(0)
+    light = asyncio.create_task(client("light"))
+    await asyncio.gather(*heavy, light)
+    assert order.index("light") < 3
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_go_ahead_of_panel_calls():
+    scheduler = QuotaScheduler(MockLLM(), tokens_limit=1000, tokens_window_seconds=1)
+    scheduler.tokens.remaining = 0
+    order = []
+
+    async def call(name: str, **context):
+        bind_request(client_id=name, **context)
+        await _collect(scheduler)
+        order.append(name)
+
+    panel = [asyncio.create_task(call(f"panel{i}", priority=PRIORITY_PANEL)) for i in range(3)]
+    await asyncio.sleep(0)
+    chat = asyncio.create_task(call("chat"))
+    await asyncio.gather(*panel, chat)
+    assert order[0] == "chat"
+
+
+def test_routed_models_get_separate_schedulers(monkeypatch):
+    from app.api import deps
+    from app.core.config import get_settings
+    from app.infrastructure.llm.routing_provider import RoutingProvider
+
+    for name, value in {
+        "LLM_PROVIDER": "groq", "ROUTING_MODELS": '["llama-3.1-8b-instant"]', "QUOTA_SCHEDULER_ENABLED": "true",
+        "RESPONSE_CACHE_ENABLED": "false", "SINGLE_FLIGHT_ENABLED": "false",
+    }.items():
+        monkeypatch.setenv(name, value)
+    def reset():
+        get_settings.cache_clear()
+        for dependency in vars(deps).values():
+            if hasattr(dependency, "cache_clear"):
+                dependency.cache_clear()
+
+    reset()
+    try:
+        provider = deps.get_llm_provider()
+        while not isinstance(provider, RoutingProvider):
+            assert not isinstance(provider, QuotaScheduler)
+            provider = provider.inner
+        schedulers = [backend.provider for backend in provider.backends]
+        assert all(isinstance(s, QuotaScheduler) for s in schedulers)
+        assert schedulers[0] is not schedulers[1]
+
+        # Headers from one model only update that model's quota
+        schedulers[1].inner.rate_limit_listener({"x-ratelimit-limit-tokens": "6000"})
+        assert schedulers[1].tokens.limit == 6000
+        assert schedulers[0].tokens.limit != 6000
+    finally:
+        reset()
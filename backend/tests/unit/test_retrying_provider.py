@@ -0,0 +1,122 @@
+'''
+Unit tests for RetryingProvider.
+Uses scripted mock LLMProviders — no real Groq API calls are made.
+Tests cover: retrying transient failures before the first token,
+giving up on non-retryable errors and after max_retries, continuing
+after partial output with an assistant prefix and a reduced token
+budget, trimming a restated seam, and the backoff bounds.
+'''
+import random
+import pytest
+from typing import AsyncIterator
+from app.core.exceptions import LLMProviderError
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.llm.retrying_provider import RetryingProvider, trim_overlap
+
+MESSAGES = [Message(role=MessageRole.USER, content="Tell me a story")]
+
+
+class ScriptedLLM(LLMProvider):
+    '''Each call plays the next script: a list of chunks, optionally ending in an exception.'''
+    def __init__(self, *scripts: list):
+        self.scripts = list(scripts)
+        self.calls: list[tuple[list[Message], PersonaLLMConfig]] = []
+
+    async def stream(self, messages: list[Message], llm_config: PersonaLLMConfig) -> AsyncIterator[str]:
+        self.calls.append((messages, llm_config))
+        for item in self.scripts.pop(0):
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+def _provider(llm: LLMProvider, **kwargs) -> RetryingProvider:
+    return RetryingProvider(llm, base_delay_seconds=0, **kwargs)
+
+
+async def _collect(provider: LLMProvider, config: PersonaLLMConfig = PersonaLLMConfig()) -> str:
+    return "".join([c async for c in provider.stream(MESSAGES, config)])
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_failure_before_first_token():
+    llm = ScriptedLLM(
+        [LLMProviderError("reset", retryable=True)],
+        ["Once ", "upon a time."],
+    )
+    assert await _collect(_provider(llm)) == "Once upon a time."
+    assert len(llm.calls) == 2
+    assert llm.calls[1][0] == MESSAGES
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_error_is_raised_immediately():
+    llm = ScriptedLLM([LLMProviderError("bad request")], ["never"])
+    with pytest.raises(LLMProviderError):
+        await _collect(_provider(llm))
+    assert len(llm.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    llm = ScriptedLLM(*[[LLMProviderError("down", retryable=True)] for _ in range(3)])
+    with pytest.raises(LLMProviderError):
+        await _collect(_provider(llm, max_retries=2))
+    assert len(llm.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_continues_after_partial_output():
+    first = "The butler was in the library " * 4
+    llm = ScriptedLLM(
+        [first, LLMProviderError("dropped", retryable=True)],
+        ["with the candlestick, all along."],
+    )
+    config = PersonaLLMConfig(max_tokens=100)
+
+    reply = await _collect(_provider(llm), config)
+
+    assert reply == first + "with the candlestick, all along."
+    messages, cont_config = llm.calls[1]
+    assert messages[:-1] == MESSAGES
+    assert messages[-1] == Message(role=MessageRole.ASSISTANT, content=first)
+    assert cont_config.max_tokens == 100 - len(first.encode("utf-8")) // 4
+    assert cont_config.temperature == config.temperature
+
+
+@pytest.mark.asyncio
+async def test_continuation_trims_restated_tail():
+    llm = ScriptedLLM(
+        ["Elementary, my dear Watson. The mud on your boots", LLMProviderError("dropped", retryable=True)],
+        ["on your boots ", "tells me you walked ", "from Paddington."],
+    )
+    reply = await _collect(_provider(llm, stitch_window=16))
+    assert reply == "Elementary, my dear Watson. The mud on your boots tells me you walked from Paddington."
+
+
+@pytest.mark.asyncio
+async def test_continuation_limit_and_exhausted_budget():
+    llm = ScriptedLLM(
+        ["partial", LLMProviderError("dropped", retryable=True)],
+        [LLMProviderError("dropped again", retryable=True)],
+    )
+    with pytest.raises(LLMProviderError):
+        await _collect(_provider(llm, max_continuations=1))
+
+    # Nothing left of the budget: the reply simply ends with what was emitted
+    llm = ScriptedLLM(["x" * 40, LLMProviderError("dropped", retryable=True)])
+    assert await _collect(_provider(llm), PersonaLLMConfig(max_tokens=10)) == "x" * 40
+    assert len(llm.calls) == 1
+
+
+def test_trim_overlap_and_backoff_bounds():
+    assert trim_overlap("the quick brown fox", "brown fox jumps") == " jumps"
+    # Short coincidental matches are kept
+    assert trim_overlap("I see the", "the end") == "the end"
+
+    provider = RetryingProvider(ScriptedLLM(), base_delay_seconds=0.5, max_delay_seconds=2.0, rng=random.Random(1))
+    assert all(0 <= provider.backoff(1) <= 0.5 for _ in range(50))
+    assert all(0 <= provider.backoff(10) <= 2.0 for _ in range(50))
@@ -0,0 +1,139 @@
+'''
+Unit tests for RoutingProvider.
+Tests cover: no hedge for a fast primary, hedging a slow primary with
+loser cancellation, failover before the first token, no hedge for an
+empty reply, propagating the caller's cancellation, each stream driven
+by a single task, no TTFT samples from cancelled losers, and weighting.
+'''
+import asyncio
+import pytest
+from typing import AsyncIterator
+from app.core.exceptions import LLMProviderError
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.llm.routing_provider import Backend, RoutingProvider
+
+MESSAGES = [Message(role=MessageRole.USER, content="Hi")]
+
+
+class DelayedLLM(LLMProvider):
+    def __init__(self, text: str, delay: float = 0.0, fail: bool = False):
+        self.text = text
+        self.delay = delay
+        self.fail = fail
+        self.closed = False
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise LLMProviderError("upstream down")
+            for word in self.text.split():
+                yield word
+        finally:
+            self.closed = True
+
+
+def _router(primary: LLMProvider, secondary: LLMProvider) -> RoutingProvider:
+    router = RoutingProvider(
+        [Backend("primary", primary), Backend("secondary", secondary)],
+        hedge_min_delay_seconds=0.02,
+        hedge_max_delay_seconds=0.02,
+    )
+    router._pick = lambda exclude=None: router.backends[0]
+    return router
+
+
+async def _collect(router: RoutingProvider) -> list[str]:
+    return [c async for c in router.stream(MESSAGES, PersonaLLMConfig())]
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    router = _router(DelayedLLM("fast reply"), DelayedLLM("other"))
+    assert await _collect(router) == ["fast", "reply"]
+    assert router.hedges_sent == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    slow = DelayedLLM("slow reply", delay=5)
+    router = _router(slow, DelayedLLM("hedged reply"))
+    assert await _collect(router) == ["hedged", "reply"]
+    assert router.hedges_won == 1
+    assert slow.closed
+
+
+@pytest.mark.asyncio
+async def test_empty_primary_is_not_hedged():
+    router = _router(DelayedLLM(""), DelayedLLM("other"))
+    assert await _collect(router) == []
+    assert router.hedges_sent == 0
+
+
+@pytest.mark.asyncio
+async def test_caller_cancellation_is_not_swallowed():
+    slow, hedge = DelayedLLM("slow", delay=5), DelayedLLM("hedge", delay=5)
+    router = _router(slow, hedge)
+    task = asyncio.create_task(_collect(router))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert slow.closed and hedge.closed
+
+
+@pytest.mark.asyncio
+async def test_stream_is_driven_by_one_task():
+    class TaskRecordingLLM(LLMProvider):
+        def __init__(self):
+            self.tasks = set()
+
+        async def stream(self, messages, llm_config) -> AsyncIterator[str]:
+            for word in ("one", "two", "three"):
+                self.tasks.add(asyncio.current_task())
+                yield word
+            self.tasks.add(asyncio.current_task())
+
+    llm = TaskRecordingLLM()
+    router = _router(llm, DelayedLLM("other"))
+    assert await _collect(router) == ["one", "two", "three"]
+    assert len(llm.tasks) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_loser_leaves_no_ttft_sample():
+    router = _router(DelayedLLM("slow reply", delay=5), DelayedLLM("hedged reply"))
+    await _collect(router)
+    primary, secondary = router.backends
+    assert len(primary.stats.ttft_samples) == 0
+    assert len(secondary.stats.ttft_samples) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_falls_over():
+    router = _router(DelayedLLM("x", fail=True), DelayedLLM("backup reply"))
+    assert await _collect(router) == ["backup", "reply"]
+    assert router.backends[0].stats.error_rate > 0
+
+
+@pytest.mark.asyncio
+async def test_all_backends_failing_raises():
+    router = _router(DelayedLLM("x", fail=True), DelayedLLM("y", fail=True))
+    with pytest.raises(LLMProviderError):
+        await _collect(router)
+
+
+def test_score_prefers_low_latency_and_errors():
+    router = RoutingProvider([Backend("a", DelayedLLM("")), Backend("b", DelayedLLM(""))])
+    a, b = router.backends
+    a.stats.ttft_samples.extend([0.2, 0.3])
+    b.stats.ttft_samples.extend([0.2, 0.3])
+    b.stats.error_rate = 0.5
+    assert router.score(a) < router.score(b)
@@ -0,0 +1,185 @@
+'''
+Unit tests for the semantic near-duplicate cache.
+Uses a mock LLMProvider — no real Groq API calls are made. Skipped when
+NumPy (an optional dependency) is not installed.
+Tests cover: embedding similarity of paraphrases, hits above and misses
+below the threshold, per-persona thresholds, scoping by prompt and
+history, short-turn eligibility, LRU and TTL eviction with a compact
+index, failed streams never being stored, and negated or changed-entity
+questions missing at the default threshold.
+'''
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.core.config import Settings
+from app.core.exceptions import LLMProviderError
+from app.core.metrics import SEMANTIC_CACHE_LOOKUPS
+from app.core.request_context import bind_request
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.llm.semantic_cache import (
+    HashedNgramEmbedder,
+    SemanticCache,
+    SemanticCachingProvider,
+)
+
+SYSTEM = Message(role=MessageRole.SYSTEM, content="You are Yoda.")
+CONFIG = PersonaLLMConfig()
+
+
+def _turn(text: str, *history: Message, system: Message = SYSTEM) -> list[Message]:
+    return [system, *history, Message(role=MessageRole.USER, content=text)]
+
+
+class CountingLLM(LLMProvider):
+    def __init__(self, chunks: list[str], error: Exception = None):
+        self.chunks = chunks
+        self.error = error
+        self.calls = 0
+
+    async def stream(self, messages: list[Message], llm_config: PersonaLLMConfig):
+        self.calls += 1
+        for chunk in self.chunks:
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _ask(provider: SemanticCachingProvider, messages: list[Message]) -> str:
+    return "".join([c async for c in provider.stream(messages, CONFIG)])
+
+
+def test_paraphrases_embed_close_and_other_questions_far():
+    vectors = HashedNgramEmbedder().embed([
+        "who are you", "Who are you??", "tell me who you are", "what is the meaning of life",
+    ])
+    similarity = vectors @ vectors.T
+    assert similarity[0, 1] == pytest.approx(1.0)
+    assert similarity[0, 2] > 0.8
+    assert similarity[0, 3] < 0.3
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_is_served_from_cache():
+    llm = CountingLLM(chunks=["A Jedi ", "Master, I am."])
+    cache = SemanticCache()
+    provider = SemanticCachingProvider(llm, cache, threshold_for=lambda _: 0.8)
+    bind_request(persona_id="yoda")
+    hits_before = SEMANTIC_CACHE_LOOKUPS.value(persona="yoda", result="hit")
+
+    assert await _ask(provider, _turn("who are you")) == "A Jedi Master, I am."
+    assert await _ask(provider, _turn("Tell me who you are!")) == "A Jedi Master, I am."
+    assert llm.calls == 1
+    assert SEMANTIC_CACHE_LOOKUPS.value(persona="yoda", result="hit") == hits_before + 1
+
+    await _ask(provider, _turn("what is the meaning of life"))
+    assert llm.calls == 2
+    assert cache.hit_rate == pytest.approx(1 / 3)
+
+
+@pytest.mark.asyncio
+async def test_threshold_is_per_persona():
+    llm = CountingLLM(chunks=["reply"])
+    thresholds = {"strict": 0.99, "loose": 0.8}
+    provider = SemanticCachingProvider(llm, SemanticCache(), threshold_for=thresholds.__getitem__)
+
+    for persona in ("strict", "loose"):
+        bind_request(persona_id=persona)
+        system = Message(role=MessageRole.SYSTEM, content=f"You are {persona}.")
+        await _ask(provider, _turn("who are you", system=system))
+        await _ask(provider, _turn("tell me who you are", system=system))
+
+    # strict missed its paraphrase, loose served it
+    assert llm.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_scoped_by_prompt_and_history_and_limited_to_short_turns():
+    llm = CountingLLM(chunks=["reply"])
+    provider = SemanticCachingProvider(llm, SemanticCache(max_history_messages=2), threshold_for=lambda _: 0.8)
+    bind_request(persona_id="yoda")
+
+    await _ask(provider, _turn("who are you"))
+    await _ask(provider, _turn("who are you", system=Message(role=MessageRole.SYSTEM, content="You are Sherlock.")))
+    earlier = [Message(role=MessageRole.USER, content="hi"), Message(role=MessageRole.ASSISTANT, content="hello")]
+    await _ask(provider, _turn("who are you", *earlier))
+    assert llm.calls == 3
+
+    long_history = earlier * 2
+    await _ask(provider, _turn("who are you", *long_history))
+    await _ask(provider, _turn("who are you", *long_history))
+    await _ask(provider, _turn("who are you " + "really " * 40))
+    await _ask(provider, _turn("who are you " + "really " * 40))
+    assert llm.calls == 7
+
+
+def test_lru_and_ttl_eviction_keep_index_compact():
+    clock = FakeClock()
+    cache = SemanticCache(max_entries=2, ttl_seconds=60, clock=clock)
+    questions = ["who are you", "what is the meaning of life", "how old are you"]
+
+    for i, question in enumerate(questions[:2]):
+        cache.store("scope", cache.embed(question), (f"reply {i}",))
+    assert cache.lookup("scope", cache.embed("who are you"), 0.9)[0] == ("reply 0",)
+
+    # "who are you" was used most recently, so the meaning of life is evicted
+    cache.store("scope", cache.embed(questions[2]), ("reply 2",))
+    assert len(cache) == 2
+    assert cache.lookup("scope", cache.embed(questions[1]), 0.9)[0] is None
+    assert cache.lookup("scope", cache.embed(questions[2]), 0.9)[0] == ("reply 2",)
+    assert cache.lookup("scope", cache.embed(questions[0]), 0.9)[0] == ("reply 0",)
+
+    clock.now = 61
+    assert cache.lookup("scope", cache.embed(questions[0]), 0.9)[0] is None
+    assert len(cache) == 1
+    assert cache.lookup("scope", cache.embed(questions[2]), 0.9)[0] is None
+    assert len(cache) == 0
+
+
+def test_restoring_the_same_question_replaces_it():
+    cache = SemanticCache()
+    cache.store("scope", cache.embed("who are you"), ("old",))
+    cache.store("scope", cache.embed("Who are you?"), ("new",))
+    assert len(cache) == 1
+    assert cache.lookup("scope", cache.embed("who are you"), 0.9)[0] == ("new",)
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_is_not_stored():
+    llm = CountingLLM(chunks=["partial"], error=LLMProviderError("boom"))
+    cache = SemanticCache()
+    provider = SemanticCachingProvider(llm, cache, threshold_for=lambda _: 0.8)
+    bind_request(persona_id="yoda")
+    with pytest.raises(LLMProviderError):
+        await _ask(provider, _turn("who are you"))
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_default_threshold_keeps_opposite_questions_apart():
+    llm = CountingLLM(chunks=["reply"])
+    default = Settings.model_fields["semantic_cache_threshold"].default
+    provider = SemanticCachingProvider(llm, SemanticCache(), threshold_for=lambda _: default)
+    bind_request(persona_id="yoda")
+
+    for question in (
+        "what is the capital of France", "what is the capital of Spain",
+        "is it safe to go out", "is it not safe to go out",
+    ):
+        await _ask(provider, _turn(question))
+    assert llm.calls == 4
+
+    # Trivial variations of a stored question still hit
+    await _ask(provider, _turn("What is the capital of France?"))
+    assert llm.calls == 4
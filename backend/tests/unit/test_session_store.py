@@ -0,0 +1,90 @@
+'''
+Unit tests for InMemorySessionStore and session-backed ChatUseCase turns.
+Tests cover: create/get, TTL expiry, LRU and byte-cap eviction,
+per-session trimming (in user/assistant pairs), and appending the
+streamed reply.
+'''
+import pytest
+from app.application.use_cases.chat_use_case import ChatUseCase
+from app.core.exceptions import SessionNotFoundError
+from app.domain.entities.message import Message
+from app.domain.enums import MessageRole, PersonaID
+from app.infrastructure.persona_registry import PersonaRegistry
+from app.infrastructure.session_store import InMemorySessionStore
+
+from tests.unit.test_chat_use_case import MockLLM
+
+
+def _msg(content: str, role: MessageRole = MessageRole.USER) -> Message:
+    return Message(role=role, content=content)
+
+
+def test_create_and_get_roundtrip():
+    store = InMemorySessionStore()
+    session = store.create([_msg("Hi")])
+    assert store.get(session.id).messages == [_msg("Hi")]
+
+
+def test_unknown_session_raises():
+    store = InMemorySessionStore()
+    with pytest.raises(SessionNotFoundError):
+        store.get("missing")
+
+
+def test_expired_session_raises():
+    store = InMemorySessionStore(ttl_seconds=0)
+    session = store.create([])
+    with pytest.raises(SessionNotFoundError):
+        store.get(session.id)
+    assert len(store) == 0
+
+
+def test_lru_eviction_keeps_recently_used():
+    store = InMemorySessionStore(max_sessions=2)
+    first = store.create([])
+    second = store.create([])
+    store.get(first.id)
+    store.create([])
+    store.get(first.id)
+    with pytest.raises(SessionNotFoundError):
+        store.get(second.id)
+
+
+def test_byte_cap_evicts_oldest():
+    store = InMemorySessionStore(max_bytes=200)
+    old = store.create([_msg("x" * 100)])
+    new = store.create([_msg("y" * 100)])
+    assert store.total_bytes <= 200
+    assert store.get(new.id)
+    with pytest.raises(SessionNotFoundError):
+        store.get(old.id)
+
+
+def test_append_trims_to_max_messages():
+    store = InMemorySessionStore(max_messages=3)
+    session = store.create([_msg("1"), _msg("2")])
+    store.append(session.id, [_msg("3"), _msg("4")])
+    assert [m.content for m in store.get(session.id).messages] == ["2", "3", "4"]
+
+
+def test_trimming_never_starts_with_an_assistant_turn():
+    store = InMemorySessionStore(max_messages=3)
+    session = store.create([_msg("q1"), _msg("a1", MessageRole.ASSISTANT)])
+    store.append(session.id, [_msg("q2"), _msg("a2", MessageRole.ASSISTANT)])
+    assert [m.content for m in store.get(session.id).messages] == ["q2", "a2"]
+    assert store.total_bytes == sum(len(c) + 64 for c in ("q2", "a2"))
+
+
+@pytest.mark.asyncio
+async def test_use_case_appends_turn_to_session():
+    store = InMemorySessionStore()
+    use_case = ChatUseCase(llm=MockLLM(), registry=PersonaRegistry(), sessions=store)
+    session = use_case.open_session(None, [])
+
+    async for _ in use_case.execute(PersonaID.SHERLOCK, "Hello", session.messages, session.id):
+        pass
+
+    assert store.get(session.id).messages == [
+        _msg("Hello"),
+        _msg("Elementary. The answer is clear.", MessageRole.ASSISTANT),
+    ]
@@ -0,0 +1,190 @@
+'''
+Unit tests for the host-wide shared-state backend.
+Uses memory-mapped files in a temporary directory; two instances on the
+same path stand in for two workers, plus one test with real processes.
+Tests cover: token buckets shared across instances and processes, the
+response cache (sharing, TTL, oversized entries, eviction within a
+group, torn entries read as misses), the slot counter (sharing,
+reclaiming a dead worker's slots, rows left by an earlier process with
+the same pid),
+AdmissionController admitting on a slot freed by another worker, and
+re-initialising a file written with a different layout.
+'''
+import asyncio
+import multiprocessing
+import os
+import pytest
+from app.core.exceptions import RateLimitedError
+from app.infrastructure.admission import AdmissionController
+
+shared_state = pytest.importorskip("app.infrastructure.shared_state", exc_type=ImportError)
+
+REPLY = ("Elementary, ", "my dear Watson.")
+
+
+def test_token_buckets_are_shared(tmp_path):
+    path = str(tmp_path / "rate_limits.bin")
+    first = shared_state.SharedTokenBucketLimiter(path, rate_per_second=0.001, burst=3)
+    second = shared_state.SharedTokenBucketLimiter(path, rate_per_second=0.001, burst=3)
+
+    first.check("ip:1")
+    second.check("ip:1")
+    first.check("ip:1")
+    with pytest.raises(RateLimitedError) as exc:
+        second.check("ip:1")
+    assert exc.value.retry_after >= 1
+    # Other clients have their own buckets
+    assert second.try_acquire("ip:2") == 0.0
+
+
+def test_full_bucket_group_evicts_least_recently_seen(tmp_path):
+    limiter = shared_state.SharedTokenBucketLimiter(str(tmp_path / "rl.bin"), rate_per_second=0.001, burst=1, max_keys=8)
+    assert limiter.try_acquire("ip:0") == 0.0
+    for i in range(1, 9):
+        limiter.try_acquire(f"ip:{i}")
+    # ip:0 was evicted by the ninth key and starts over with a full bucket
+    assert limiter.try_acquire("ip:0") == 0.0
+    assert limiter.try_acquire("ip:8") > 0
+
+
+def test_response_cache_is_shared_and_expires(tmp_path):
+    path = str(tmp_path / "response_cache.bin")
+    first = shared_state.SharedResponseCache(path, ttl_seconds=60)
+    second = shared_state.SharedResponseCache(path, ttl_seconds=60)
+
+    assert second.get("k") is None
+    first.put("k", REPLY)
+    assert second.get("k") == REPLY
+    assert (second.hits, second.misses) == (1, 1)
+
+    expired = shared_state.SharedResponseCache(path, ttl_seconds=-1)
+    assert expired.get("k") is None
+    assert first.get("k") is None
+
+
+def test_response_cache_skips_oversized_and_evicts_lru(tmp_path):
+    cache = shared_state.SharedResponseCache(str(tmp_path / "rc.bin"), max_entries=4, entry_bytes=256)
+    cache.put("big", ("x" * 300,))
+    assert cache.get("big") is None
+
+    for i in range(4):
+        cache.put(f"k{i}", (f"reply {i}",))
+    assert cache.get("k0") == ("reply 0",)
+    cache.put("k4", ("reply 4",))
+    # k1 was the least recently used of the single 4-entry group
+    assert cache.get("k1") is None
+    assert [cache.get(f"k{i}") for i in (0, 2, 3, 4)] == [(f"reply {i}",) for i in (0, 2, 3, 4)]
+
+
+def test_torn_entry_is_a_miss(tmp_path):
+    cache = shared_state.SharedResponseCache(str(tmp_path / "rc.bin"))
+    cache.put("k", REPLY)
+    digest, group = cache._locate("k")
+    offset = next(offset for offset, entry in cache._entries(cache.file.buffer, group) if entry[0] == digest)
+    start = offset + shared_state._ENTRY.size
+    cache.file.buffer[start:start + 4] = b"\xff\xfe{["
+
+    assert cache.get("k") is None
+    assert cache.misses == 1
+
+
+def test_slot_counter_is_shared(tmp_path):
+    path = str(tmp_path / "admission.bin")
+    first = shared_state.SharedSlotCounter(path, limit=2)
+    second = shared_state.SharedSlotCounter(path, limit=2)
+
+    assert first.try_acquire()
+    assert second.try_acquire()
+    assert not first.try_acquire()
+    assert second.value == 2
+    second.release()
+    assert first.try_acquire()
+    assert first.value == 2
+
+
+def _hold_slot_and_exit(path: str) -> None:
+    shared_state.SharedSlotCounter(path, limit=1).try_acquire()
+    os._exit(0)
+
+
+def test_dead_worker_slots_are_reclaimed(tmp_path):
+    path = str(tmp_path / "admission.bin")
+    counter = shared_state.SharedSlotCounter(path, limit=1)
+    worker = multiprocessing.get_context("fork").Process(target=_hold_slot_and_exit, args=(path,))
+    worker.start()
+    worker.join()
+
+    assert counter.value == 1
+    assert counter.try_acquire()
+    assert counter.value == 1
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="needs /proc for process start times")
+def test_rows_of_a_reused_pid_are_reclaimed(tmp_path):
+    path = str(tmp_path / "admission.bin")
+    previous = shared_state.SharedSlotCounter(path, limit=1)
+    assert previous.try_acquire()
+    # Pretend the row was written by an earlier process that had this pid
+    pid, held, started = shared_state._WORKER.unpack_from(previous.file.buffer, previous._row_offset)
+    shared_state._WORKER.pack_into(previous.file.buffer, previous._row_offset, pid, held, started + 1)
+    previous.close()
+
+    # The first counter to open the table clears the stale row
+    counter = shared_state.SharedSlotCounter(path, limit=1)
+    assert counter.value == 0
+    assert counter.try_acquire()
+
+
+def _draw(path: str, results) -> None:
+    limiter = shared_state.SharedTokenBucketLimiter(path, rate_per_second=1e-9, burst=20)
+    results.put(sum(limiter.try_acquire("ip:1") == 0.0 for _ in range(20)))
+
+
+def test_limit_holds_across_processes(tmp_path):
+    path = str(tmp_path / "rate_limits.bin")
+    shared_state.SharedTokenBucketLimiter(path, rate_per_second=1e-9, burst=20)
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=_draw, args=(path, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    admitted = sum(results.get(timeout=10) for _ in workers)
+    for worker in workers:
+        worker.join()
+    assert admitted == 20
+
+
+@pytest.mark.asyncio
+async def test_admission_waiter_takes_slot_freed_elsewhere(tmp_path):
+    path = str(tmp_path / "admission.bin")
+    other_worker = shared_state.SharedSlotCounter(path, limit=1)
+    controller = AdmissionController(
+        max_queue=1,
+        queue_timeout_seconds=2,
+        slots=shared_state.SharedSlotCounter(path, limit=1),
+        poll_interval_seconds=0.01,
+    )
+    assert other_worker.try_acquire()
+
+    waiter = asyncio.create_task(controller.admit())
+    await asyncio.sleep(0.03)
+    assert controller.queued == 1 and not waiter.done()
+
+    other_worker.release()
+    ticket = await asyncio.wait_for(waiter, 1)
+    assert controller.in_flight == 1
+    ticket.release()
+    assert other_worker.value == 0
+
+
+def test_layout_change_reinitialises_file(tmp_path):
+    path = str(tmp_path / "response_cache.bin")
+    old = shared_state.SharedResponseCache(path, max_entries=4)
+    old.put("k", REPLY)
+
+    resized = shared_state.SharedResponseCache(path, max_entries=8)
+    assert resized.get("k") is None
+    resized.put("k", REPLY)
+    assert resized.get("k") == REPLY
+    # The old mapping stays valid rather than crashing on the resized file
+    assert old.get("k") == REPLY
@@ -0,0 +1,46 @@
+'''
+Unit tests for SimulatedProvider.
+Tests cover: reply length follows max_tokens, chunk sizing, injected
+errors, and time-to-first-token delay.
+'''
+import time
+import pytest
+from app.core.exceptions import LLMProviderError
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.infrastructure.llm.simulated_provider import SimulatedProvider
+
+MESSAGES = [Message(role="user", content="Hello")]
+
+
+async def _collect(provider: SimulatedProvider, max_tokens: int = 100) -> list[str]:
+    return [chunk async for chunk in provider.stream(MESSAGES, PersonaLLMConfig(max_tokens=max_tokens))]
+
+
+@pytest.mark.asyncio
+async def test_reply_length_and_chunking():
+    provider = SimulatedProvider(
+        ttft_seconds=0, tokens_per_second=0,
+        chunk_tokens_min=2, chunk_tokens_max=2, reply_fraction=0.5, seed=1,
+    )
+    chunks = await _collect(provider, max_tokens=100)
+    assert len(chunks) == 25
+    assert sum(len(chunk.split()) for chunk in chunks) == 50
+
+
+@pytest.mark.asyncio
+async def test_error_injection():
+    provider = SimulatedProvider(ttft_seconds=0, tokens_per_second=0, error_rate=1.0, seed=3)
+    for _ in range(5):
+        with pytest.raises(LLMProviderError):
+            await _collect(provider)
+
+
+@pytest.mark.asyncio
+async def test_ttft_delay():
+    provider = SimulatedProvider(ttft_seconds=0.05, ttft_sigma=0.01, tokens_per_second=0, seed=7)
+    start = time.perf_counter()
+    stream = provider.stream(MESSAGES, PersonaLLMConfig(max_tokens=10))
+    await stream.__anext__()
+    assert time.perf_counter() - start >= 0.04
+    await stream.aclose()
@@ -0,0 +1,94 @@
+'''
+Unit tests for SingleFlightProvider.
+Tests cover: coalescing identical requests, late joiners replaying
+earlier chunks, shared errors, and cancelling on last unsubscribe.
+'''
+import asyncio
+import pytest
+from typing import AsyncIterator
+from app.core.exceptions import LLMProviderError
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.domain.interfaces.llm_provider import LLMProvider
+from app.infrastructure.llm.single_flight import SingleFlightProvider
+
+MESSAGES = [Message(role=MessageRole.USER, content="Who are you?")]
+
+
+class GatedLLM(LLMProvider):
+    '''Emits one chunk per gate release so tests control timing.'''
+    def __init__(self, chunks: list[str], fail: bool = False):
+        self.chunks = chunks
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = False
+        self.gate = asyncio.Queue()
+
+    async def stream(
+        self,
+        messages: list[Message],
+        llm_config: PersonaLLMConfig
+    ) -> AsyncIterator[str]:
+        self.calls += 1
+        try:
+            for chunk in self.chunks:
+                await self.gate.get()
+                yield chunk
+            if self.fail:
+                raise LLMProviderError("boom")
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def _collect(provider: LLMProvider) -> list[str]:
+    return [c async for c in provider.stream(MESSAGES, PersonaLLMConfig())]
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_upstream():
+    inner = GatedLLM(["a", "b", "c"])
+    provider = SingleFlightProvider(inner)
+
+    first = asyncio.create_task(_collect(provider))
+    await asyncio.sleep(0)
+    inner.gate.put_nowait(None)
+    await asyncio.sleep(0.01)
+
+    late = asyncio.create_task(_collect(provider))
+    for _ in range(2):
+        inner.gate.put_nowait(None)
+    assert await first == ["a", "b", "c"]
+    assert await late == ["a", "b", "c"]
+    assert inner.calls == 1
+    assert provider.coalesced == 1
+    assert provider.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_subscriber():
+    inner = GatedLLM(["a"], fail=True)
+    provider = SingleFlightProvider(inner)
+    tasks = [asyncio.create_task(_collect(provider)) for _ in range(2)]
+    await asyncio.sleep(0)
+    inner.gate.put_nowait(None)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(r, LLMProviderError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_upstream_cancelled_after_last_subscriber_leaves():
+    inner = GatedLLM(["a", "b"])
+    provider = SingleFlightProvider(inner)
+    tasks = [asyncio.create_task(_collect(provider)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+
+    tasks[0].cancel()
+    await asyncio.sleep(0.01)
+    assert not inner.cancelled
+
+    tasks[1].cancel()
+    await asyncio.sleep(0.01)
+    assert inner.cancelled
+    assert provider.in_flight == 0
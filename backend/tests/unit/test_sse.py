@@ -0,0 +1,122 @@
+'''
+Unit tests for the SSE output stage.
+Tests cover: event framing, first-chunk flush, byte/time coalescing,
+heartbeats, error events, the final done event, disconnect polling, and
+per-persona panel stream stats.
+'''
+import asyncio
+import json
+import pytest
+from app.api.sse import HEARTBEAT, format_event, panel_sse_stream, sse_stream
+from app.application.use_cases.panel_use_case import PanelEvent
+from app.core.enums import ErrorCode
+from app.core.exceptions import LLMProviderError
+
+
+async def _chunks(items, delay: float = 0.0, fail: bool = False):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+    if fail:
+        raise LLMProviderError("boom")
+
+
+def _parse(raw: bytes) -> list[tuple[str, str]]:
+    events = []
+    for block in raw.decode().split("\n\n"):
+        if not block:
+            continue
+        if block.startswith(":"):
+            events.append(("comment", block))
+            continue
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields.get("event", "message"), fields["data"]))
+    return events
+
+
+async def _run(source, **kwargs) -> list[tuple[str, str]]:
+    return _parse(b"".join([e async for e in sse_stream(source, **kwargs)]))
+
+
+def test_format_event_splits_multiline_data():
+    assert format_event("a\nb", event="token", event_id="1") == b"id: 1\nevent: token\ndata: a\ndata: b\n\n"
+
+
+@pytest.mark.asyncio
+async def test_coalesces_after_first_chunk():
+    events = await _run(_chunks(["Ele", "men", "tary", "."]), flush_interval_seconds=10, flush_bytes=1024)
+    tokens = [json.loads(d)["content"] for e, d in events if e == "token"]
+    assert tokens == ["Ele", "mentary."]
+    assert events[-1][0] == "done"
+    assert json.loads(events[-1][1])["characters"] == 11
+
+
+@pytest.mark.asyncio
+async def test_byte_threshold_forces_flush():
+    events = await _run(_chunks(["a", "bb", "cc", "d"]), flush_interval_seconds=10, flush_bytes=4)
+    tokens = [json.loads(d)["content"] for e, d in events if e == "token"]
+    assert tokens == ["a", "bbcc", "d"]
+
+
+@pytest.mark.asyncio
+async def test_time_window_and_heartbeat():
+    events = await _run(
+        _chunks(["a", "b"], delay=0.05),
+        flush_interval_seconds=0.001,
+        heartbeat_seconds=0.02,
+    )
+    kinds = [e for e, _ in events]
+    assert "comment" in kinds
+    assert kinds.count("token") == 2
+    assert HEARTBEAT.decode().strip() in [d for e, d in events if e == "comment"]
+
+
+@pytest.mark.asyncio
+async def test_failure_emits_error_event():
+    events = await _run(_chunks(["a", "b"], fail=True), flush_interval_seconds=10)
+    assert [e for e, _ in events] == ["token", "token", "error"]
+    assert json.loads(events[-1][1])["code"] == ErrorCode.LLM_PROVIDER_ERROR
+
+
+@pytest.mark.asyncio
+async def test_disconnect_stops_waiting_for_tokens():
+    closed = []
+
+    async def silent():
+        try:
+            await asyncio.sleep(10)
+            yield "never"
+        finally:
+            closed.append(True)
+
+    async def disconnected() -> bool:
+        return True
+
+    events = await asyncio.wait_for(
+        _run(silent(), is_disconnected=disconnected, disconnect_poll_seconds=0.01),
+        timeout=1,
+    )
+    assert events == []
+    assert closed == [True]
+
+
+@pytest.mark.asyncio
+async def test_panel_stream_reports_stats_per_persona():
+    async def panel():
+        yield PanelEvent("sherlock", "Elementary.")
+        yield PanelEvent("yoda", "Hmm.")
+        yield PanelEvent("sherlock", done=True)
+        yield PanelEvent("yoda", done=True, error=LLMProviderError("boom"))
+
+    finished = []
+    raw = b"".join([e async for e in panel_sse_stream(panel(), on_finish=finished.append)])
+    (stats,) = finished
+    assert stats["sherlock"].events == 1 and stats["sherlock"].characters == len("Elementary.")
+    assert stats["sherlock"].error_code is None
+    assert stats["yoda"].error_code == ErrorCode.LLM_PROVIDER_ERROR
+    # Counted bytes are exactly the token frames sent
+    token_bytes = sum(
+        len(format_event(data, event="token")) for event, data in _parse(raw) if event == "token"
+    )
+    assert stats["sherlock"].bytes_sent + stats["yoda"].bytes_sent == token_bytes
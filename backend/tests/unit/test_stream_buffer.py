@@ -0,0 +1,130 @@
+'''
+Unit tests for StreamBuffer and StreamRegistry.
+Tests cover: replay from an offset, ring-buffer truncation, resume
+after a reader leaves, grace-period cancellation (and immediate
+cancellation without one, even before the pump starts), resuming a
+cancelled stream, resuming only as the owning client, and TTL eviction.
+'''
+import asyncio
+import pytest
+from app.core.exceptions import StreamNotFoundError
+from app.infrastructure.stream_buffer import StreamBuffer, StreamRegistry
+
+
+async def _source(items, delay: float = 0.0, cancelled: list = None, closed: list = None):
+    try:
+        for item in items:
+            await asyncio.sleep(delay)
+            yield item
+    except asyncio.CancelledError:
+        if cancelled is not None:
+            cancelled.append(True)
+        raise
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+@pytest.mark.asyncio
+async def test_read_replays_from_offset():
+    buffer = StreamBuffer("s")
+    buffer.start(_source(["a", "b", "c"]))
+    assert [c async for c in buffer.read()] == ["a", "b", "c"]
+    assert [c async for c in buffer.read(2)] == ["c"]
+
+
+@pytest.mark.asyncio
+async def test_ring_drops_oldest_chunks():
+    buffer = StreamBuffer("s", max_chunks=2)
+    buffer.start(_source(["a", "b", "c"]))
+    await buffer.task
+    assert buffer.base_offset == 1
+    assert [c async for c in buffer.read(1)] == ["b", "c"]
+    with pytest.raises(StreamNotFoundError):
+        async for _ in buffer.read(0):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_resume_continues_live_generation():
+    registry = StreamRegistry(resume_grace_seconds=1)
+    buffer = registry.create(_source(["a", "b", "c"], delay=0.01))
+
+    reader = buffer.read()
+    assert await reader.__anext__() == "a"
+    await reader.aclose()
+
+    resumed = registry.get(buffer.id)
+    assert [c async for c in resumed.read(1)] == ["b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_idle_stream_cancelled_after_grace():
+    cancelled = []
+    registry = StreamRegistry(resume_grace_seconds=0.01)
+    buffer = registry.create(_source(["a"] * 100, delay=0.01, cancelled=cancelled))
+    await asyncio.sleep(0.1)
+    assert buffer.done
+    assert cancelled == [True]
+
+
+@pytest.mark.asyncio
+async def test_no_grace_cancels_when_last_reader_leaves():
+    closed = []
+    registry = StreamRegistry(resume_grace_seconds=0)
+    buffer = registry.create(_source(["a"] * 100, delay=0.01, closed=closed))
+
+    reader = buffer.read()
+    assert await reader.__anext__() == "a"
+    await reader.aclose()
+    await asyncio.sleep(0.05)
+    assert buffer.done and buffer.cancelled
+    assert closed == [True]
+
+
+@pytest.mark.asyncio
+async def test_cancel_before_pump_starts_still_closes_source():
+    closed = []
+    buffer = StreamBuffer("s")
+    buffer.start(_source(["a"] * 100, delay=0.01, closed=closed))
+    buffer.cancel()
+    reader = buffer.read()
+    with pytest.raises(StreamNotFoundError):
+        await asyncio.wait_for(reader.__anext__(), 1)
+    assert buffer.done
+    assert closed == [True]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_cannot_be_resumed():
+    registry = StreamRegistry(resume_grace_seconds=0.01)
+    buffer = registry.create(_source(["a"] * 100, delay=0.01))
+    await asyncio.sleep(0.1)
+    assert buffer.cancelled
+    # An old reader sees an ordinary error rather than a CancelledError
+    with pytest.raises(StreamNotFoundError):
+        async for _ in buffer.read():
+            pass
+    with pytest.raises(StreamNotFoundError):
+        registry.get(buffer.id)
+
+
+@pytest.mark.asyncio
+async def test_only_the_owner_can_resume():
+    registry = StreamRegistry()
+    buffer = registry.create(_source(["a", "b"]), client_id="ip:10.0.0.1")
+    await buffer.task
+
+    with pytest.raises(StreamNotFoundError):
+        registry.get(buffer.id, client_id="ip:10.0.0.2")
+    assert registry.get(buffer.id, client_id="ip:10.0.0.1") is buffer
+
+
+@pytest.mark.asyncio
+async def test_completed_streams_expire():
+    registry = StreamRegistry(ttl_seconds=0)
+    buffer = registry.create(_source(["a"]))
+    await buffer.task
+    await asyncio.sleep(0.001)
+    with pytest.raises(StreamNotFoundError):
+        registry.get(buffer.id)
@@ -0,0 +1,94 @@
+'''
+Unit tests for stream recording and ReplayProvider.
+No real Groq API calls are made.
+Tests cover: GroqProvider recording mode, writes off the event loop,
+fixture round-trip, replay selection by key and persona, scaled timing,
+and failed recordings.
+'''
+import threading
+import time
+from pathlib import Path
+import httpx
+import pytest
+from app.core.exceptions import LLMProviderError
+from app.core.request_context import bind_request
+from app.domain.entities.message import Message
+from app.domain.entities.persona import PersonaLLMConfig
+from app.domain.enums import MessageRole
+from app.infrastructure.llm.groq_provider import GroqProvider
+from app.infrastructure.llm.replay_provider import ReplayProvider
+from app.infrastructure.llm.stream_fixtures import StreamFixture, StreamRecorder, load_fixtures
+from tests.unit.test_groq_provider import _sse
+
+MESSAGES = [Message(role=MessageRole.USER, content="Hi")]
+
+
+def _fixture(persona: str, key: str, *chunks: tuple[float, str], complete: bool = True) -> StreamFixture:
+    return StreamFixture(
+        model="m", persona_id=persona, key=key,
+        config=PersonaLLMConfig(), chunks=chunks, complete=complete,
+    )
+
+
+@pytest.mark.asyncio
+async def test_groq_provider_records_fixture(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=_sse("Elementary", "."))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = GroqProvider(api_key="test", http_client=client, recorder=StreamRecorder(tmp_path))
+    bind_request(persona_id="sherlock")
+    chunks = [c async for c in provider.stream(MESSAGES, PersonaLLMConfig(max_tokens=42))]
+    await provider.aclose()
+
+    [fixture] = load_fixtures(tmp_path)
+    assert [text for _, text in fixture.chunks] == chunks == ["Elementary", "."]
+    assert fixture.persona_id == "sherlock"
+    assert fixture.config.max_tokens == 42
+    assert fixture.complete
+
+    # Replaying the same request hits the exact recording
+    replay = ReplayProvider([fixture], time_scale=0)
+    assert [c async for c in replay.stream(MESSAGES, PersonaLLMConfig(max_tokens=42))] == chunks
+
+
+@pytest.mark.asyncio
+async def test_recorder_writes_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+    write_text = Path.write_text
+
+    def spy(self, *args, **kwargs):
+        threads.append(threading.current_thread())
+        return write_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "write_text", spy)
+    path = await StreamRecorder(tmp_path).save(_fixture("sherlock", "k", (0.0, "Hi")))
+
+    assert threads and threads[0] is not threading.main_thread()
+    assert load_fixtures(tmp_path) == [StreamFixture.from_json(path.read_text(encoding="utf-8"))]
+
+
+def test_fixture_round_trip():
+    fixture = _fixture("sherlock", "k", (120.5, "Hello"), (150.0, " there"), complete=False)
+    assert StreamFixture.from_json(fixture.to_json()) == fixture
+
+
+@pytest.mark.asyncio
+async def test_replay_selects_by_persona_and_scales_timing():
+    replay = ReplayProvider(
+        [_fixture("sherlock", "a", (100.0, "S")), _fixture("yoda", "b", (100.0, "Y"))],
+        time_scale=0.5,
+    )
+    bind_request(persona_id="yoda")
+    start = time.perf_counter()
+    chunks = [c async for c in replay.stream(MESSAGES, PersonaLLMConfig())]
+    elapsed = time.perf_counter() - start
+    assert chunks == ["Y"]
+    assert 0.04 <= elapsed < 0.1
+
+
+@pytest.mark.asyncio
+async def test_replay_of_failed_recording_raises():
+    replay = ReplayProvider([_fixture("", "a", (0.0, "partial"), complete=False)], time_scale=0)
+    with pytest.raises(LLMProviderError):
+        [c async for c in replay.stream(MESSAGES, PersonaLLMConfig())]
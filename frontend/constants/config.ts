@@ -9,6 +9,9 @@ export const ENDPOINTS = {
   chat: `${API_BASE_URL}/api/v1/chat`,
 } as const;
 
+// Returned by POST /chat; sending it back as session_id lets a turn omit its history
+export const SESSION_HEADER = "X-Session-ID";
+
 export const STORAGE_KEY = "persona_sessions";
 export const STORAGE_VERSION = 1;
 export const TOAST_DURATION_MS = 3000;
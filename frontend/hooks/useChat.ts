@@ -2,7 +2,7 @@
 
 import { useState, useCallback, useRef, useEffect, useMemo } from "react";
 import { Message, Session, ChatRequest } from "@/types/chat";
-import { streamChat } from "@/services/api";
+import { ApiError, streamChat } from "@/services/api";
 import { STORAGE_KEY, STORAGE_VERSION, TOAST_DURATION_MS } from "@/constants/config";
 
 export function useChat() {
@@ -88,7 +88,7 @@ export function useChat() {
   const sendMessage = useCallback(async (content: string) => {
     // 1. Cancel in-flight
     abortRef.current?.abort();
-    abortRef.current = new AbortController();
+    const { signal } = (abortRef.current = new AbortController());
 
     let targetId = currentSessionId;
     
@@ -122,21 +122,19 @@ export function useChat() {
     setIsStreaming(true);
 
     try {
-      // Build History
-      const currentMsgs = sessions.find(s => s.id === targetId)?.messages || [];
-      const history = currentMsgs
-        .filter(m => m.content.trim() !== '')
-        .map(m => ({ role: m.role, content: m.content }))
-        .slice(-10); // Keep last 10 messages for context
-
-      const request: ChatRequest = {
+      const target = sessions.find(s => s.id === targetId);
+      // Full history only seeds a new server session; later turns carry just the message
+      const withHistory = (): ChatRequest => ({
         character: activePersona,
         message: content,
-        history
-      };
+        history: (target?.messages || [])
+          .filter(m => m.content.trim() !== '')
+          .map(m => ({ role: m.role, content: m.content }))
+          .slice(-10) // Keep last 10 messages for context
+      });
 
       let streamedText = "";
-      await streamChat(request, (chunk) => {
+      const onChunk = (chunk: string) => {
         streamedText += chunk;
         setSessions(prev => prev.map(s => {
           if (s.id === targetId) {
@@ -149,7 +147,24 @@ export function useChat() {
           }
           return s;
         }));
-      });
+      };
+
+      let serverSessionId: string | null;
+      if (target?.serverSessionId) {
+        try {
+          serverSessionId = await streamChat(
+            { character: activePersona, message: content, session_id: target.serverSessionId },
+            onChunk,
+            signal
+          );
+        } catch (err) {
+          // Expired or evicted server-side: start over from the local history
+          if (!(err instanceof ApiError && err.status === 404 && err.body?.code === 'SESSION_NOT_FOUND')) throw err;
+          serverSessionId = await streamChat(withHistory(), onChunk, signal);
+        }
+      } else {
+        serverSessionId = await streamChat(withHistory(), onChunk, signal);
+      }
 
       // Final Update (Title etc)
       setSessions(prev => prev.map(s => {
@@ -166,7 +181,7 @@ export function useChat() {
              title = clean.split(' ').slice(0, 5).join(' ') || 'New Conversation';
           }
           
-          return { ...s, messages: msgs, title };
+          return { ...s, messages: msgs, title, serverSessionId: serverSessionId ?? undefined };
         }
         return s;
       }));
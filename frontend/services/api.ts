@@ -1,4 +1,4 @@
-import { ENDPOINTS } from "@/constants/config";
+import { ENDPOINTS, SESSION_HEADER } from "@/constants/config";
 import { ChatRequest } from "@/types/chat";
 
 export class ApiError extends Error {
@@ -12,11 +12,12 @@ export class ApiError extends Error {
   }
 }
 
+/** Streams a reply and resolves to the server session id to send with the next turn. */
 export async function streamChat(
   request: ChatRequest,
   onChunk: (chunk: string) => void,
   signal?: AbortSignal
-): Promise<void> {
+): Promise<string | null> {
   const response = await fetch(ENDPOINTS.chat, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
@@ -41,13 +42,46 @@ export async function streamChat(
     throw error;
   }
 
+  const sessionId = response.headers.get(SESSION_HEADER);
   const reader = response.body?.getReader();
   if (!reader) throw new Error("No response body");
 
+  // Server-Sent Events: blocks separated by a blank line, "field: value" lines,
+  // ":"-prefixed comments are heartbeats.
   const decoder = new TextDecoder();
+  let buffer = "";
   while (true) {
     const { done, value } = await reader.read();
     if (done) break;
-    onChunk(decoder.decode(value, { stream: true }));
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary: number;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      handleEvent(block, onChunk);
+    }
+  }
+  return sessionId;
+}
+
+function handleEvent(block: string, onChunk: (chunk: string) => void): void {
+  let event = "message";
+  const data: string[] = [];
+  for (const line of block.split("\n")) {
+    if (line.startsWith(":")) continue;
+    const sep = line.indexOf(":");
+    const field = sep === -1 ? line : line.slice(0, sep);
+    const value = sep === -1 ? "" : line.slice(sep + 1).replace(/^ /, "");
+    if (field === "event") event = value;
+    else if (field === "data") data.push(value);
+  }
+  if (data.length === 0) return;
+
+  const payload = JSON.parse(data.join("\n"));
+  if (event === "token") {
+    onChunk(payload.content);
+  } else if (event === "error") {
+    throw new ApiError(502, payload.code, payload);
   }
 }
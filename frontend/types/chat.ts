@@ -14,10 +14,12 @@ export interface Session {
   messages: Message[];
   createdAt: number;
   version: number; // For localStorage versioning
+  serverSessionId?: string; // Server-side conversation, so turns only send the new message
 }
 
 export interface ChatRequest {
   character: string;
   message: string;
-  history: { role: MessageRole; content: string }[];
+  history?: { role: MessageRole; content: string }[];
+  session_id?: string;
 }